@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Archive des pages récupérées, adressée par contenu, et rejeu dans les détecteurs.
+
+Chaque page distincte est stockée une seule fois, compressée, dans un fichier d'archive en ajout
+seul (pages.pack); un index SQLite associe (site, heure) à l'empreinte SHA-256 de la page.
+Le rejeu lit l'archive via mmap et repasse l'historique dans les détecteurs actuels.
+
+Usage:
+    python archive.py stats
+    python archive.py replay [--target ID] [--since AAAA-MM-JJ] [--until AAAA-MM-JJ] [--changes]
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+# Répertoire de l'archive ('' = enregistrement désactivé)
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', '')
+ARCHIVE_COMPRESSION = int(os.getenv('ARCHIVE_COMPRESSION', '6'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target_id TEXT NOT NULL,
+    url TEXT,
+    at REAL NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS captures_target ON captures (target_id, at);
+"""
+
+
+class PageArchive:
+    """Pages compressées dédupliquées (pages.pack) + index des captures (index.db)"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pack_path = self.directory / 'pages.pack'
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.directory / 'index.db'), check_same_thread=False,
+                                    isolation_level=None, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.pack = open(self.pack_path, 'ab')
+
+    def record(self, target_id, url, text, at=None):
+        """Archive une page (texte décodé); renvoie son empreinte. Une page déjà vue n'ajoute qu'une ligne d'index"""
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        at = at or time.time()
+        with self.lock:
+            known = self.conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            with self.conn:
+                self.conn.execute('BEGIN')
+                if not known:
+                    compressed = zlib.compress(data, ARCHIVE_COMPRESSION)
+                    offset = self.pack.seek(0, os.SEEK_END)
+                    self.pack.write(compressed)
+                    self.pack.flush()
+                    self.conn.execute('INSERT INTO blobs (hash, offset, length, size) VALUES (?, ?, ?, ?)',
+                                      (digest, offset, len(compressed), len(data)))
+                self.conn.execute('INSERT INTO captures (target_id, url, at, hash) VALUES (?, ?, ?, ?)',
+                                  (target_id, url, at, digest))
+        return digest
+
+    def captures(self, target_id=None, since=None, until=None):
+        """[(target_id, at, hash, offset, length)] dans l'ordre chronologique"""
+        query = ('SELECT c.target_id, c.at, c.hash, b.offset, b.length FROM captures c '
+                 'JOIN blobs b ON b.hash = c.hash WHERE 1 = 1')
+        params = []
+        if target_id:
+            query += ' AND c.target_id = ?'
+            params.append(target_id)
+        if since:
+            query += ' AND c.at >= ?'
+            params.append(since)
+        if until:
+            query += ' AND c.at < ?'
+            params.append(until)
+        with self.lock:
+            return self.conn.execute(query + ' ORDER BY c.at, c.id', params).fetchall()
+
+    def replay(self, target_id=None, since=None, until=None):
+        """Générateur (target_id, at, hash, html) lu depuis l'archive projetée en mémoire;
+        une page répétée n'est décompressée qu'une fois de suite"""
+        self.pack.flush()
+        if os.path.getsize(self.pack_path) == 0:
+            return
+        with open(self.pack_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pack:
+            last_hash, last_html = None, None
+            for capture_target, at, digest, offset, length in self.captures(target_id, since, until):
+                if digest != last_hash:
+                    last_hash, last_html = digest, zlib.decompress(pack[offset:offset + length]).decode('utf-8')
+                yield capture_target, at, digest, last_html
+
+    def stats(self):
+        with self.lock:
+            blobs, stored, raw = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            captures, first, last = self.conn.execute('SELECT COUNT(*), MIN(at), MAX(at) FROM captures').fetchone()
+            per_target = self.conn.execute(
+                'SELECT target_id, COUNT(*), COUNT(DISTINCT hash) FROM captures GROUP BY target_id').fetchall()
+        return {
+            'captures': captures,
+            'pages': blobs,
+            'stored_bytes': stored,
+            'raw_bytes': raw,
+            'first': first,
+            'last': last,
+            'targets': {target_id: {'captures': n, 'pages': distinct} for target_id, n, distinct in per_target},
+        }
+
+    def close(self):
+        with self.lock:
+            self.pack.close()
+            self.conn.close()
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def replay_command(archive, args):
+    """Repasse l'historique dans les détecteurs actuels du registre et affiche les verdicts"""
+    # Import tardif: l'enregistrement depuis le moniteur n'a pas besoin des détecteurs
+    import logging
+    from targets import load_targets
+    logging.disable(logging.WARNING)
+
+    registry = load_targets(300, 30)
+    states = {target.id: target.detector.initial_state for target in registry}
+    counts = {}
+    start = time.perf_counter()
+    total_bytes = 0
+    for target_id, at, digest, html in archive.replay(args.target, parse_date(args.since), parse_date(args.until)):
+        target = registry.get(target_id)
+        if target is None:
+            continue
+        total_bytes += len(html)
+        result = target.detector.check(html)
+        new_state, notify = target.detector.apply(states[target_id], result)
+        counts[target_id] = counts.get(target_id, 0) + 1
+        when = datetime.fromtimestamp(at).strftime('%Y-%m-%d %H:%M:%S')
+        if new_state != states[target_id] or not args.changes:
+            label, _ = target.detector.display(new_state)
+            print(f"{when} {target_id:<20} {digest[:12]} {label}{'  🔔' if notify else ''}")
+        states[target_id] = new_state
+    elapsed = time.perf_counter() - start
+    checks = sum(counts.values())
+    print(f"\n{checks} page(s) rejouée(s) en {elapsed:.2f}s "
+          f"({checks / elapsed if elapsed else 0:.0f} pages/s, {total_bytes / 1024 / 1024:.1f} Mo)", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive des pages: statistiques et rejeu dans les détecteurs")
+    parser.add_argument('command', choices=['stats', 'replay'])
+    parser.add_argument('--dir', default=ARCHIVE_DIR or 'archive', help="Répertoire de l'archive")
+    parser.add_argument('--target', help='Identifiant du site')
+    parser.add_argument('--since', help='Date de début (ISO)')
+    parser.add_argument('--until', help='Date de fin (ISO, exclue)')
+    parser.add_argument('--changes', action='store_true', help='N\'afficher que les changements d\'état')
+    args = parser.parse_args()
+
+    archive = PageArchive(args.dir)
+    if args.command == 'stats':
+        stats = archive.stats()
+        ratio = stats['stored_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0
+        print(f"{stats['captures']} capture(s), {stats['pages']} page(s) distincte(s), "
+              f"{stats['stored_bytes'] / 1024:.0f} Ko stockés ({ratio:.0%} de {stats['raw_bytes'] / 1024:.0f} Ko)")
+        for target_id, entry in stats['targets'].items():
+            print(f"  {target_id:<20} {entry['captures']:>6} capture(s) {entry['pages']:>6} page(s)")
+    else:
+        replay_command(archive, args)
+    archive.close()
+
+
+if __name__ == '__main__':
+    main()
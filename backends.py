@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Modes de récupération des sites ("fetch" dans le fichier de configuration).
+
+- html (défaut): page HTML décodée en texte, analysée en streaming si le détecteur le permet;
+- json: point d'accès JSON/XHR de la billetterie (quelques Ko au lieu de centaines de Ko de HTML),
+  décodé une fois en objets Python et passé aux détecteurs JSON (json_value).
+
+Chaque mode fixe la requête (méthode, en-têtes, corps), le transport (compressions acceptées,
+taille maximum de la réponse) et la conversion de la réponse.
+"""
+
+import codecs
+import hashlib
+import json
+
+import http_client
+
+
+class HtmlBackend:
+    """Page HTML: en-têtes par défaut de la session (navigateur), texte décodé"""
+
+    streams = True
+    headers = {}
+
+    def __init__(self, method='GET', headers=None, body=None, accept_encoding=None, max_bytes=None):
+        self.method = method.upper()
+        self.headers = dict(self.headers, **(headers or {}))
+        if accept_encoding:
+            # Compressions négociées pour ce site ("identity" = aucune)
+            self.headers['Accept-Encoding'] = http_client.accept_encoding(accept_encoding)
+        self.body = body
+        # Taille maximum de la réponse décompressée (0 = illimitée)
+        self.max_bytes = http_client.MAX_BODY_BYTES if max_bytes is None else max_bytes
+
+    def request_kwargs(self):
+        kwargs = {}
+        if self.body is not None:
+            kwargs['json'] = self.body
+        return kwargs
+
+    def key(self, url):
+        """Clé de la requête (cache partagé, requêtes conditionnelles): l'URL pour un simple GET"""
+        if (self.method == 'GET' and self.body is None and not self.headers
+                and self.max_bytes == http_client.MAX_BODY_BYTES):
+            return url
+        signature = json.dumps([self.method, self.headers, self.body, self.max_bytes], sort_keys=True)
+        return f"{url}#{hashlib.sha1(signature.encode()).hexdigest()[:12]}"
+
+    def decode(self, chunks, encoding):
+        """Texte de la page, décodé morceau par morceau (sans copie de la réponse entière en octets)"""
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parts = [decoder.decode(chunk) for chunk in chunks]
+        parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)
+
+
+class JsonBackend(HtmlBackend):
+    """Point d'accès JSON (XHR): réponse décodée une seule fois en objets Python"""
+
+    streams = False
+    headers = {'Accept': 'application/json', 'X-Requested-With': 'XMLHttpRequest'}
+
+    def decode(self, chunks, encoding):
+        # Décodage direct des octets (json détecte l'encodage UTF-8/16/32), sans passer par du texte
+        return json.loads(b''.join(chunks))
+
+
+# Modes utilisables dans le fichier de configuration des sites ("fetch": {"backend": ...})
+FETCH_BACKENDS = {
+    'html': HtmlBackend,
+    'json': JsonBackend,
+}
+
+
+def build_backend(config):
+    """Construit le mode de récupération d'un site à partir de son entrée "fetch" (optionnelle)"""
+    params = dict(config or {})
+    backend_type = params.pop('backend', 'html')
+    if backend_type not in FETCH_BACKENDS:
+        raise ValueError(f"Mode de récupération inconnu: {backend_type}")
+    return FETCH_BACKENDS[backend_type](**params)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Budgets de bande passante sur une fenêtre glissante, par site et au total.
+
+Chaque récupération enregistre les octets reçus (tels que transférés, donc compressés).
+Quand un site (ou l'ensemble) dépasse son budget sur la fenêtre, ses vérifications sont espacées
+en proportion du dépassement (au plus BANDWIDTH_MAX_STRETCH fois l'intervalle normal).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+# Fenêtre glissante (secondes) sur laquelle les budgets s'appliquent
+BANDWIDTH_WINDOW = float(os.getenv('BANDWIDTH_WINDOW', '3600'))
+# Budget total (octets par fenêtre, 0 = illimité); budget par site: "bandwidth_budget" dans targets.json
+BANDWIDTH_BUDGET = int(os.getenv('BANDWIDTH_BUDGET', '0'))
+# Allongement maximum de l'intervalle d'un site hors budget
+BANDWIDTH_MAX_STRETCH = float(os.getenv('BANDWIDTH_MAX_STRETCH', '8'))
+
+TOTAL = '_total'
+
+
+class BandwidthBudget:
+    """Octets reçus par site sur la fenêtre glissante, et allongement des intervalles hors budget"""
+
+    def __init__(self, budgets=None, total=BANDWIDTH_BUDGET, window=BANDWIDTH_WINDOW,
+                 max_stretch=BANDWIDTH_MAX_STRETCH):
+        self.budgets = {key: budget for key, budget in (budgets or {}).items() if budget}
+        if total:
+            self.budgets[TOTAL] = total
+        self.window = window
+        self.max_stretch = max_stretch
+        self.lock = threading.Lock()
+        # Par site: (heure, octets) des récupérations de la fenêtre et leur somme
+        self.samples = {}
+        self.sums = {}
+        # Sites actuellement hors budget (pour ne journaliser que les transitions)
+        self.over = set()
+
+    def prune(self, key, now):
+        samples = self.samples.get(key)
+        while samples and samples[0][0] <= now - self.window:
+            self.sums[key] -= samples.popleft()[1]
+
+    def record(self, key, nbytes, now=None):
+        """Ajoute nbytes reçus pour le site key"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            for k in (key, TOTAL):
+                self.samples.setdefault(k, deque()).append((now, nbytes))
+                self.sums[k] = self.sums.get(k, 0) + nbytes
+                self.prune(k, now)
+            usage = self.sums[key]
+        metrics.BANDWIDTH_USAGE.set(usage, target=key)
+
+    def usage(self, key, now=None):
+        """Octets reçus sur la fenêtre (key=TOTAL pour l'ensemble)"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.prune(key, now)
+            return self.sums.get(key, 0)
+
+    def ratio(self, key, now):
+        budget = self.budgets.get(key)
+        return self.usage(key, now) / budget if budget else 0
+
+    def stretch(self, key, now=None):
+        """Facteur (>= 1) à appliquer à l'intervalle du site: dépassement de son budget ou du budget total"""
+        now = time.monotonic() if now is None else now
+        factor = min(self.max_stretch, max(1.0, self.ratio(key, now), self.ratio(TOTAL, now)))
+        metrics.POLL_STRETCH.set(factor, target=key)
+        if factor > 1 and key not in self.over:
+            self.over.add(key)
+            logging.warning("[%s] 📶 Budget de bande passante dépassé (%d Ko sur %.0f min): intervalle × %.1f",
+                            key, self.usage(key, now) // 1024, self.window / 60, factor)
+        elif factor == 1 and key in self.over:
+            self.over.discard(key)
+            logging.info("[%s] 📶 De nouveau dans le budget de bande passante", key)
+        return factor
+
+    def report(self, now=None):
+        """{site: {'bytes', 'budget', 'stretch'}} sur la fenêtre, avec le total sous '_total'"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            keys = list(self.samples)
+        return {key: {'bytes': self.usage(key, now),
+                      'budget': self.budgets.get(key),
+                      'stretch': round(min(self.max_stretch, max(1.0, self.ratio(key, now), self.ratio(TOTAL, now))), 2)}
+                for key in keys}
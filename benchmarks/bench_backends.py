@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Modes de récupération: catalogue HTML de la billetterie face à son point d'accès JSON,
+servis par un serveur local. La disponibilité change à chaque vérification (pas de cache 304).
+
+Mesure par mode les octets reçus et la durée d'une vérification (récupération + détection).
+
+Usage: python benchmarks/bench_backends.py [--checks N] [--products P] [--json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from pages import ticketing_page
+from stub_server import StubServer
+
+
+def ticketing_api(found, categories=12):
+    """Réponse JSON de la billetterie: une entrée par catégorie de places, 'Petit Cop' si présent"""
+    offers = [{'id': i, 'name': f'Tribune {i}', 'price': 20 + 5 * i, 'available': i % 3 != 0}
+              for i in range(categories)]
+    if found:
+        offers.append({'id': 99, 'name': 'Petit Cop Stade Toulousain', 'price': 12, 'available': True})
+    return json.dumps({'event': {'id': 'st-mhr', 'name': 'Stade Toulousain - Montpellier'}, 'offers': offers})
+
+
+def run(checks=20, products=1500):
+    workdir = tempfile.mkdtemp(prefix='bench-backends-')
+    os.chdir(workdir)
+    server = StubServer().start()
+    state = {'n': 0}
+    pages = [ticketing_page(False, products), ticketing_page(True, products)]
+    apis = [ticketing_api(False), ticketing_api(True)]
+    server.add_page('/catalogue', lambda: pages[state['n'] % 2])
+    server.add_page('/api/offers', lambda: apis[state['n'] % 2], content_type='application/json')
+    with open('targets.json', 'w') as f:
+        json.dump([
+            {'id': 'html', 'url': server.url('/catalogue'),
+             'detector': {'type': 'phrase', 'phrase': 'PETIT COP STADE TOULOUSAIN'}},
+            {'id': 'json', 'url': server.url('/api/offers'), 'fetch': {'backend': 'json'},
+             'detector': {'type': 'json_value', 'notify_on': [True],
+                          'path': "$.offers[?(@.name == 'Petit Cop Stade Toulousain')].available"}},
+        ], f)
+
+    os.environ.update({
+        'TARGETS_FILE': os.path.join(workdir, 'targets.json'),
+        'STATE_DB': os.path.join(workdir, 'state.db'),
+    })
+    logging.disable(logging.CRITICAL)
+    import metrics
+    from boudchart_monitor import DualMonitor
+
+    monitor = DualMonitor()
+    results = []
+    for target in monitor.registry:
+        durations = []
+        verdicts = set()
+        for n in range(checks):
+            state['n'] = n
+            start = time.perf_counter()
+            fetched, result, _ = monitor.fetch_and_check(target)
+            durations.append(time.perf_counter() - start)
+            verdicts.add(json.dumps(result))
+        received = metrics.FETCH_BYTES.values.get((target.id,), 0)
+        results.append({
+            'benchmark': 'backends',
+            'name': target.id,
+            'checks': checks,
+            'bytes_per_check': round(received / checks),
+            'ms_per_check': round(sum(durations) / checks * 1000, 3),
+            'results': sorted(verdicts),
+        })
+    server.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--checks', type=int, default=20)
+    parser.add_argument('--products', type=int, default=1500, help='Offres du catalogue HTML')
+    parser.add_argument('--json', action='store_true', help='Sortie JSON')
+    args = parser.parse_args()
+
+    results = run(args.checks, args.products)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(f"{result['name']:<6} {result['bytes_per_check']:>9} octets {result['ms_per_check']:>9.3f} ms "
+              f"{' / '.join(result['results'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Cycle complet hors ligne: N sites servis par un serveur local (latences et erreurs injectées),
+bascule SOON → TICKETS en cours de route et faux Telegram.
+
+Mesure la durée des cycles (p50/p95/max) face à la somme des latences, les erreurs,
+et le délai entre la détection et l'accusé de réception des alertes.
+
+Usage: python benchmarks/bench_cycle.py [--targets N] [--cycles C] [--flip-at K] [--json]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from pages import boudchart_page, ticketing_page
+from stub_server import StubServer
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def setup(server, n_targets, flip_at, state):
+    """Pages du serveur local + targets.json; renvoie la somme des latences injectées"""
+    entries = []
+    total_latency = 0.0
+    for i in range(n_targets):
+        # Un site sur quatre est lent, un sur cinq renvoie des erreurs une fois sur deux
+        latency = 0.4 if i % 4 == 3 else 0.05
+        error_rate = 0.5 if i % 5 == 4 else 0.0
+        total_latency += latency
+        path = f'/site{i}'
+        if i % 2 == 0:
+            soon, tickets = boudchart_page('SOON', 500), boudchart_page('TICKETS', 500)
+            server.add_page(path, lambda soon=soon, tickets=tickets: tickets if state['cycle'] >= flip_at else soon,
+                            latency, error_rate)
+            detector = {'type': 'tour_status', 'city': 'Casablanca', 'notify_on': ['TICKETS']}
+        else:
+            absent, present = ticketing_page(False, 500), ticketing_page(True, 500)
+            server.add_page(path, lambda absent=absent, present=present: present if state['cycle'] >= flip_at else absent,
+                            latency, error_rate)
+            detector = {'type': 'phrase', 'phrase': 'PETIT COP STADE TOULOUSAIN'}
+        entries.append({'id': f'site{i}', 'name': f'Site {i}', 'url': server.url(path), 'detector': detector})
+    with open('targets.json', 'w') as f:
+        json.dump(entries, f)
+    return total_latency
+
+
+def run(n_targets=8, cycles=6, flip_at=3):
+    workdir = tempfile.mkdtemp(prefix='bench-cycle-')
+    os.chdir(workdir)
+    server = StubServer().start()
+    state = {'cycle': 0}
+    total_latency = setup(server, n_targets, flip_at, state)
+
+    # Configuration lue à l'import des modules: à fixer avant d'importer le moniteur
+    os.environ.update({
+        'TARGETS_FILE': os.path.join(workdir, 'targets.json'),
+        'STATE_DB': os.path.join(workdir, 'state.db'),
+        'MAX_WORKERS': str(n_targets),
+        'TELEGRAM_ENABLED': 'true',
+        'TELEGRAM_BOT_TOKEN': 'bench',
+        'TELEGRAM_CHAT_ID': '1',
+        'TELEGRAM_API_URL': server.url(),
+        'TELEGRAM_CHAT_SPACING': '0',
+        'NOTIFY_BACKOFF_BASE': '0.1',
+        'HOST_MAX_CONCURRENCY': str(n_targets),
+    })
+    logging.disable(logging.CRITICAL)
+    from boudchart_monitor import DualMonitor
+
+    monitor = DualMonitor()
+    targets = list(monitor.registry)
+    durations = []
+    failed = []
+    for cycle in range(cycles):
+        state['cycle'] = cycle
+        before = dict(monitor.scheduler.failures)
+        start = time.perf_counter()
+        monitor.check_all(targets)
+        durations.append(time.perf_counter() - start)
+        # Échecs de ce tour seulement (le compteur du planificateur est cumulé tant que le site échoue)
+        failed.append(sum(1 for target in targets if monitor.scheduler.failures[target.id] > before[target.id]))
+    flushed = monitor.notifier.flush(30)
+    server.stop()
+
+    latencies = [d['latency'] for d in monitor.notifier.deliveries]
+    return [{
+        'benchmark': 'cycle',
+        'name': f'{n_targets}_targets',
+        'cycles': cycles,
+        'requests': server.requests,
+        'cycle_p50_ms': round(percentile(durations, 50) * 1000, 1),
+        'cycle_p95_ms': round(percentile(durations, 95) * 1000, 1),
+        'cycle_max_ms': round(max(durations) * 1000, 1),
+        'sum_latency_ms': round(total_latency * 1000, 1),
+        'failed_checks': sum(failed),
+        'failed_per_cycle': failed,
+        'alerts_delivered': len(latencies),
+        'telegram_messages': len(server.telegram_messages),
+        'notify_p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'notify_max_ms': round(max(latencies) * 1000, 1) if latencies else None,
+        'flushed': flushed,
+    }]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--targets', type=int, default=8)
+    parser.add_argument('--cycles', type=int, default=6)
+    parser.add_argument('--flip-at', type=int, default=3, help='Cycle de la bascule vers les billets')
+    parser.add_argument('--json', action='store_true', help='Sortie JSON')
+    args = parser.parse_args()
+
+    # Les alertes sont aussi affichées sur la sortie standard: on les renvoie vers stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args.targets, args.cycles, args.flip_at)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for key, value in results[0].items():
+        print(f'{key:<20} {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Débit et mémoire des détecteurs: rejoue les échantillons de pages (benchmarks/samples)
+et des variantes synthétiques de plusieurs Mo dans check_boudchart et check_stade_toulousain.
+
+Usage: python benchmarks/bench_detectors.py [--iterations N] [--sizes-mb 1,5] [--json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from pages import boudchart_page, ticketing_page, inflate, load_samples
+
+
+def make_monitor():
+    """DualMonitor isolé dans un répertoire temporaire (état, journal)"""
+    os.chdir(tempfile.mkdtemp(prefix='bench-'))
+    os.environ.setdefault('TARGETS_FILE', os.path.join(os.getcwd(), 'targets.json'))
+    logging.disable(logging.CRITICAL)
+    from boudchart_monitor import DualMonitor
+    return DualMonitor()
+
+
+def pages(sizes_mb):
+    """[(nom, type, html)] : échantillons puis variantes synthétiques"""
+    result = [(name, kind, html) for name, (kind, html) in load_samples().items()]
+    for size in sizes_mb:
+        size_bytes = int(size * 1024 * 1024)
+        result.append((f'synthetic_boudchart_{size}mb', 'boudchart', inflate(boudchart_page(), size_bytes)))
+        result.append((f'synthetic_ticketing_{size}mb', 'ticketing', inflate(ticketing_page(), size_bytes)))
+    return result
+
+
+def measure(check, html, iterations):
+    """Renvoie (secondes par appel, pic mémoire Python en octets, résultat)"""
+    result = check(html)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        check(html)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    check(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def run(iterations=10, sizes_mb=(1, 5)):
+    monitor = make_monitor()
+    results = []
+    for name, kind, html in pages(sizes_mb):
+        check = monitor.check_boudchart if kind == 'boudchart' else monitor.check_stade_toulousain
+        size = len(html.encode('utf-8'))
+        seconds, peak, verdict = measure(check, html, iterations)
+        results.append({
+            'benchmark': 'detector',
+            'name': name,
+            'detector': check.__name__,
+            'bytes': size,
+            'ms_per_check': round(seconds * 1000, 3),
+            'checks_per_s': round(1 / seconds, 1) if seconds else None,
+            'mb_per_s': round(size / seconds / 1024 / 1024, 1) if seconds else None,
+            'peak_python_kb': round(peak / 1024, 1),
+            'result': verdict,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--sizes-mb', default='1,5', help='Tailles des variantes synthétiques (Mo)')
+    parser.add_argument('--json', action='store_true', help='Sortie JSON')
+    args = parser.parse_args()
+
+    results = run(args.iterations, [float(s) for s in args.sizes_mb.split(',') if s])
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'page':<32} {'Ko':>8} {'ms/check':>10} {'Mo/s':>8} {'pic Ko':>9}  résultat")
+    for r in results:
+        print(f"{r['name'][:32]:<32} {r['bytes'] // 1024:>8} {r['ms_per_check']:>10} "
+              f"{r['mb_per_s']:>8} {r['peak_python_kb']:>9}  {r['result']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compare le temps de parsing et la mémoire du détecteur Boudchart: mode streaming, mode rapide
+(lxml + sélecteur) et mode texte complet (BeautifulSoup).
+
+Usage: python benchmarks/bench_parse.py [page.html ...] [--iterations N] [--json]
+Sans fichier, une page synthétique de type Boudchart est générée.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from detectors import TourStatusDetector
+from pages import boudchart_page
+
+
+def measure(check, html, iterations):
+    """Renvoie (secondes par appel, pic mémoire Python en octets, résultat)"""
+    result = check(html)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        check(html)
+    elapsed = (time.perf_counter() - start) / iterations
+    
+    tracemalloc.start()
+    check(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pages', nargs='*', help='Pages HTML sauvegardées')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='Sortie JSON')
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    
+    pages = [(path, open(path, encoding='utf-8').read()) for path in args.pages]
+    if not pages:
+        pages = [('synthetic', boudchart_page())]
+    
+    results = []
+    for name, html in pages:
+        for mode in ('stream', 'fast', 'soup'):
+            detector = TourStatusDetector('Boudchart', parser=mode)
+            seconds, peak, status = measure(detector.check, html, args.iterations)
+            results.append({
+                'page': name, 'bytes': len(html.encode('utf-8')), 'mode': mode,
+                'ms_per_check': round(seconds * 1000, 3), 'peak_python_kb': round(peak / 1024, 1),
+                'status': status,
+            })
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    # Note: le pic mémoire ne compte que le tas Python (tracemalloc), pas les allocations de libxml2
+    print(f"{'page':<30} {'mode':<6} {'ms/check':>10} {'pic KB':>10}  statut")
+    for r in results:
+        print(f"{r['page'][-30:]:<30} {r['mode']:<6} {r['ms_per_check']:>10} {r['peak_python_kb']:>10}  {r['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Démarrage à froid du serveur web: temps d'import de web_server et délai avant la première réponse.
+
+Vérifie que l'import ne charge pas les modules lourds du monitoring (requests, bs4, lxml...),
+qui arrivent plus tard dans le thread de monitoring, et que le temps d'import reste sous le budget.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS] [--json]
+Code de sortie 1 si le budget est dépassé ou si un module lourd est importé.
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+
+# Budget du temps d'import de web_server (millisecondes)
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '400'))
+# Modules qui ne doivent pas être chargés par "import web_server"
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'smtplib', 'email.mime', 'boudchart_monitor', 'detectors')
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def environment(workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, LOG_FILE='', PYTHONDONTWRITEBYTECODE='1',
+               STATE_DB=os.path.join(workdir, 'state.db'),
+               SNAPSHOT_FILE=os.path.join(workdir, 'status_snapshot.json'),
+               TARGETS_FILE=os.path.join(workdir, 'targets.json'))
+    env.pop('TELEGRAM_BOT_TOKEN', None)
+    return env
+
+
+def import_profile(workdir):
+    """(durée totale en ms, modules importés) d'après python -X importtime"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import web_server'], cwd=workdir,
+                            env=environment(workdir), capture_output=True, text=True, check=True).stderr
+    total_us = 0
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        modules.append(match.group(4))
+        # Seuls les imports de premier niveau sont additionnés (le cumul inclut leurs dépendances)
+        if len(match.group(3)) == 1:
+            total_us += int(match.group(2))
+    return total_us / 1000, modules
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                response.read()
+                return time.perf_counter()
+        except OSError:
+            time.sleep(0.005)
+    return None
+
+
+def first_response(workdir, timeout=30):
+    """Délais (ms) entre le lancement de web_server.py et les premières réponses de /ping et /health"""
+    port = free_port()
+    env = environment(workdir)
+    env['PORT'] = str(port)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'web_server.py')], cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        ping = wait_for(f'http://127.0.0.1:{port}/ping', deadline)
+        health = wait_for(f'http://127.0.0.1:{port}/health', deadline)
+    finally:
+        process.terminate()
+        process.wait()
+    return tuple(round((t - start) * 1000, 1) if t else None for t in (ping, health))
+
+
+def run(runs, budget_ms):
+    import_times, ping_times, health_times = [], [], []
+    heavy = set()
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            total_ms, modules = import_profile(workdir)
+            import_times.append(total_ms)
+            heavy.update(m for m in modules if any(m == h or m.startswith(h + '.') for h in HEAVY_MODULES))
+            ping_ms, health_ms = first_response(workdir)
+            ping_times.append(ping_ms)
+            health_times.append(health_ms)
+    import_ms = round(min(import_times), 1)
+    return [{
+        'name': 'web_server',
+        'import_ms': import_ms,
+        'import_budget_ms': budget_ms,
+        'first_ping_ms': min((t for t in ping_times if t is not None), default=None),
+        'first_health_ms': min((t for t in health_times if t is not None), default=None),
+        'heavy_modules': sorted(heavy),
+        'ok': import_ms <= budget_ms and not heavy and None not in ping_times + health_times,
+    }]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3, help='Nombre de démarrages (le meilleur est gardé)')
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_IMPORT_BUDGET_MS)
+    parser.add_argument('--json', action='store_true', help='Sortie JSON')
+    args = parser.parse_args()
+
+    results = run(args.runs, args.budget_ms)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results[0].items():
+            print(f'{key:<20} {value}')
+    if not results[0]['ok']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Pages de test pour les benchmarks: échantillons écrits à la main sur le modèle des vraies pages
+(benchmarks/samples/*.html, pas des captures) et variantes générées de plusieurs mégaoctets
+"""
+
+from pathlib import Path
+
+SAMPLES_DIR = Path(__file__).parent / 'samples'
+
+CITIES = ['Paris', 'Bordeaux', 'Toulouse', 'Marseille', 'Brussels', 'Madrid', 'Montreal', 'Lyon']
+
+
+def boudchart_page(status='SOON', filler_rows=2000, city='Casablanca'):
+    """Page de type Boudchart: menu, scripts, longue liste de dates, la ville au milieu"""
+    rows = []
+    for i in range(filler_rows):
+        rows.append(
+            f'<div class="tour-row"><div class="city">{CITIES[i % len(CITIES)]}</div>'
+            f'<div class="date">{i % 28 + 1:02d}/03</div><a class="btn">TICKETS</a></div>'
+        )
+    rows.insert(filler_rows // 2,
+                f'<div class="tour-row"><div class="city">{city}</div>'
+                f'<div class="date">14/03</div><a class="btn">{status}</a></div>')
+    return (
+        '<html><head><title>Boudchart</title>'
+        '<script>var tour = {"city": "Casablanca", "status": "TICKETS"};</script>'
+        '<style>.btn { color: red; }</style></head><body>'
+        '<nav>' + ''.join(f'<a href="/p{i}">Lien {i}</a>' for i in range(200)) + '</nav>'
+        '<section class="tour">' + ''.join(rows) + '</section></body></html>'
+    )
+
+
+def ticketing_page(found=False, filler_products=1500):
+    """Catalogue de billetterie: nombreuses offres, 'Petit Cop' en fin de liste si présent"""
+    products = [
+        f'<li class="product"><h4>Tribune {i % 12} - Rang {i % 40}</h4>'
+        f'<span class="price">{20 + i % 80},00 €</span><button>Ajouter</button></li>'
+        for i in range(filler_products)
+    ]
+    if found:
+        products.append('<li class="product"><h4>Petit Cop Stade Toulousain</h4>'
+                        '<span class="price">12,00 €</span><button>Ajouter</button></li>')
+    return (
+        '<html><head><title>Billetterie</title>'
+        '<script>' + 'window.__STATE__ = {};' * 200 + '</script></head><body>'
+        '<ul class="catalogue">' + ''.join(products) + '</ul></body></html>'
+    )
+
+
+def inflate(html, size_bytes):
+    """Variante de plusieurs Mo: commentaires et blocs cachés ajoutés avant </body>"""
+    padding_unit = '<div class="hidden" aria-hidden="true">' + 'lorem ipsum ' * 40 + '</div>\n'
+    missing = max(0, size_bytes - len(html.encode('utf-8')))
+    padding = padding_unit * (missing // len(padding_unit) + 1)
+    return html.replace('</body>', padding + '</body>', 1)
+
+
+def load_samples():
+    """Échantillons écrits à la main: {nom: (type, html)}, type déduit du préfixe du fichier"""
+    samples = {}
+    for path in sorted(SAMPLES_DIR.glob('*.html')):
+        kind = 'boudchart' if path.name.startswith('boudchart') else 'ticketing'
+        samples[path.stem] = (kind, path.read_text(encoding='utf-8'))
+    return samples
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Lance tous les benchmarks hors ligne et écrit un rapport JSON (commit, version de Python, date).
+
+Usage: python benchmarks/run_all.py [--output rapport.json] [--baseline ancien.json] [--quick]
+Avec --baseline, affiche l'écart (%) de chaque mesure par rapport au rapport de référence.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Chaque benchmark tourne dans son propre processus: la configuration est lue à l'import
+BENCHMARKS = {
+    'parse': ['bench_parse.py', '--json'],
+    'detectors': ['bench_detectors.py', '--json'],
+    'cycle': ['bench_cycle.py', '--json'],
+    'startup': ['bench_startup.py', '--json'],
+    'backends': ['bench_backends.py', '--json'],
+}
+QUICK_ARGS = {
+    'parse': ['--iterations', '3'],
+    'detectors': ['--iterations', '2', '--sizes-mb', '1'],
+    'cycle': ['--targets', '4', '--cycles', '4', '--flip-at', '2'],
+    'startup': ['--runs', '1'],
+    'backends': ['--checks', '5'],
+}
+# Mesures comparées avec la référence (plus petit = mieux)
+COMPARED = ('ms_per_check', 'peak_python_kb', 'cycle_p50_ms', 'cycle_p95_ms', 'notify_p50_ms',
+            'import_ms', 'first_health_ms', 'bytes_per_check')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(name, quick=False):
+    args = BENCHMARKS[name] + (QUICK_ARGS[name] if quick else [])
+    process = subprocess.run([sys.executable, os.path.join(BENCH_DIR, args[0])] + args[1:],
+                             capture_output=True, text=True)
+    if not process.stdout:
+        raise RuntimeError(f"Benchmark {name} en échec:\n{process.stderr}")
+    # Code de sortie non nul avec résultats: budget dépassé (bench_startup), le rapport est quand même écrit
+    if process.returncode:
+        print(f"⚠️ Benchmark {name} hors budget", file=sys.stderr)
+    return json.loads(process.stdout)
+
+
+def result_key(suite, result):
+    return '/'.join(str(part) for part in (suite, result.get('name') or result.get('page'), result.get('mode')) if part)
+
+
+def compare(report, baseline):
+    """Lignes (clé, mesure, référence, actuel, écart %) pour les mesures communes"""
+    previous = {result_key(suite, r): r for suite, results in baseline['results'].items() for r in results}
+    rows = []
+    for suite, results in report['results'].items():
+        for result in results:
+            old = previous.get(result_key(suite, result))
+            if old is None:
+                continue
+            for metric in COMPARED:
+                before, after = old.get(metric), result.get(metric)
+                if before and after is not None:
+                    rows.append((result_key(suite, result), metric, before, after, (after - before) / before * 100))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='Fichier du rapport JSON (sinon sortie standard)')
+    parser.add_argument('--baseline', help='Rapport de référence à comparer')
+    parser.add_argument('--quick', action='store_true', help='Moins d\'itérations (vérification rapide)')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Benchmark à lancer')
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': {name: run_benchmark(name, args.quick) for name in (args.only or BENCHMARKS)},
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Rapport écrit dans {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparaison avec {args.baseline} (commit {baseline.get('commit')}):", file=sys.stderr)
+        for key, metric, before, after, delta in compare(report, baseline):
+            print(f"{key[:40]:<40} {metric:<16} {before:>10} → {after:<10} {delta:+6.1f}%", file=sys.stderr)
+
+    if any(result.get('ok') is False for results in report['results'].values() for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Serveur HTTP local pour les benchmarks et les tests: sert des pages avec latence et erreurs injectées
+(éventuellement avec ETag/Last-Modified et téléchargements interrompus), et imite l'API Telegram
+(sendMessage) en enregistrant les messages reçus
+"""
+
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TELEGRAM_PATH = re.compile(r'^/bot[^/]+/sendMessage$')
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Le client abandonne volontairement la lecture (arrêt anticipé du streaming)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Pages par chemin: contenu (str ou fonction sans argument), latence (s), taux d'erreur (0-1)"""
+
+    def __init__(self, host='127.0.0.1', port=0, seed=0):
+        self.pages = {}
+        self.latency = {}
+        self.content_types = {}
+        self.error_rate = {}
+        # Pages servies avec ETag/Last-Modified (304 si le client les renvoie)
+        self.validators = set()
+        # Connexion coupée après ce nombre d'octets du corps (Content-Length complet annoncé)
+        self.truncate = {}
+        # En-têtes des requêtes GET reçues, par chemin
+        self.request_headers = {}
+        self.telegram_latency = 0.0
+        self.telegram_messages = []
+        self.requests = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.httpd = QuietHTTPServer((host, port), self.make_handler())
+        self.thread = None
+
+    def add_page(self, path, content, latency=0.0, error_rate=0.0, content_type='text/html; charset=utf-8',
+                 validators=False):
+        self.pages[path] = content
+        self.content_types[path] = content_type
+        self.latency[path] = latency
+        self.error_rate[path] = error_rate
+        if validators:
+            self.validators.add(path)
+
+    def url(self, path=''):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}{path}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='stub-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Petites réponses (JSON): pas d'attente de l'algorithme de Nagle entre en-têtes et corps
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, code, body, content_type, headers=None, truncate=None):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if truncate is not None:
+                    self.wfile.write(body[:truncate])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                with server.lock:
+                    server.requests += 1
+                    failed = server.random.random() < server.error_rate.get(path, 0)
+                    server.request_headers.setdefault(path, []).append(dict(self.headers))
+                if path not in server.pages:
+                    return self.send_body(404, b'not found', 'text/plain')
+                time.sleep(server.latency.get(path, 0))
+                if failed:
+                    return self.send_body(503, b'injected error', 'text/plain')
+                content = server.pages[path]
+                content = content() if callable(content) else content
+                body = content.encode('utf-8')
+                headers = {}
+                if path in server.validators:
+                    digest = hashlib.sha1(body).hexdigest()
+                    headers = {'ETag': f'"{digest[:16]}"',
+                               'Last-Modified': formatdate(int(digest[:7], 16), usegmt=True)}
+                    if self.headers.get('If-None-Match') == headers['ETag']:
+                        return self.send_body(304, b'', server.content_types[path], headers)
+                self.send_body(200, body, server.content_types[path], headers, server.truncate.get(path))
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = self.rfile.read(length)
+                if not TELEGRAM_PATH.match(self.path):
+                    return self.send_body(404, b'not found', 'text/plain')
+                time.sleep(server.telegram_latency)
+                with server.lock:
+                    server.telegram_messages.append(json.loads(payload or b'{}'))
+                    message_id = len(server.telegram_messages)
+                body = json.dumps({'ok': True, 'result': {'message_id': message_id}}).encode()
+                self.send_body(200, body, 'application/json')
+
+        return Handler
@@ -3,42 +3,96 @@
 Script de monitoring dual avec logs détaillés pour debug
 """
 
-import requests
-from bs4 import BeautifulSoup
 import time
+import codecs
 import json
+import hashlib
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datetime import datetime
 from pathlib import Path
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
+import http_client
+from archive import ARCHIVE_DIR, PageArchive
+from backends import HtmlBackend
+from bandwidth import BandwidthBudget
+import metrics
+from notifier import Notifier
+from detectors import TourStatusDetector, TourTableDetector, PhraseDetector
+from events import BROKER
+from fetch_cache import FetchCache
+from leases import LEASE_RENEW, LEASE_TTL, SHARDING, LeaseManager
+from log_config import log_target, setup_logging
+from loop_watchdog import CYCLE_DEADLINE, LoopHeartbeat
+from scheduler import Scheduler
+from snapshot import StatusSnapshot
+from state_store import STATE_DB, StateStore
+from subscriptions import load_subscriptions
+from targets import load_targets
 
 # Configuration
 CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '300'))
-BOUDCHART_URL = "https://www.boudchart.com/"
-# Remplacer la ligne 21 par :
-STADE_TOULOUSAIN_URL = os.getenv('STADE_TOULOUSAIN_URL', "https://billetterie.stadetoulousain.fr/fr/catalogue/match-rugby-stade-toulousain-montpellier-herault-rugby-club")
 STATE_FILE = "monitoring_state.json"
-LOG_FILE = "monitoring.log"
+# Écart minimum (secondes) entre deux points de contrôle de l'heure de dernière vérification
+STATE_CHECKPOINT_INTERVAL = int(os.getenv('STATE_CHECKPOINT_INTERVAL', '300'))
+# Nombre maximum de sites vérifiés en parallèle
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', '8'))
+# Délai maximum (secondes) accordé à chaque site pour récupération + détection
+TARGET_DEADLINE = int(os.getenv('TARGET_DEADLINE', '30'))
+# Taille des morceaux lus en streaming
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '16384'))
+# Photo d'état écrite sur disque à chaque changement de statut; lue par d'autres processus (plusieurs
+# workers web, mode réparti), elle est aussi réécrite au plus toutes les SNAPSHOT_REFRESH secondes
+# pour l'heure du dernier cycle
+SNAPSHOT_REFRESH = float(os.getenv('SNAPSHOT_REFRESH', '60'))
+SNAPSHOT_READERS = SHARDING or int(os.getenv('WEB_WORKERS', '1')) > 1
+
+# Renvoyé par fetch_page quand la page n'a pas changé depuis la dernière récupération
+UNCHANGED = object()
+# Mode de récupération par défaut: page HTML
+HTML_BACKEND = HtmlBackend()
 
-# Configuration logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Configuration logging (file + thread d'écriture, rotation, voir log_config)
+setup_logging()
 
 class DualMonitor:
     def __init__(self):
         self.state_file = Path(STATE_FILE)
-        self.boudchart_status = None
-        self.stade_toulousain_found = False
+        self.store = StateStore(STATE_DB)
+        self.last_checkpoint = 0
+        # Sites surveillés (fichier TARGETS_FILE), dans l'ordre où leurs résultats sont appliqués
+        self.registry = load_targets(CHECK_INTERVAL, TARGET_DEADLINE)
+        # État courant par identifiant de site
+        self.states = {target.id: target.detector.initial_state for target in self.registry}
+        # Battement de cœur de la boucle et durée des phases de chaque cycle (lu par le chien de garde)
+        cycle_deadline = CYCLE_DEADLINE or max((target.deadline for target in self.registry), default=0) + 30
+        self.heartbeat = LoopHeartbeat(CHECK_INTERVAL, cycle_deadline, MAX_WORKERS)
+        # Arrêt demandé (monitoring abandonné par le chien de garde)
+        self.stop_event = threading.Event()
+        # Vérifications hors délai dont le worker tourne encore
+        self.stuck = set()
         self.load_state()
+        # Octets reçus par site sur une fenêtre glissante: les sites hors budget sont vérifiés moins souvent
+        self.bandwidth = BandwidthBudget({target.id: target.bandwidth_budget for target in self.registry})
+        # Échéances par site (tas), avec politesse par hôte
+        self.scheduler = Scheduler(self.registry, budget=self.bandwidth)
+        # Mode réparti: ce processus ne vérifie que les sites dont il détient le bail
+        self.leases = LeaseManager(STATE_DB) if SHARDING else None
+        self.lease_renewed_at = time.monotonic()
+        self.next_lease_refresh = 0
+        if self.leases:
+            self.refresh_leases()
+        else:
+            self.watch_freshness()
+        # Photo immuable de l'état, remplacée après chaque cycle (lue par le serveur web)
+        self.last_check = self.store.last_check()
+        self.snapshot = None
+        self.snapshot_saved_at = 0
+        # Changements d'état poussés aux navigateurs (/events), tampon commun à tous les monitorings du processus
+        self.events = BROKER
+        self.publish_snapshot()
         
         # Configuration des notifications
         self.telegram_config = {
@@ -46,248 +100,510 @@ class DualMonitor:
             'bot_token': os.getenv('TELEGRAM_BOT_TOKEN', ''),
             'chat_id': os.getenv('TELEGRAM_CHAT_ID', '')
         }
+        # Envoi en arrière-plan: la boucle de monitoring n'attend jamais Telegram
+        self.notifier = Notifier(self.telegram_config['bot_token'], self.telegram_config['chat_id'])
+        if self.telegram_config['enabled']:
+            self.notifier.start()
+        # Abonnés (SUBSCRIPTIONS_FILE): chaque alerte est distribuée à tous les chats concernés
+        self.subscriptions = load_subscriptions(self.telegram_config['chat_id'])
         
-        logging.info(f"Configuration:")
-        logging.info(f"  - Telegram: {'✅' if self.telegram_config['enabled'] else '❌'}")
+        # Par site: ETag, Last-Modified, hash du contenu et dernier résultat du détecteur
+        self.http_cache = {}
+        # URL surveillées par plusieurs sites: récupérées et analysées une fois via le cache partagé
+        self.shared_urls = self.registry.shared_urls()
+        self.fetch_cache = FetchCache()
+        # Enregistrement des pages récupérées (ARCHIVE_DIR), pour les rejouer dans les détecteurs
+        self.archive = PageArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='check')
+        
+        logging.info("Configuration:")
+        logging.info("  - Telegram: %s (%d abonné(s))", '✅' if self.telegram_config['enabled'] else '❌',
+                     len(self.subscriptions))
+        logging.info("  - Sites: %d (%d URL partagée(s))", len(self.registry), len(self.shared_urls))
+        logging.info("  - Workers: %d (délai par site: %ss)", MAX_WORKERS, TARGET_DEADLINE)
+        logging.info("  - Archive des pages: %s", ARCHIVE_DIR or '❌')
+        logging.info("  - Délai maximum d'un cycle: %.0fs", cycle_deadline)
     
     def load_state(self):
         """Charge l'état précédent"""
-        if self.state_file.exists():
-            try:
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
-                    self.boudchart_status = data.get('boudchart_status')
-                    self.stade_toulousain_found = data.get('stade_toulousain_found', False)
-                    logging.info(f"État chargé: Boudchart={self.boudchart_status}, Stade={self.stade_toulousain_found}")
-            except Exception as e:
-                logging.error(f"Erreur chargement état: {e}")
+        try:
+            if self.store.is_empty() and self.state_file.exists():
+                self.import_state_file()
+            for target_id, state in self.store.load().items():
+                if target_id in self.states:
+                    self.states[target_id] = state
+            logging.info("État chargé: %s", self.states)
+        except Exception as e:
+            logging.error("Erreur chargement état: %s", e)
+    
+    def import_state_file(self):
+        """Reprend l'ancien monitoring_state.json dans la base (une seule fois)"""
+        with open(self.state_file, 'r') as f:
+            data = json.load(f)
+        saved = data.get('targets')
+        if saved is None:
+            # Ancien format à deux sites
+            saved = {
+                'boudchart': {'state': data.get('boudchart_status')},
+                'stade_toulousain': {'state': data.get('stade_toulousain_found', False)},
+            }
+        for target_id, entry in saved.items():
+            self.store.record(target_id, None, entry.get('state'))
+        logging.info("État importé depuis %s", self.state_file)
     
     def save_state(self):
-        """Sauvegarde l'état"""
+        """Point de contrôle périodique (les changements d'état sont écrits dès qu'ils arrivent)"""
+        now = time.monotonic()
+        if now - self.last_checkpoint < STATE_CHECKPOINT_INTERVAL:
+            return
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump({
-                    'boudchart_status': self.boudchart_status,
-                    'stade_toulousain_found': self.stade_toulousain_found,
-                    'last_check': datetime.now().isoformat()
-                }, f, indent=2)
+            self.store.checkpoint(self.last_check or datetime.now().isoformat())
+            self.last_checkpoint = now
         except Exception as e:
-            logging.error(f"Erreur sauvegarde: {e}")
+            logging.error("Erreur sauvegarde: %s", e)
     
-    def fetch_page(self, url, site_name=""):
-        """Récupère une page"""
+    def publish_snapshot(self):
+        """Publie une nouvelle photo de l'état (remplacement de la référence, jamais de modification)"""
+        previous = self.snapshot
+        version = previous.version + 1 if previous else 1
+        snapshot = StatusSnapshot.build(version, self.registry, self.states, self.last_check)
+        self.snapshot = snapshot
+        # Écriture disque seulement si un statut a changé (ou pour rafraîchir les autres processus)
+        changed = previous is None or previous.targets != snapshot.targets
+        if not changed and not (SNAPSHOT_READERS and time.monotonic() - self.snapshot_saved_at >= SNAPSHOT_REFRESH):
+            return
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            }
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            logging.info(f"[{site_name}] Page récupérée: {len(response.text)} caractères")
-            return response.text
+            snapshot.save()
+            self.snapshot_saved_at = time.monotonic()
         except Exception as e:
-            logging.error(f"[{site_name}] Erreur récupération: {e}")
-            return None
+            logging.error("Erreur écriture de la photo d'état: %s", e)
     
-    def check_boudchart(self, html_content):
-        """Vérifie Boudchart - VERSION CORRIGÉE (Parsing Texte)"""
+    def refresh_leases(self):
+        """Mode réparti: renouvelle les baux, adopte les sites gagnés et recharge l'état des autres"""
+        now = time.monotonic()
+        self.next_lease_refresh = now + LEASE_RENEW
+        previous = set(self.scheduler.active)
         try:
-            # 1. On utilise BeautifulSoup pour nettoyer le HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 2. On extrait uniquement le texte visible, séparé par des espaces
-            # Cela transforme "<div>Casablanca</div><div>...</div><button>SOON</button>"
-            # en "Casablanca ... SOON"
-            text_clean = soup.get_text(separator=' ').upper()
-            
-            # 3. On nettoie les espaces multiples pour avoir une chaine propre
-            text_clean = " ".join(text_clean.split())
-            
-            # Trouver "CASABLANCA"
-            casa_pos = text_clean.find('CASABLANCA')
-            
-            if casa_pos == -1:
-                logging.warning("[Boudchart] 'Casablanca' non trouvé dans le texte visible!")
-                return None
-            
-            # 4. On extrait une fenêtre de texte après Casablanca
-            # Comme on a retiré le HTML, 100 caractères suffisent largement
-            text_after = text_clean[casa_pos:casa_pos+100]
-            
-            # Log pour debug
-            logging.info(f"[Boudchart] Texte visible après 'CASABLANCA': {text_after}...")
-            
-            # Liste des autres villes pour éviter les faux positifs
-            other_cities = ['PARIS', 'BORDEAUX', 'TOULOUSE', 'MARSEILLE', 'BRUSSELS', 
-                          'MADRID', 'OTTAWA', 'MONTREAL', 'TORONTO', 'GENEVA', 
-                          'TANGIER', 'DÜSSELDORF', 'LILLE', 'LYON']
-            
-            # Fonction utilitaire pour vérifier si le statut appartient bien à Casablanca
-            def is_valid_match(keyword, text_segment):
-                if keyword not in text_segment:
-                    return False
-                keyword_pos = text_segment.find(keyword)
-                before_keyword = text_segment[:keyword_pos]
-                # Si une autre ville apparait entre Casablanca et le mot clé, ce n'est pas le bon concert
-                if any(city in before_keyword for city in other_cities):
-                    return False
-                return True
-
-            # Vérifications des statuts
-            if is_valid_match('TICKETS', text_after):
-                logging.info("[Boudchart] ✅ Statut détecté: TICKETS")
-                return 'TICKETS'
+            owned = self.leases.refresh([target.id for target in self.registry])
+            self.lease_renewed_at = now
+        except Exception as e:
+            logging.error("Erreur renouvellement des baux: %s", e)
+            if now - self.lease_renewed_at < LEASE_TTL:
+                return
+            # Baux expirés: d'autres workers ont pu reprendre nos sites
+            owned = set()
+        
+        # État des sites surveillés ailleurs (et de ceux qu'on reprend): celui enregistré en base
+        try:
+            stored = self.store.load()
+            for target_id in self.states:
+                if target_id not in previous and target_id in stored:
+                    self.states[target_id] = stored[target_id]
+        except Exception as e:
+            logging.error("Erreur chargement état: %s", e)
+        
+        gained = self.scheduler.assign(owned)
+        lost = previous - owned
+        if gained or lost:
+            logging.info("🔀 Worker %s: %d site(s) (+%s / -%s)", self.leases.owner, len(owned),
+                         ', '.join(sorted(gained)) or '∅', ', '.join(sorted(lost)) or '∅')
+        metrics.LEASES_OWNED.set(len(owned))
+        self.watch_freshness()
+    
+    def watch_freshness(self):
+        """Sites dont ce processus doit réussir les vérifications (santé: degraded/stale sinon)"""
+        self.heartbeat.watch({target.id: target.interval for target in self.registry
+                              if target.id in self.scheduler.active})
+    
+    def abandon(self):
+        """Monitoring bloqué remplacé par le chien de garde: s'il se réveille, il s'arrête sans rien
+        appliquer ni notifier; les vérifications en attente sont annulées"""
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def close(self, timeout=10):
+        """Arrêt propre: laisse partir les alertes en file et libère les baux"""
+        self.notifier.flush(timeout=timeout)
+        if self.leases:
+            self.leases.release_all()
+    
+    def conditional_headers(self, cache):
+        """En-têtes If-None-Match/If-Modified-Since (User-Agent/Accept sont portés par la session)"""
+        headers = {}
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+        return headers
+    
+    def fetch_page(self, url, site_name="", cache_key=None, archive=True, backend=HTML_BACKEND, label=None):
+        """Récupère une page (requête conditionnelle), UNCHANGED si rien n'a changé.
+        Le mode de récupération fixe la requête et le décodage (texte HTML, objets JSON).
+        Les octets reçus sont comptés pour label (par défaut cache_key) dans le budget de bande passante"""
+        label = label or cache_key or site_name
+        started = time.perf_counter()
+        try:
+            cache = self.http_cache.setdefault(cache_key or url, {})
+            headers = dict(backend.headers, **self.conditional_headers(cache))
+            with http_client.request(backend.method, url, headers=headers, stream=True,
+                                     **backend.request_kwargs()) as response:
+                try:
+                    if response.status_code == 304:
+                        logging.info("[%s] Page inchangée (304 Not Modified)", site_name)
+                        return UNCHANGED
+                    response.raise_for_status()
+                    # Lecture par morceaux: taille maximum vérifiée au fil de l'eau, empreinte sans copie
+                    hasher = hashlib.sha256()
+                    chunks = []
+                    for chunk in http_client.iter_body(response, backend.max_bytes, STREAM_CHUNK_SIZE):
+                        hasher.update(chunk)
+                        chunks.append(chunk)
+                finally:
+                    # Octets comptés même si le téléchargement est interrompu (réponse trop grande)
+                    self.record_response(label, response, time.perf_counter() - started)
             
-            if is_valid_match('SOON', text_after):
-                logging.info("[Boudchart] ✅ Statut détecté: SOON")
-                return 'SOON'
-                
-            if is_valid_match('SOLD OUT', text_after) or is_valid_match('SOLD-OUT', text_after) or is_valid_match('COMPLET', text_after):
-                logging.info("[Boudchart] ✅ Statut détecté: SOLD_OUT")
-                return 'SOLD_OUT'
+            size = sum(map(len, chunks))
+            metrics.FETCH_DECODED_BYTES.inc(size, target=label)
+            cache['etag'] = response.headers.get('ETag')
+            cache['last_modified'] = response.headers.get('Last-Modified')
+            if archive and self.archive is not None:
+                self.archive_page(label, url, HTML_BACKEND.decode(chunks, response.encoding))
+            digest = hasher.hexdigest()
+            if digest == cache.get('hash'):
+                logging.info("[%s] Contenu identique (%d octets)", site_name, size)
+                return UNCHANGED
+            cache['hash'] = digest
             
-            logging.warning("[Boudchart] ⚠️ Aucun statut connu trouvé juste après Casablanca")
+            logging.debug("[%s] Page récupérée: %d octets", site_name, size)
+            # Décodage seulement quand le contenu a changé
+            return backend.decode(chunks, response.encoding)
+        except Exception as e:
+            metrics.FETCH_ERRORS.inc(target=label)
+            logging.error("[%s] Erreur récupération: %s", site_name, e)
             return None
+    
+    def fetch_stream(self, url, site_name, detector, cache_key=None, backend=HTML_BACKEND):
+        """Récupère une page en streaming en la passant au détecteur morceau par morceau.
+        Le téléchargement s'arrête dès que le détecteur a tranché.
+        Renvoie le détecteur terminé, UNCHANGED (304) ou None en cas d'erreur."""
+        label = cache_key or site_name
+        started = time.perf_counter()
+        detect_time = 0.0
+        try:
+            cache = self.http_cache.setdefault(cache_key or url, {})
+            headers = dict(backend.headers, **self.conditional_headers(cache))
+            with http_client.request(backend.method, url, headers=headers, stream=True,
+                                     **backend.request_kwargs()) as response:
+                try:
+                    if response.status_code == 304:
+                        logging.info("[%s] Page inchangée (304 Not Modified)", site_name)
+                        return UNCHANGED
+                    response.raise_for_status()
+                    
+                    # Même encodage par défaut que response.text pour les pages sans charset
+                    try:
+                        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+                    except LookupError:
+                        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                    received = 0
+                    # Archive: la page entière est lue (pas d'arrêt anticipé) pour pouvoir la rejouer
+                    chunks = [] if self.archive else None
+                    for raw_chunk in http_client.iter_body(response, backend.max_bytes, STREAM_CHUNK_SIZE):
+                        received += len(raw_chunk)
+                        chunk = decoder.decode(raw_chunk)
+                        if chunks is not None:
+                            chunks.append(chunk)
+                            if detector.done:
+                                continue
+                        detect_started = time.perf_counter()
+                        done = detector.feed(chunk)
+                        detect_time += time.perf_counter() - detect_started
+                        if done and chunks is None:
+                            logging.debug("[%s] Verdict après %d octets, téléchargement interrompu", site_name, received)
+                            break
+                    else:
+                        tail = decoder.decode(b'', final=True)
+                        if tail and not detector.done:
+                            detector.feed(tail)
+                        logging.debug("[%s] Page lue en streaming: %d octets", site_name, received)
+                        if chunks is not None:
+                            chunks.append(tail)
+                            self.archive_page(label, url, ''.join(chunks))
+                    metrics.FETCH_DECODED_BYTES.inc(received, target=label)
+                finally:
+                    # Temps réseau seul: on retire le temps passé dans le détecteur
+                    self.record_response(label, response, time.perf_counter() - started - detect_time)
             
+            detect_started = time.perf_counter()
+            detector.finish()
+            self.record_detect(label, detect_time + time.perf_counter() - detect_started)
+            # Validateurs gardés seulement une fois le verdict rendu: après un téléchargement interrompu,
+            # un 304 ferait réutiliser le résultat de la version précédente de la page
+            cache['etag'] = response.headers.get('ETag')
+            cache['last_modified'] = response.headers.get('Last-Modified')
+            return detector
         except Exception as e:
-            logging.error(f"[Boudchart] ❌ Erreur: {e}")
-            import traceback
-            logging.error(traceback.format_exc())
+            metrics.FETCH_ERRORS.inc(target=label)
+            logging.error("[%s] Erreur récupération: %s", site_name, e)
             return None
     
-    def check_stade_toulousain(self, html_content):
-        """Vérifie Stade Toulousain"""
+    def record_detect(self, label, seconds):
+        """Temps d'analyse d'une page (métrique par site, cumul de la phase parse du cycle)"""
+        metrics.DETECT_SECONDS.observe(seconds, target=label)
+        self.heartbeat.add('parse', seconds)
+    
+    def archive_page(self, target_id, url, text):
+        """Enregistre la page dans l'archive (si activée), sans jamais faire échouer la vérification"""
+        if self.archive is None:
+            return
         try:
-            text_upper = html_content.upper()
-            
-            if 'PETIT COP STADE TOULOUSAIN' in text_upper:
-                logging.info("[Stade Toulousain] ✅✅✅ 'PETIT COP STADE TOULOUSAIN' TROUVÉ!")
-                return True
-            
-            logging.info("[Stade Toulousain] ❌ 'PETIT COP STADE TOULOUSAIN' non trouvé")
-            return False
-            
+            self.archive.record(target_id, url, text)
         except Exception as e:
-            logging.error(f"[Stade Toulousain] ❌ Erreur: {e}")
-            return False
+            logging.error("[%s] Erreur archive: %s", target_id, e)
     
-    def send_telegram_notification(self, event_type, details=None):
-        """Envoie notification Telegram"""
-        
-        if event_type == "boudchart":
-            message = f"""🎭 <b>ALERTE BOUDCHART</b> 🎭
-
-Le statut du spectacle de <b>Casablanca</b> a changé !
-<b>Nouveau statut:</b> {details.get('status')}
-
-🔗 <a href='{BOUDCHART_URL}'>Vérifier le site</a>
-
----
-{datetime.now().strftime('%d/%m/%Y à %H:%M:%S')}"""
-        
-        elif event_type == "stade_toulousain":
-            message = f"""🏉 <b>ALERTE STADE TOULOUSAIN</b> 🏉
-
-<b>"PETIT COP STADE TOULOUSAIN"</b> est maintenant disponible !
-
-Match: <b>Stade Toulousain vs Montpellier</b>
-
-🔗 <a href='{STADE_TOULOUSAIN_URL}'>Réserver maintenant</a>
-
----
-{datetime.now().strftime('%d/%m/%Y à %H:%M:%S')}"""
+    def record_response(self, label, response, seconds):
+        """Métriques d'une réponse HTTP: durée, code, octets reçus (compressés, tels que transférés),
+        imputés au budget de bande passante du site"""
+        metrics.FETCH_SECONDS.observe(seconds, target=label)
+        metrics.HTTP_RESPONSES.inc(target=label, code=response.status_code)
+        received = http_client.wire_bytes(response)
+        if received is not None:
+            metrics.FETCH_BYTES.inc(received, target=label)
+            self.bandwidth.record(label, received)
+    
+    def check_boudchart(self, html_content):
+        """Vérifie Boudchart (détecteur du site 'boudchart')"""
+        target = self.registry.get('boudchart')
+        detector = target.detector if target else TourStatusDetector('Boudchart')
+        result = detector.check(html_content)
+        if isinstance(detector, TourTableDetector) and detector.cities:
+            # Tableau complet: statut de la ville principale, comme le détecteur tour_status
+            return detector.city_status(result, detector.cities[0]) if result else None
+        return result
+    
+    def check_stade_toulousain(self, html_content):
+        """Vérifie Stade Toulousain (détecteur du site 'stade_toulousain')"""
+        target = self.registry.get('stade_toulousain')
+        detector = target.detector if target else PhraseDetector('Stade Toulousain', 'PETIT COP STADE TOULOUSAIN')
+        return detector.check(html_content)
+    
+    def send_telegram_notification(self, target, state, detected_at=None):
+        """Prépare la notification et la dépose dans la file d'envoi Telegram"""
+        detected_at = detected_at or time.time()
+        status, _ = target.detector.display(state)
+        message = target.render(status, datetime.fromtimestamp(detected_at).strftime('%d/%m/%Y à %H:%M:%S'))
         
-        logging.info(f"NOTIFICATION: {event_type}")
+        logging.info("NOTIFICATION: %s", target.id)
         print("\n" + "="*60)
         print(message)
         print("="*60 + "\n")
         
-        # Telegram
+        # Telegram: un seul message construit, distribué à chaque abonné concerné
         if self.telegram_config['enabled']:
-            try:
-                url = f"https://api.telegram.org/bot{self.telegram_config['bot_token']}/sendMessage"
-                
-                response = requests.post(url, json={
-                    "chat_id": self.telegram_config['chat_id'],
-                    "text": message,
-                    "parse_mode": "HTML"
-                }, timeout=10)
-                
-                response.raise_for_status()
-                logging.info("✅ Telegram envoyé!")
-            except Exception as e:
-                logging.error(f"❌ Erreur Telegram: {e}")
+            recipients = self.subscriptions.matching(target.id, target.detector.statuses(state))
+            for subscription in recipients:
+                self.notifier.submit(target.id, message, detected_at, chat_id=subscription.chat_id,
+                                     bot_token=subscription.bot_token)
+            metrics.NOTIFY_RECIPIENTS.inc(len(recipients), target=target.id)
+            logging.debug("[%s] Alerte distribuée à %d abonné(s)", target.name, len(recipients))
     
-    def check_all(self):
-        """Vérifie tous les sites"""
-        logging.info("="*60)
-        logging.info("🔍 VÉRIFICATION EN COURS...")
-        logging.info("="*60)
+    def fetch_and_check(self, target):
+        """Récupère la page d'un site et applique son détecteur (exécuté dans le pool)"""
+        with log_target(target.id):
+            if target.fetch_key in self.shared_urls:
+                return self.fetch_shared(target)
+            stream = target.detector.stream() if target.backend.streams else None
+            if stream is not None:
+                # Détection pendant le téléchargement, arrêt dès que le verdict est certain
+                fetched = self.fetch_stream(target.url, target.name, stream, cache_key=target.id,
+                                            backend=target.backend)
+            else:
+                fetched = self.fetch_page(target.url, target.name, cache_key=target.id, backend=target.backend)
+            if fetched is None:
+                return False, None, None
+            
+            cache = self.http_cache[target.id]
+            if fetched is UNCHANGED:
+                if 'result' not in cache:
+                    return False, None, None
+                # Page identique: on réutilise le dernier résultat sans relancer le détecteur
+                return True, cache['result'], time.time()
+            
+            if stream is not None:
+                cache['result'] = fetched.result
+            else:
+                started = time.perf_counter()
+                cache['result'] = target.detector.check(fetched)
+                self.record_detect(target.id, time.perf_counter() - started)
+            return True, cache['result'], time.time()
+    
+    def fetch_shared(self, target):
+        """Site dont l'URL est surveillée par d'autres: une récupération (page entière) par URL
+        et une analyse par configuration de détecteur, partagées via le cache"""
+        url, key = target.url, target.fetch_key
+        # Page réutilisable si elle a moins de la moitié de l'intervalle du site
+        max_age = self.scheduler.polling_interval(target, self.states[target.id]) / 2
+        def fetch():
+            return self.fetch_page(url, target.name, cache_key=key, archive=False,
+                                   backend=target.backend, label=target.id)
         
-        # 1. Boudchart
-        logging.info("\n[1/2] Vérification Boudchart...")
-        boudchart_html = self.fetch_page(BOUDCHART_URL, "Boudchart")
+        def version():
+            return self.http_cache[key].get('hash')
         
-        if boudchart_html:
-            new_status = self.check_boudchart(boudchart_html)
-            
-            if new_status:
-                if self.boudchart_status != new_status:
-                    logging.info(f"[Boudchart] 🔔 Changement: {self.boudchart_status} → {new_status}")
-                    
-                    if new_status == 'TICKETS':
-                        self.send_telegram_notification("boudchart", {"status": new_status})
-                    
-                    self.boudchart_status = new_status
-                else:
-                    logging.info(f"[Boudchart] ✓ Pas de changement: {new_status}")
+        entry = self.fetch_cache.get(key, fetch, max_age=max_age, version=version)
         
-        # 2. Stade Toulousain
-        logging.info("\n[2/2] Vérification Stade Toulousain...")
-        stade_html = self.fetch_page(STADE_TOULOUSAIN_URL, "Stade Toulousain")
+        # Requête conditionnelle et empreinte sont communes à l'URL: un site vérifié moins souvent
+        # que les autres (ou nouveau) reçoit UNCHANGED pour une version qu'il n'a jamais analysée.
+        # Chaque site garde la version de son résultat; sinon la page entière est redemandée
+        cache = self.http_cache.setdefault(target.id, {})
+        if entry.page is UNCHANGED:
+            if 'result' in cache and cache.get('version') == entry.version:
+                return True, cache['result'], time.time()
+            logging.debug("[%s] Version %s jamais analysée: page complète redemandée", target.name, entry.version)
+            self.http_cache[key].clear()
+            entry = self.fetch_cache.get(key, fetch, max_age=0, version=version)
+        if entry.page is None or entry.page is UNCHANGED:
+            return False, None, None
         
-        if stade_html:
-            found = self.check_stade_toulousain(stade_html)
-            
-            if found and not self.stade_toulousain_found:
-                logging.info("[Stade Toulousain] 🔔 NOUVEAU: PETIT COP trouvé!")
-                self.send_telegram_notification("stade_toulousain")
-                self.stade_toulousain_found = True
-            elif found:
-                logging.info("[Stade Toulousain] ✓ Déjà trouvé")
-            else:
-                logging.info("[Stade Toulousain] ✓ Toujours absent")
+        if isinstance(entry.page, str):
+            self.archive_page(target.id, url, entry.page)
         
-        # Sauvegarder
-        self.save_state()
+        def check(page):
+            started = time.perf_counter()
+            result = target.detector.check(page)
+            self.record_detect(target.id, time.perf_counter() - started)
+            return result
         
-        logging.info("="*60)
-        logging.info(f"💤 Prochaine vérification dans {CHECK_INTERVAL} secondes")
-        logging.info("="*60 + "\n")
+        cache['result'] = entry.result(target.detector_key, check)
+        cache['version'] = entry.version
+        return True, cache['result'], time.time()
+    
+    def apply_result(self, target, result, detected_at=None):
+        """Applique le résultat d'un site à l'état et notifie si besoin"""
+        old_state = self.states[target.id]
+        new_state, notify = target.detector.apply(old_state, result)
+        if new_state != old_state:
+            try:
+                applied = self.store.record(target.id, old_state, new_state, detected_at,
+                                            compare=self.leases is not None)
+            except Exception as e:
+                logging.error("Erreur sauvegarde: %s", e)
+                applied = True
+            if not applied:
+                # Changement déjà enregistré (et alerte déjà partie) depuis un autre worker
+                logging.info("[%s] Changement déjà appliqué par un autre worker, alerte ignorée", target.name)
+                self.states[target.id] = self.store.load().get(target.id, old_state)
+                return
+            label, css_class = target.detector.display(new_state)
+            self.events.publish('change', {
+                'target': target.id,
+                'old_state': old_state,
+                'state': new_state,
+                'label': label,
+                'css_class': css_class,
+                'at': detected_at or time.time(),
+            })
+        if notify:
+            self.send_telegram_notification(target, new_state, detected_at)
+        self.states[target.id] = new_state
+    
+    def check_all(self, targets=None):
+        """Vérifie en parallèle les sites donnés (par défaut tous) et les replanifie"""
+        # 1. Lancer toutes les récupérations + détections en même temps
+        start = time.monotonic()
+        # Ordre fixe du registre, quel que soit l'ordre de sortie du tas des échéances
+        targets = list(self.registry) if targets is None else self.registry.ordered(targets)
+        self.heartbeat.cycle_started(self.scheduler.lag)
+        logging.debug("🔍 VÉRIFICATION EN COURS... (%d site(s))", len(targets))
+        futures = [(target, self.executor.submit(self.fetch_and_check, target)) for target in targets]
+        
+        # 2. Appliquer les résultats dans l'ordre fixe des sites, chacun avec son propre délai
+        total = len(futures)
+        for i, (target, future) in enumerate(futures, 1):
+            name = target.name
+            logging.debug("[%d/%d] Vérification %s...", i, total, name)
+            remaining = start + target.deadline - time.monotonic()
+            with log_target(target.id):
+                fetched = False
+                try:
+                    with self.heartbeat.measure('fetch'):
+                        fetched, result, detected_at = future.result(timeout=max(0, remaining))
+                    if self.stop_event.is_set():
+                        # Monitoring abandonné pendant l'attente: un autre a pris le relais
+                        return
+                    if fetched:
+                        with self.heartbeat.measure('notify'):
+                            self.apply_result(target, result, detected_at)
+                except FuturesTimeout:
+                    if not future.cancel():
+                        # Déjà en cours: le worker reste occupé tant que la vérification n'a pas fini
+                        self.stuck.add(future)
+                    metrics.DEADLINE_EXCEEDED.inc(target=target.id)
+                    logging.error("[%s] ⏱️ Délai dépassé (%ss), résultat ignoré", name, target.deadline)
+                except Exception as e:
+                    logging.error("[%s] ❌ Erreur: %s", name, e)
+                finally:
+                    delay = self.scheduler.complete(target, fetched, self.states[target.id], started=start)
+                    logging.debug("[%s] Prochaine vérification dans %.0fs", name, delay)
+                    metrics.TARGET_INTERVAL.set(delay, target=target.id)
+                    metrics.CONSECUTIVE_FAILURES.set(self.scheduler.failures[target.id], target=target.id)
+                    self.heartbeat.checked(target.id, fetched)
+                    if fetched:
+                        metrics.LAST_SUCCESS.set(time.time(), target=target.id)
+        
+        self.stuck = {future for future in self.stuck if not future.done()}
+        self.heartbeat.stuck_workers = len(self.stuck)
+        metrics.STUCK_WORKERS.set(len(self.stuck))
+        if self.stuck:
+            logging.warning("🧟 %d worker(s) encore bloqué(s) sur une vérification hors délai", len(self.stuck))
+        
+        # Sauvegarder et publier le nouvel état
+        with self.heartbeat.measure('save'):
+            self.last_check = datetime.now().isoformat()
+            self.save_state()
+            self.publish_snapshot()
+        
+        phases = self.heartbeat.cycle_finished(total)
+        cycle_seconds = time.monotonic() - start
+        metrics.CYCLE_SECONDS.observe(cycle_seconds)
+        metrics.LAST_CYCLE_SECONDS.set(cycle_seconds)
+        logging.info("⏱️  Cycle terminé en %.2fs (%d site(s)), prochaine vérification dans %.0fs",
+                     cycle_seconds, total, self.scheduler.next_delay(),
+                     extra={'cycle_seconds': cycle_seconds, 'phases': phases, 'lag': self.scheduler.lag})
     
     def run(self):
-        """Lance le monitoring"""
+        """Lance le monitoring (jusqu'à abandon par le chien de garde)"""
         logging.info("="*60)
         logging.info("🚀 DUAL MONITORING - VERSION DEBUG")
         logging.info("="*60)
-        logging.info(f"📍 Site 1: Boudchart Casablanca")
-        logging.info(f"📍 Site 2: Stade Toulousain Petit Cop")
-        logging.info(f"⏱️  Intervalle: {CHECK_INTERVAL}s")
+        for i, target in enumerate(self.registry, 1):
+            logging.info("📍 Site %d: %s - %s (toutes les %ss)", i, target.name, target.detector.describe(), target.interval)
         logging.info("="*60 + "\n")
         
-        while True:
+        while not self.stop_event.is_set():
             try:
-                self.check_all()
+                if self.leases and time.monotonic() >= self.next_lease_refresh:
+                    self.refresh_leases()
+                due = self.scheduler.pop_due()
+                if due:
+                    self.check_all(due)
             except Exception as e:
-                logging.error(f"❌ Erreur: {e}")
+                logging.error("❌ Erreur: %s", e)
             
-            time.sleep(CHECK_INTERVAL)
+            delay = self.scheduler.next_delay()
+            if self.leases:
+                delay = min(delay, max(0, self.next_lease_refresh - time.monotonic()))
+            self.heartbeat.sleeping(delay)
+            self.stop_event.wait(delay)
+        logging.info("🛑 Monitoring arrêté")
 
 if __name__ == "__main__":
     monitor = DualMonitor()
     try:
         monitor.run()
     except KeyboardInterrupt:
-        logging.info("\n👋 Arrêt")
+        logging.info("👋 Arrêt")
+        # Laisser partir les alertes encore en file, rendre les baux
+        monitor.close(timeout=10)
     except Exception as e:
-        logging.error(f"💥 Erreur fatale: {e}")
+        logging.error("💥 Erreur fatale: %s", e)
@@ -0,0 +1,886 @@
+#!/usr/bin/env python3
+"""
+Détecteurs de pages: chaque type analyse une page (complète ou en streaming),
+et décide quand un changement d'état mérite une notification
+"""
+
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import deque
+
+from json_path import JsonPath
+from matcher import KeywordMatcher, VisibleTextParser
+
+# Extraction des dates de tournée: 'fast' (lxml + sélecteur ciblé, défaut: ~12× plus rapide que 'stream'
+# sur une page complète, et page identique reconnue à son empreinte sans analyse),
+# 'stream' (texte visible analysé pendant le téléchargement, utile si la ville est en haut d'une
+# page très lourde: arrêt anticipé) ou 'soup' (texte complet via BeautifulSoup)
+BOUDCHART_PARSER = os.getenv('BOUDCHART_PARSER', 'fast')
+# Bloc de la date: XPath (commence par '/', '(' ou '.') ou CSS (nécessite cssselect).
+# Vide = sélecteur par défaut construit pour la ville surveillée
+BOUDCHART_SELECTOR = os.getenv('BOUDCHART_SELECTOR', '')
+# Texte visible d'un élément (hors <script>/<style>).
+# lxml et BeautifulSoup ne sont importés que par les modes 'fast' et 'soup' (démarrage rapide)
+VISIBLE_TEXT_XPATH = './/text()[not(ancestor::script or ancestor::style)]'
+
+# Longueur par défaut (caractères de texte visible) d'une région surveillée par empreinte
+REGION_LENGTH = int(os.getenv('REGION_LENGTH', '300'))
+# Longueur maximum du résumé des différences dans une notification
+REGION_DIFF_MAX = 300
+
+# Mots-clés de statut (par priorité) et villes connues pour éviter les faux positifs (tour_status)
+TOUR_STATUSES = {'TICKETS': 'TICKETS', 'SOON': 'SOON',
+                 'SOLD OUT': 'SOLD_OUT', 'SOLD-OUT': 'SOLD_OUT', 'COMPLET': 'SOLD_OUT'}
+STATUS_PRIORITY = ('TICKETS', 'SOON', 'SOLD_OUT')
+KNOWN_CITIES = ['CASABLANCA', 'PARIS', 'BORDEAUX', 'TOULOUSE', 'MARSEILLE', 'BRUSSELS',
+                'MADRID', 'OTTAWA', 'MONTREAL', 'TORONTO', 'GENEVA',
+                'TANGIER', 'DÜSSELDORF', 'LILLE', 'LYON']
+
+# Dates de la tournée: 14/03, 14.03.2025, 14 MAR, 1ER MARS 2025, MAR 14...
+MONTHS = r'(?:JAN|F[EÉ]V|FEB|MAR|AVR|APR|MAI|MAY|JUI|JUN|JUL|AO[UÛ]|AUG|SEP|OCT|NOV|D[EÉ]C)[A-ZÉÛ]*\.?'
+DATE_PATTERN = re.compile(rf'\b(?:\d{{1,2}}[/.-]\d{{1,2}}(?:[/.-]\d{{2,4}})?|\d{{1,2}}(?:ER)?\s+{MONTHS}(?:\s+\d{{4}})?'
+                          rf'|{MONTHS}\s+\d{{1,2}}(?:,?\s+\d{{4}})?)(?!\w)')
+# Cellules conservées avant un statut pour reconstituer une ligne du tableau
+TOUR_ROW_CELLS = 8
+# Cellules consécutives assemblées pour reconnaître une date découpée (<span>14</span><span>MAR</span>)
+DATE_MAX_CELLS = 3
+# Date d'une ligne sans date reconnue (ville connue suivie d'un statut)
+UNKNOWN_DATE = '?'
+# Longueur maximum d'une cellule de statut (un bouton, pas un paragraphe)
+STATUS_CELL_MAX = 30
+
+
+def fingerprint(text):
+    """Empreinte compacte (16 caractères hexadécimaux) d'un texte normalisé"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def text_diff(old, new, limit=REGION_DIFF_MAX):
+    """Différences mot à mot entre deux textes: '- mots retirés + mots ajoutés'"""
+    a, b = old.split(), new.split()
+    parts = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag in ('replace', 'delete'):
+            parts.append('- ' + ' '.join(a[i1:i2]))
+        if tag in ('replace', 'insert'):
+            parts.append('+ ' + ' '.join(b[j1:j2]))
+    diff = ' '.join(parts)
+    return diff if len(diff) <= limit else diff[:limit - 1] + '…'
+
+
+def compile_selector(selector):
+    """Compile un sélecteur XPath ou CSS en fonction appelable sur un arbre lxml"""
+    from lxml import etree
+    if selector.startswith(('/', '(', '.')):
+        return etree.XPath(selector)
+    # Dépendance optionnelle, seulement pour les sélecteurs CSS
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(selector)
+
+
+def default_selector(city):
+    """Sélecteur XPath du bloc qui contient la ville (grand-parent du texte de la ville)"""
+    letters = ''.join(sorted(set(city)))
+    return (f"//text()[contains(translate(., '{letters.lower()}', '{letters}'), '{city}')]"
+            "[not(ancestor::script or ancestor::style)]/ancestor::*[2]")
+
+
+class TourStatusStream:
+    """Détection en streaming: suit le texte visible pendant le téléchargement
+    et tranche dès que la fenêtre de 100 caractères après la ville est complète"""
+
+    WINDOW = 100
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.city = KeywordMatcher([detector.city])
+        self.parser = VisibleTextParser(self.on_text)
+        # Texte récent conservé tant que la ville n'est pas trouvée (position absolue de début)
+        self.recent = ''
+        self.recent_offset = 0
+        self.window = None
+        self.done = False
+        self.result = None
+
+    def on_text(self, text):
+        if self.window is not None:
+            self.window += text
+        else:
+            self.recent += text
+            hits = self.city.feed(text)
+            if hits:
+                self.window = self.recent[hits[0][1] - self.recent_offset:]
+            else:
+                keep = self.city.overlap
+                self.recent_offset += max(0, len(self.recent) - keep)
+                self.recent = self.recent[-keep:]
+        if self.window is not None and len(self.window) >= self.WINDOW:
+            self.done = True
+
+    def feed(self, chunk):
+        """Analyse un morceau de HTML, renvoie True quand le statut est certain"""
+        if not self.done:
+            self.parser.feed(chunk)
+        return self.done
+
+    def finish(self):
+        """Termine l'analyse et renvoie le statut détecté (ou None)"""
+        if not self.done:
+            self.parser.close()
+
+        name, city = self.detector.name, self.detector.city
+        if self.window is None:
+            logging.warning("[%s] '%s' non trouvé dans le texte visible!", name, city.title())
+            return None
+
+        text_after = self.window[:self.WINDOW]
+        # Fenêtre identique à la vérification précédente: même statut, sans reclassifier
+        digest = fingerprint(text_after)
+        if digest == self.detector.last_fingerprint:
+            logging.debug("[%s] Fenêtre inchangée (%s)", name, digest)
+            self.result = self.detector.last_result
+            return self.result
+        logging.debug("[%s] Texte visible après '%s': %s...", name, city, text_after)
+
+        self.result = self.detector.classify(text_after)
+        self.detector.last_fingerprint, self.detector.last_result = digest, self.result
+        if self.result:
+            logging.info("[%s] ✅ Statut détecté: %s", name, self.result)
+        else:
+            logging.warning("[%s] ⚠️ Aucun statut connu trouvé juste après %s", name, city.title())
+        return self.result
+
+
+class TourStatusDetector:
+    """Statut d'une ville dans une liste de dates de tournée (TICKETS / SOON / SOLD_OUT)"""
+
+    initial_state = None
+
+    def __init__(self, name, city='CASABLANCA', other_cities=None, notify_on=('TICKETS',),
+                 hot_states=('SOON',), parser=None, selector=None):
+        self.name = name
+        self.city = city.upper()
+        self.params = {'city': city.title(), 'notify_on': list(notify_on)}
+        # États "chauds": la billetterie peut ouvrir d'un instant à l'autre, on vérifie plus souvent
+        self.hot_states = set(hot_states)
+        others = [c.upper() for c in other_cities] if other_cities else [c for c in KNOWN_CITIES if c != self.city]
+        self.window_keywords = KeywordMatcher(list(TOUR_STATUSES) + others)
+        self.notify_on = set(notify_on)
+        # Empreinte de la dernière fenêtre classée et son statut (mode streaming)
+        self.last_fingerprint = None
+        self.last_result = None
+        self.parser = parser or BOUDCHART_PARSER
+        self.selector = None
+        if self.parser == 'fast':
+            try:
+                self.selector = compile_selector(selector or BOUDCHART_SELECTOR or default_selector(self.city))
+                self.visible_text = compile_selector(VISIBLE_TEXT_XPATH)
+            except Exception as e:
+                logging.error("[%s] Sélecteur invalide, mode rapide désactivé: %s", name, e)
+
+    def classify(self, text_after):
+        """Détermine le statut de la ville à partir de la fenêtre de texte qui la suit"""
+        # Une seule passe: seuls les statuts vus avant une autre ville appartiennent à notre ville
+        found = set()
+        for keyword, _ in self.window_keywords.scan(text_after):
+            if keyword not in TOUR_STATUSES:
+                break
+            found.add(TOUR_STATUSES[keyword])
+
+        for status in STATUS_PRIORITY:
+            if status in found:
+                return status
+        return None
+
+    def is_hot(self, state):
+        return state in self.hot_states
+
+    def statuses(self, state):
+        """Statuts atteints dans cet état (filtre des abonnements)"""
+        return {state} if state else set()
+
+    def stream(self):
+        """Détecteur streaming pour fetch_stream, None si le mode n'est pas 'stream'"""
+        return TourStatusStream(self) if self.parser == 'stream' else None
+
+    def extract_block(self, html_content):
+        """Extrait via lxml la fenêtre de texte du bloc de la ville, None si le sélecteur ne trouve rien"""
+        import lxml.html
+        from lxml import etree
+        try:
+            tree = lxml.html.fromstring(html_content)
+            blocks = self.selector(tree)
+        except Exception as e:
+            logging.warning("[%s] Sélecteur inutilisable: %s", self.name, e)
+            return None
+
+        for block in blocks:
+            if not isinstance(block, etree._Element):
+                continue
+            text_block = " ".join(" ".join(self.visible_text(block)).upper().split())
+            city_pos = text_block.find(self.city)
+            if city_pos != -1:
+                return text_block[city_pos:city_pos+100]
+        return None
+
+    def check(self, html_content):
+        """Analyse une page complète - VERSION CORRIGÉE (Parsing Texte)"""
+        name, city = self.name, self.city
+        try:
+            # 0. Mode streaming: même fenêtre de texte visible, sans construire d'arbre
+            if self.parser == 'stream':
+                detector = TourStatusStream(self)
+                detector.feed(html_content)
+                return detector.finish()
+
+            # Mode rapide: lxml + sélecteur ciblé sur le bloc de la date
+            if self.parser == 'fast' and self.selector is not None:
+                text_after = self.extract_block(html_content)
+                status = self.classify(text_after) if text_after else None
+                if status:
+                    logging.debug("[%s] Texte du bloc sélectionné: %s...", name, text_after)
+                    logging.info("[%s] ✅ Statut détecté: %s", name, status)
+                    return status
+                logging.info("[%s] Sélecteur sans statut, repli sur le texte complet", name)
+
+            # 1. On utilise BeautifulSoup pour nettoyer le HTML
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(html_content, 'html.parser')
+
+            # 2. On extrait uniquement le texte visible, séparé par des espaces
+            # Cela transforme "<div>Casablanca</div><div>...</div><button>SOON</button>"
+            # en "Casablanca ... SOON"
+            text_clean = soup.get_text(separator=' ').upper()
+
+            # 3. On nettoie les espaces multiples pour avoir une chaine propre
+            text_clean = " ".join(text_clean.split())
+
+            # Trouver la ville
+            city_pos = text_clean.find(city)
+
+            if city_pos == -1:
+                logging.warning("[%s] '%s' non trouvé dans le texte visible!", name, city.title())
+                return None
+
+            # 4. On extrait une fenêtre de texte après la ville
+            # Comme on a retiré le HTML, 100 caractères suffisent largement
+            text_after = text_clean[city_pos:city_pos+100]
+
+            # Log pour debug
+            logging.debug("[%s] Texte visible après '%s': %s...", name, city, text_after)
+
+            status = self.classify(text_after)
+            if status:
+                logging.info("[%s] ✅ Statut détecté: %s", name, status)
+                return status
+
+            logging.warning("[%s] ⚠️ Aucun statut connu trouvé juste après %s", name, city.title())
+            return None
+
+        except Exception as e:
+            logging.exception("[%s] ❌ Erreur: %s", name, e)
+            return None
+
+    def apply(self, old_state, new_status):
+        """Renvoie (nouvel état, notifier?) à partir du statut détecté"""
+        if not new_status:
+            return old_state, False
+        if old_state != new_status:
+            logging.info("[%s] 🔔 Changement: %s → %s", self.name, old_state, new_status)
+            return new_status, new_status in self.notify_on
+        logging.debug("[%s] ✓ Pas de changement: %s", self.name, new_status)
+        return old_state, False
+
+    def describe(self):
+        """Description courte de la surveillance (tableau de bord)"""
+        return f"Changement de statut de {self.params['city']} (alerte: {', '.join(self.params['notify_on'])})"
+
+    def display(self, state):
+        """(libellé, classe CSS) de l'état pour le tableau de bord"""
+        label = state or "En attente"
+        return label, f"status-{label.lower()}"
+
+
+class PhraseStream:
+    """Détection en streaming: s'arrête dès que la phrase apparaît"""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.matcher = KeywordMatcher([detector.phrase])
+        self.done = False
+        self.result = False
+
+    def feed(self, chunk):
+        """Analyse un morceau de HTML, renvoie True dès que la phrase est trouvée"""
+        if not self.done and self.matcher.feed(chunk):
+            self.done = True
+        return self.done
+
+    def finish(self):
+        """Renvoie True si la phrase a été trouvée"""
+        name, phrase = self.detector.name, self.detector.phrase
+        self.result = self.done
+        if self.result:
+            logging.info("[%s] ✅✅✅ '%s' TROUVÉ!", name, phrase)
+        else:
+            logging.debug("[%s] ❌ '%s' non trouvé", name, phrase)
+        return self.result
+
+
+class PhraseDetector:
+    """Apparition d'une phrase dans le HTML (insensible à la casse)"""
+
+    initial_state = False
+
+    def __init__(self, name, phrase, hot=False):
+        self.name = name
+        self.phrase = phrase.upper()
+        self.params = {'phrase': phrase}
+        # Site "chaud" tant que la phrase n'est pas apparue (vérifié plus souvent)
+        self.hot = hot
+
+    def is_hot(self, state):
+        return self.hot and not state
+
+    def statuses(self, state):
+        """Statuts atteints dans cet état (filtre des abonnements)"""
+        return {'FOUND'} if state else set()
+
+    def stream(self):
+        """Détecteur streaming pour fetch_stream"""
+        return PhraseStream(self)
+
+    def check(self, html_content):
+        """Analyse une page complète"""
+        try:
+            detector = PhraseStream(self)
+            detector.feed(html_content)
+            return detector.finish()
+
+        except Exception as e:
+            logging.error("[%s] ❌ Erreur: %s", self.name, e)
+            return False
+
+    def apply(self, old_state, found):
+        """Renvoie (nouvel état, notifier?): on ne notifie que la première apparition"""
+        if found and not old_state:
+            logging.info("[%s] 🔔 NOUVEAU: '%s' trouvé!", self.name, self.phrase)
+            return True, True
+        elif found:
+            logging.debug("[%s] ✓ Déjà trouvé", self.name)
+        else:
+            logging.debug("[%s] ✓ Toujours absent", self.name)
+        return old_state, False
+
+    def describe(self):
+        """Description courte de la surveillance (tableau de bord)"""
+        return f'Apparition de "{self.params["phrase"]}"'
+
+    def display(self, state):
+        """(libellé, classe CSS) de l'état pour le tableau de bord"""
+        if state:
+            return "Trouvé ✅", "status-found"
+        return "Non trouvé ❌", "status-notfound"
+
+
+class RegionStream:
+    """Empreinte d'une région du texte visible, calculée pendant le téléchargement:
+    à partir du repère de début (ou du début de la page), sur au plus length caractères"""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.start = KeywordMatcher([detector.start]) if detector.start else None
+        self.parser = VisibleTextParser(self.on_text)
+        self.hash = hashlib.blake2b(digest_size=8)
+        # Texte récent conservé tant que le repère n'est pas trouvé (position absolue de début)
+        self.recent = ''
+        self.recent_offset = 0
+        self.region = None if self.start else []
+        self.size = 0
+        self.done = False
+        self.result = None
+
+    def on_text(self, text):
+        if self.region is None:
+            self.recent += text
+            hits = self.start.feed(text)
+            if not hits:
+                keep = self.start.overlap
+                self.recent_offset += max(0, len(self.recent) - keep)
+                self.recent = self.recent[-keep:]
+                return
+            self.region = []
+            text = self.recent[hits[0][1] - self.recent_offset:]
+        if self.detector.length:
+            text = text[:self.detector.length - self.size]
+        if text:
+            self.hash.update(text.encode('utf-8'))
+            self.region.append(text)
+            self.size += len(text)
+        if self.detector.length and self.size >= self.detector.length:
+            self.done = True
+
+    def feed(self, chunk):
+        """Analyse un morceau de HTML, renvoie True quand la région est complète"""
+        if not self.done:
+            self.parser.feed(chunk)
+        return self.done
+
+    def finish(self):
+        """Renvoie {'fingerprint', 'text', 'status'} de la région, None si le repère est absent"""
+        if not self.done:
+            self.parser.close()
+        name = self.detector.name
+        if self.region is None:
+            logging.warning("[%s] Repère '%s' non trouvé dans le texte visible!", name, self.detector.start)
+            return None
+
+        digest = self.hash.hexdigest()
+        text = ''.join(self.region)
+        if self.done and ' ' in text:
+            # Région coupée à length: le dernier mot est peut-être tronqué (résumé des différences plus lisible)
+            text = text.rsplit(' ', 1)[0]
+        detector = self.detector
+        if digest != detector.last_fingerprint:
+            # Classification (mots-clés de statut) seulement quand l'empreinte bouge
+            detector.last_fingerprint = digest
+            detector.last_status = detector.classify(text)
+            logging.debug("[%s] Nouvelle empreinte %s: %s", name, digest, text[:100])
+        self.result = {'fingerprint': digest, 'text': text[:REGION_DIFF_MAX * 4], 'status': detector.last_status}
+        return self.result
+
+
+class RegionDetector:
+    """Changement quelconque d'une région de la page (empreinte du texte visible normalisé).
+    Signale le nouveau contenu avec un résumé des différences, y compris des statuts inconnus
+    ("LAST TICKETS", nouvelle date...)"""
+
+    initial_state = None
+
+    def __init__(self, name, start=None, length=REGION_LENGTH, notify=True):
+        self.name = name
+        self.start = start.upper() if start else None
+        self.length = length
+        self.notify = notify
+        self.params = {'start': start or '', 'length': length}
+        self.status_keywords = KeywordMatcher(list(TOUR_STATUSES))
+        self.last_fingerprint = None
+        self.last_status = None
+
+    def classify(self, text):
+        """Premier statut connu dans la région (indicatif), None sinon"""
+        for keyword, _ in self.status_keywords.scan(text):
+            return TOUR_STATUSES[keyword]
+        return None
+
+    def is_hot(self, state):
+        return False
+
+    def statuses(self, state):
+        """Statuts atteints dans cet état (filtre des abonnements): statut connu de la région, CHANGED"""
+        if not state:
+            return set()
+        return {'CHANGED'} | ({state['status']} if state.get('status') else set())
+
+    def stream(self):
+        """Détecteur streaming pour fetch_stream"""
+        return RegionStream(self)
+
+    def check(self, html_content):
+        """Analyse une page complète"""
+        try:
+            detector = RegionStream(self)
+            detector.feed(html_content)
+            return detector.finish()
+        except Exception as e:
+            logging.error("[%s] ❌ Erreur: %s", self.name, e)
+            return None
+
+    def apply(self, old_state, region):
+        """Renvoie (nouvel état, notifier?): la première empreinte sert de référence"""
+        if not region:
+            return old_state, False
+        if not old_state:
+            logging.info("[%s] Empreinte de référence: %s", self.name, region['fingerprint'])
+            return dict(region, diff=''), False
+        if region['fingerprint'] == old_state['fingerprint']:
+            logging.debug("[%s] ✓ Région inchangée (%s)", self.name, region['fingerprint'])
+            return old_state, False
+        diff = text_diff(old_state['text'], region['text'])
+        logging.info("[%s] 🔔 Région modifiée (%s → %s): %s", self.name,
+                     old_state['fingerprint'], region['fingerprint'], diff)
+        return dict(region, diff=diff), self.notify
+
+    def describe(self):
+        """Description courte de la surveillance (tableau de bord)"""
+        where = f'après "{self.params["start"]}"' if self.start else "du début de la page"
+        size = f"{self.length} caractères" if self.length else "tout le texte"
+        return f"Changement de la région {where} ({size})"
+
+    def display(self, state):
+        """(libellé, classe CSS) de l'état pour le tableau de bord"""
+        if not state:
+            return "En attente", "status-soon"
+        if state.get('diff'):
+            return state['diff'], "status-tickets"
+        return state.get('status') or f"Empreinte {state['fingerprint']}", "status-found"
+
+
+
+def city_key(city):
+    """Clé de ville: majuscules sans accents (MONTRÉAL et Montreal désignent la même ville)"""
+    decomposed = unicodedata.normalize('NFKD', city.upper())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def best_status(dates):
+    """Statut d'une ville, toutes dates confondues (TICKETS l'emporte sur SOON puis SOLD_OUT)"""
+    statuses = set(dates.values())
+    for status in STATUS_PRIORITY:
+        if status in statuses:
+            return status
+    return None
+
+
+class TourTableStream:
+    """Extraction en une passe du tableau de la tournée {ville: {date: statut}}.
+
+    Le texte visible arrive cellule par cellule (un nœud de texte); chaque cellule de statut
+    ferme une ligne, reconstituée à partir des cellules qui la précèdent: la date (éventuellement
+    répartie sur plusieurs cellules), puis la ville: une ville connue de la ligne si elle en contient,
+    sinon la cellule qui suit la date, sinon celle qui la précède. Une ligne sans date n'est gardée
+    que si l'une de ses cellules est une ville connue.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.parser = VisibleTextParser(self.on_text)
+        self.status_keywords = detector.status_keywords
+        self.known_cities = detector.known_cities
+        self.cells = deque(maxlen=TOUR_ROW_CELLS)
+        self.table = {}
+        self.hash = hashlib.blake2b(digest_size=8)
+        self.done = False
+        self.result = None
+
+    def on_text(self, text):
+        cell = text.strip()
+        hits = self.status_keywords.scan(cell) if len(cell) <= STATUS_CELL_MAX else None
+        if hits and not DATE_PATTERN.search(cell):
+            self.add_row(TOUR_STATUSES[min(hits, key=lambda hit: STATUS_PRIORITY.index(TOUR_STATUSES[hit[0]]))[0]])
+        else:
+            self.cells.append(cell)
+
+    @staticmethod
+    def find_date(cells):
+        """(première cellule, dernière cellule, date) de la dernière date des cellules, None si aucune.
+        Une date découpée en plusieurs cellules ("14", "MAR", "2025") est réassemblée"""
+        for last in range(len(cells) - 1, -1, -1):
+            match = DATE_PATTERN.search(cells[last])
+            if match:
+                return last, last, match.group()
+            for first in range(last - 1, max(-1, last - DATE_MAX_CELLS), -1):
+                joined = ' '.join(cells[first:last + 1])
+                if DATE_PATTERN.fullmatch(joined):
+                    return first, last, joined
+        return None
+
+    def add_row(self, status):
+        cells = [cell for cell in self.cells if cell]
+        self.cells.clear()
+        found = self.find_date(cells)
+        if found is None:
+            # Sans date: seulement derrière une ville connue (sinon statut hors du tableau: menu, bandeau...)
+            city = next((city_key(cell) for cell in reversed(cells) if city_key(cell) in self.known_cities), None)
+            if city is None:
+                return
+            date = UNKNOWN_DATE
+        else:
+            first, last, date = found
+            # Ville connue n'importe où dans la ligne (la plus proche de la date), avant la position
+            known = [(min(abs(i - first), abs(i - last)), cell) for i, cell in enumerate(cells)
+                     if not first <= i <= last and city_key(cell) in self.known_cities]
+            if known:
+                city = min(known)[1]
+            elif last + 1 < len(cells):
+                city = cells[last + 1]
+            elif first > 0:
+                city = cells[first - 1]
+            else:
+                city = DATE_PATTERN.sub(' ', cells[first]).strip(' -–,·|')
+            if not city:
+                return
+            city = city_key(city)
+        self.table.setdefault(city, {})[date] = status
+        self.hash.update(f"{city}|{date}|{status}\n".encode('utf-8'))
+
+    def feed(self, chunk):
+        """Analyse un morceau de HTML (le tableau complet est lu: jamais d'arrêt anticipé)"""
+        self.parser.feed(chunk)
+        return False
+
+    def finish(self):
+        """Renvoie {'fingerprint', 'table'}, None si aucune ligne n'a été reconnue"""
+        self.parser.close()
+        if not self.table:
+            logging.warning("[%s] Aucune date de tournée trouvée dans le texte visible!", self.detector.name)
+            return None
+        self.result = {'fingerprint': self.hash.hexdigest(), 'table': self.table}
+        logging.debug("[%s] %d ville(s) dans le tableau (%s)", self.detector.name, len(self.table),
+                      self.result['fingerprint'])
+        return self.result
+
+
+class TourTableDetector:
+    """Tableau complet de la tournée (ville → date → statut), extrait en une seule analyse,
+    et règles de surveillance évaluées sur ce résultat structuré.
+
+    Règles (clé "when", "status" par défaut):
+      {"city": "Casablanca", "status": ["TICKETS"]}  une ville passe à l'un de ces statuts
+      {"status": ["TICKETS"]}                         n'importe quelle ville (sans "city")
+      {"when": "new_city"}                            une nouvelle ville apparaît
+      {"when": "new_date", "city": "Paris"}           nouvelle date (d'une ville ou de toutes)
+      {"when": "removed"}                             une ville disparaît du tableau
+    """
+
+    initial_state = None
+    RULE_TYPES = ('status', 'new_city', 'new_date', 'removed')
+
+    def __init__(self, name, rules=None, city='CASABLANCA', notify_on=('TICKETS',), hot_states=('SOON',)):
+        self.name = name
+        rules = rules or [{'city': city, 'status': list(notify_on)}]
+        self.rules = []
+        # Règles indexées par ville; celles sans ville s'appliquent à toutes
+        self.rules_by_city = {}
+        self.any_city_rules = []
+        for rule in rules:
+            when = rule.get('when', 'status')
+            if when not in self.RULE_TYPES:
+                raise ValueError(f"Règle inconnue pour '{name}': {when}")
+            rule = {'when': when, 'city': city_key(rule['city']) if rule.get('city') else None,
+                    'status': {s.upper().replace(' ', '_') for s in rule.get('status', ['TICKETS'])}}
+            self.rules.append(rule)
+            if rule['city']:
+                self.rules_by_city.setdefault(rule['city'], []).append(rule)
+            else:
+                self.any_city_rules.append(rule)
+        # Villes surveillées nommément (tableau de bord, états chauds); la première est la ville principale
+        self.cities = list(self.rules_by_city)
+        self.params = {'city': self.cities[0].title() if self.cities else '',
+                       'cities': ', '.join(c.title() for c in self.cities) or 'toutes'}
+        self.hot_states = set(hot_states)
+        self.status_keywords = KeywordMatcher(list(TOUR_STATUSES))
+        # Villes reconnues sur une ligne sans date
+        self.known_cities = {city_key(city) for city in KNOWN_CITIES} | set(self.cities)
+        # Repli quand aucune ligne n'est reconnue: statut de chaque ville nommée (tour_status)
+        self.fallbacks = None
+
+    def city_status(self, state, city):
+        """Statut d'une ville dans un état (tableau, ou statut seul d'un ancien état tour_status)"""
+        if isinstance(state, dict):
+            return best_status(state['table'].get(city, {}))
+        return state if city == (self.cities[0] if self.cities else None) else None
+
+    def is_hot(self, state):
+        return any(self.city_status(state, city) in self.hot_states for city in self.cities)
+
+    def statuses(self, state):
+        """Statuts atteints lors du dernier changement (filtre des abonnements)"""
+        return set(state.get('reached', [])) if isinstance(state, dict) else {state} if state else set()
+
+    def stream(self):
+        """Pas de streaming: le tableau complet est toujours lu (aucun arrêt anticipé possible),
+        autant profiter de l'empreinte de la page entière (page identique = pas d'analyse)"""
+        return None
+
+    def check(self, html_content):
+        """Analyse une page complète; sans ligne reconnue, repli sur le statut des villes nommées"""
+        try:
+            detector = TourTableStream(self)
+            detector.feed(html_content)
+            return detector.finish() or self.fallback(html_content)
+        except Exception as e:
+            logging.exception("[%s] ❌ Erreur: %s", self.name, e)
+            return None
+
+    def fallback(self, html_content):
+        """Tableau réduit {ville: {'?': statut}} lu par le détecteur tour_status de chaque ville nommée"""
+        if not self.cities:
+            return None
+        if self.fallbacks is None:
+            self.fallbacks = {city: TourStatusDetector(self.name, city) for city in self.cities}
+        table = {}
+        for city, detector in self.fallbacks.items():
+            status = detector.check(html_content)
+            if status:
+                table[city] = {UNKNOWN_DATE: status}
+        if not table:
+            return None
+        logging.warning("[%s] Tableau non reconnu, statut lu ville par ville (tour_status)", self.name)
+        return {'fingerprint': fingerprint(json.dumps(table, sort_keys=True)), 'table': table}
+
+    def changes(self, old_state, table):
+        """(nouvel état, messages des règles déclenchées) entre l'ancien état et le nouveau tableau"""
+        old_table = old_state['table'] if isinstance(old_state, dict) else None
+        new_state = {'table': table}
+        alerts = []
+        reached = set()
+
+        def status_change(rule, city):
+            before, after = self.city_status(old_state, city), best_status(table.get(city, {}))
+            if after != before and after in rule['status']:
+                dates = ', '.join(d for d, s in table[city].items() if s == after)
+                alerts.append(f"🎟️ {city.title()} ({dates}): {before or '—'} → {after}")
+                reached.add(after)
+
+        # Règles d'une ville: accès direct à sa ligne du tableau
+        for city, rules in self.rules_by_city.items():
+            for rule in rules:
+                if rule['when'] == 'status':
+                    status_change(rule, city)
+                elif old_table is not None:
+                    self.structural_change(rule, city, old_table, table, alerts)
+        # Règles sans ville: seules les villes dont la ligne a changé sont examinées
+        if self.any_city_rules:
+            old_rows = old_table or {}
+            changed = [c for c in table.keys() | old_rows.keys() if table.get(c) != old_rows.get(c)]
+            for rule in self.any_city_rules:
+                for city in sorted(changed):
+                    if rule['when'] == 'status':
+                        if city in table:
+                            status_change(rule, city)
+                    elif old_table is not None:
+                        self.structural_change(rule, city, old_table, table, alerts)
+        new_state['reached'] = sorted(reached)
+        # Une ville visée par plusieurs règles n'est signalée qu'une fois
+        return new_state, list(dict.fromkeys(alerts))
+
+    @staticmethod
+    def structural_change(rule, city, old_table, table, alerts):
+        before, after = old_table.get(city), table.get(city)
+        if rule['when'] == 'new_city' and after and before is None:
+            dates = ', '.join(f"{d} {s}" for d, s in after.items())
+            alerts.append(f"🆕 Nouvelle ville: {city.title()} ({dates})")
+        elif rule['when'] == 'new_date' and after and before is not None and UNKNOWN_DATE not in before:
+            for date in after.keys() - before.keys() - {UNKNOWN_DATE}:
+                alerts.append(f"📅 Nouvelle date à {city.title()}: {date} ({after[date]})")
+        elif rule['when'] == 'removed' and before and after is None:
+            alerts.append(f"❌ {city.title()} a disparu du tableau")
+
+    def apply(self, old_state, result):
+        """Renvoie (nouvel état, notifier?): l'état suit le tableau, les règles décident de l'alerte"""
+        if not result:
+            return old_state, False
+        if isinstance(old_state, dict) and old_state.get('fingerprint') == result['fingerprint']:
+            logging.debug("[%s] ✓ Tableau inchangé (%s)", self.name, result['fingerprint'])
+            return old_state, False
+        new_state, alerts = self.changes(old_state, result['table'])
+        new_state.update(fingerprint=result['fingerprint'], alerts=alerts)
+        if alerts:
+            logging.info("[%s] 🔔 %s", self.name, ' | '.join(alerts))
+        else:
+            logging.info("[%s] Tableau modifié, aucune règle déclenchée", self.name)
+        return new_state, bool(alerts)
+
+    def describe(self):
+        """Description courte de la surveillance (tableau de bord)"""
+        return f"Tableau de la tournée, {len(self.rules)} règle(s) (villes: {self.params['cities']})"
+
+    def display(self, state):
+        """(libellé, classe CSS) de l'état pour le tableau de bord"""
+        if not state:
+            return "En attente", "status-soon"
+        if isinstance(state, dict) and state.get('alerts'):
+            return '\n'.join(state['alerts']), "status-tickets"
+        if not self.cities:
+            return f"{len(state['table'])} ville(s)", "status-found"
+        statuses = [(city, self.city_status(state, city)) for city in self.cities]
+        label = ' · '.join(f"{city.title()}: {status or '?'}" for city, status in statuses)
+        return label, f"status-{(statuses[0][1] or 'soon').lower()}"
+
+
+def value_label(value):
+    """Forme comparable d'une valeur JSON: chaîne en majuscules, sinon son écriture JSON (TRUE, 12, NULL)"""
+    return value.upper() if isinstance(value, str) else json.dumps(value).upper()
+
+
+class JsonValueDetector:
+    """Valeur extraite d'une réponse JSON (mode de récupération "json") par une expression JSONPath.
+    Alerte quand la valeur atteint l'une de notify_on, ou à chaque changement sans notify_on"""
+
+    initial_state = None
+
+    def __init__(self, name, path, notify_on=None, hot_states=()):
+        self.name = name
+        self.path = JsonPath(path)
+        self.notify_on = {value_label(v) for v in notify_on} if notify_on else None
+        self.hot_states = {value_label(v) for v in hot_states}
+        self.params = {'path': path, 'notify_on': ', '.join(sorted(self.notify_on or [])) or 'tout changement'}
+
+    def labels(self, state):
+        values = state if isinstance(state, list) else [] if state is None else [state]
+        return [value_label(v) for v in values]
+
+    def is_hot(self, state):
+        return bool(self.hot_states & set(self.labels(state)))
+
+    def statuses(self, state):
+        """Valeurs atteintes dans cet état (filtre des abonnements)"""
+        return set(self.labels(state))
+
+    def stream(self):
+        """Pas de streaming: la réponse JSON est décodée en une fois par le mode de récupération"""
+        return None
+
+    def check(self, document):
+        """Extrait la valeur d'un document JSON décodé (ou de son texte, pour le rejeu de l'archive)"""
+        try:
+            if isinstance(document, (str, bytes)):
+                document = json.loads(document)
+            value = self.path.value(document)
+            logging.debug("[%s] %s = %s", self.name, self.path.expression, value)
+            return {'value': value}
+        except Exception as e:
+            logging.error("[%s] ❌ Erreur: %s", self.name, e)
+            return None
+
+    def apply(self, old_state, result):
+        """Renvoie (nouvel état, notifier?): l'état est la valeur extraite"""
+        if not result:
+            return old_state, False
+        value = result['value']
+        if value == old_state:
+            logging.debug("[%s] ✓ Pas de changement: %s", self.name, value)
+            return old_state, False
+        logging.info("[%s] 🔔 Changement: %s → %s", self.name, old_state, value)
+        if self.notify_on is None:
+            return value, old_state is not None
+        reached = self.notify_on & set(self.labels(value))
+        return value, bool(reached - set(self.labels(old_state)))
+
+    def describe(self):
+        """Description courte de la surveillance (tableau de bord)"""
+        return f"Valeur {self.params['path']} (alerte: {self.params['notify_on']})"
+
+    def display(self, state):
+        """(libellé, classe CSS) de l'état pour le tableau de bord"""
+        if state is None:
+            return "En attente", "status-soon"
+        labels = self.labels(state)
+        hit = self.notify_on and self.notify_on & set(labels)
+        return ', '.join(labels) or "Absent", "status-tickets" if hit else "status-found"
+
+
+# Types de détecteurs utilisables dans le fichier de configuration des sites
+DETECTOR_TYPES = {
+    'tour_status': TourStatusDetector,
+    'phrase': PhraseDetector,
+    'region': RegionDetector,
+    'tour_table': TourTableDetector,
+    'json_value': JsonValueDetector,
+}
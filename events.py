@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Diffusion des changements d'état aux navigateurs (Server-Sent Events).
+
+Un seul tampon circulaire partagé par tous les abonnés: publier coûte une insertion et
+un réveil, chaque abonné ne garde que l'identifiant du dernier événement reçu
+(ce qui permet aussi la reprise via Last-Event-ID).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Nombre d'événements conservés pour la reprise après déconnexion
+EVENTS_BACKLOG = int(os.getenv('EVENTS_BACKLOG', '500'))
+# Intervalle (secondes) des commentaires de maintien de connexion
+SSE_HEARTBEAT = float(os.getenv('SSE_HEARTBEAT', '15'))
+# Délai de reconnexion conseillé aux navigateurs (millisecondes)
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '3000'))
+
+
+def format_event(event_id, event, data):
+    """Message SSE (data déjà sérialisée en JSON, donc sur une seule ligne)"""
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+class EventBroker:
+    """Tampon d'événements numérotés; les abonnés attendent ceux postérieurs à leur curseur"""
+
+    def __init__(self, backlog=EVENTS_BACKLOG):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=backlog)
+        # Numérotation à partir de l'heure (ms): les identifiants restent croissants après un redémarrage
+        self.last_id = int(time.time() * 1000)
+
+    def publish(self, event, data):
+        with self.condition:
+            self.last_id += 1
+            self.events.append((self.last_id, event, json.dumps(data)))
+            self.condition.notify_all()
+        return self.last_id
+
+    def since(self, cursor):
+        """Événements après cursor; None si le curseur est inconnu (trop ancien ou d'une autre exécution)"""
+        with self.condition:
+            if cursor > self.last_id:
+                return None
+            if cursor < self.last_id and (not self.events or cursor < self.events[0][0] - 1):
+                return None
+            return [e for e in self.events if e[0] > cursor]
+
+    def wait(self, cursor, timeout):
+        """Attend un événement postérieur à cursor (au plus timeout secondes), puis le(s) renvoie"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id > cursor, timeout)
+        return self.since(cursor)
+
+    def stream(self, last_event_id=None, heartbeat=SSE_HEARTBEAT):
+        """Générateur de messages SSE pour un abonné (reprise depuis last_event_id si possible)"""
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        cursor = self.last_id
+        if last_event_id is not None:
+            missed = self.since(last_event_id)
+            if missed is None:
+                # Reprise impossible: le client doit recharger l'état complet
+                yield format_event(cursor, 'snapshot', json.dumps({'reason': 'resync'}))
+            else:
+                for event in missed:
+                    yield format_event(*event)
+                cursor = missed[-1][0] if missed else last_event_id
+        while True:
+            events = self.wait(cursor, heartbeat)
+            if events is None:
+                # Abonné trop lent, dépassé par le tampon
+                cursor = self.last_id
+                yield format_event(cursor, 'snapshot', json.dumps({'reason': 'resync'}))
+            elif not events:
+                yield ": ping\n\n"
+            else:
+                for event in events:
+                    yield format_event(*event)
+                cursor = events[-1][0]
+
+
+# Tampon du processus, partagé par les monitorings successifs (relances par le chien de garde):
+# les navigateurs connectés restent abonnés au même flux après une relance
+BROKER = EventBroker()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cache partagé des récupérations, indexé par URL.
+
+Plusieurs sites (ou abonnés) qui surveillent la même URL ne la téléchargent qu'une fois par
+FETCH_CACHE_TTL secondes, et chaque détecteur distinct ne l'analyse qu'une fois: le nombre de
+requêtes dépend du nombre d'URL distinctes, pas du nombre de sites. La taille du cache est bornée
+(FETCH_CACHE_MAX_BYTES): les pages les moins récemment utilisées sont évincées.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# Durée (secondes) pendant laquelle une récupération est réutilisée
+FETCH_CACHE_TTL = float(os.getenv('FETCH_CACHE_TTL', '30'))
+# Taille maximum (caractères des pages gardées en mémoire)
+FETCH_CACHE_MAX_BYTES = int(os.getenv('FETCH_CACHE_MAX_BYTES', str(20 * 1024 * 1024)))
+
+
+class CachedFetch:
+    """Résultat d'une récupération (page, UNCHANGED ou None) et analyses déjà faites par détecteur"""
+
+    def __init__(self, page, fetched_at, version=None):
+        self.page = page
+        self.fetched_at = fetched_at
+        # Identifiant du contenu (empreinte), aussi pour UNCHANGED: même version que la dernière page
+        self.version = version
+        self.size = len(page) if isinstance(page, str) else 0
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def result(self, key, check):
+        """Résultat du détecteur key sur la page, calculé au premier appel seulement"""
+        with self.lock:
+            if key not in self.results:
+                self.results[key] = check(self.page)
+            else:
+                metrics.FETCH_CACHE_HITS.inc(kind='parse')
+            return self.results[key]
+
+
+class FetchCache:
+    """Récupérations récentes par URL (TTL + éviction LRU par taille), une seule requête à la fois par URL"""
+
+    def __init__(self, ttl=FETCH_CACHE_TTL, max_bytes=FETCH_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        # Un verrou par URL en cours de récupération: les autres sites attendent son résultat
+        self.url_locks = {}
+
+    def lookup(self, url, now, max_age):
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            age = now - entry.fetched_at
+            if age >= self.ttl:
+                self.remove(url)
+                return None
+            if age >= max_age:
+                return None
+            self.entries.move_to_end(url)
+            return entry
+
+    def remove(self, url):
+        entry = self.entries.pop(url)
+        self.size -= entry.size
+
+    def store(self, url, entry):
+        with self.lock:
+            if url in self.entries:
+                self.remove(url)
+            self.entries[url] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                self.remove(next(iter(self.entries)))
+                metrics.FETCH_CACHE_EVICTIONS.inc()
+
+    def get(self, url, fetch, max_age=None, version=None):
+        """Récupération de l'URL (fetch() appelé seulement si rien de récent n'est en cache).
+        max_age: âge maximum accepté par l'appelant (un site vérifié souvent veut une page plus fraîche);
+        version(): identifiant du contenu récupéré, lu juste après fetch()"""
+        max_age = self.ttl if max_age is None else min(self.ttl, max_age)
+        entry = self.lookup(url, time.monotonic(), max_age)
+        if entry is not None:
+            metrics.FETCH_CACHE_HITS.inc(kind='fetch')
+            return entry
+        with self.lock:
+            url_lock = self.url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            # Un autre site vient peut-être de la récupérer pendant l'attente
+            entry = self.lookup(url, time.monotonic(), max_age)
+            if entry is not None:
+                metrics.FETCH_CACHE_HITS.inc(kind='fetch')
+                return entry
+            page = fetch()
+            entry = CachedFetch(page, time.monotonic(), version() if version else None)
+            self.store(url, entry)
+            return entry
+
+    def stats(self):
+        with self.lock:
+            return {'urls': len(self.entries), 'bytes': self.size}
@@ -0,0 +1,31 @@
+"""
+Configuration gunicorn (serveur de production): gunicorn -c gunicorn.conf.py web_server:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+# Les pages sont pré-rendues: un worker suffit; avec plusieurs workers, un seul fait tourner
+# le monitoring et les autres lisent sa photo d'état sur disque (SHARDING=true: chacun surveille une part des sites)
+workers = int(os.getenv('WEB_WORKERS', '1'))
+# gthread: vrais threads (seul type de worker pris en charge). Avec gevent, le monitoring deviendrait
+# des greenlets et une analyse de page (CPU, Python pur) bloquerait toutes les requêtes, /health et le
+# chien de garde; gunicorn applique le même worker_class à tous les workers
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+worker_connections = int(os.getenv('WEB_WORKER_CONNECTIONS', '1000'))
+# Chaque abonné /events occupe un thread tant qu'il est connecté: au plus SSE_MAX_CLIENTS
+# (WEB_THREADS - 8 par défaut), les threads restants servent toujours /health et /ping
+threads = int(os.getenv('WEB_THREADS', '32'))
+timeout = 60
+
+
+def post_worker_init(worker):
+    import web_server
+    web_server.start_monitor()
+
+
+def worker_exit(server, worker):
+    import web_server
+    if web_server.monitor is not None:
+        # Laisser partir les alertes encore en file, rendre les baux (mode réparti)
+        web_server.monitor.close(timeout=10)
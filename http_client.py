@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Client HTTP partagé: une session keep-alive avec pools de connexions par hôte,
+utilisée pour la récupération des pages et pour Telegram
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING as SUPPORTED_ACCEPT_ENCODING
+
+# Nombre d'hôtes gardés en pool, et connexions conservées par hôte
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+# Timeouts séparés: établissement de la connexion / lecture de la réponse
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '15'))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', '10'))
+
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+
+# Compressions décodables ici: gzip, deflate, et br si le paquet Brotli est installé
+SUPPORTED_ENCODINGS = {encoding.strip() for encoding in SUPPORTED_ACCEPT_ENCODING.split(',')}
+# Compressions demandées aux sites (par défaut toutes celles qu'on sait décoder)
+ACCEPT_ENCODING = os.getenv('ACCEPT_ENCODING', ', '.join(e for e in ('br', 'gzip', 'deflate') if e in SUPPORTED_ENCODINGS))
+# Taille maximum d'une réponse décompressée (octets): au-delà, le téléchargement est interrompu
+MAX_BODY_BYTES = int(os.getenv('MAX_BODY_BYTES', str(10 * 1024 * 1024)))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Renvoie la session partagée (créée au premier appel)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+
+class ResponseTooLarge(Exception):
+    """Réponse plus grande que la taille maximum autorisée"""
+
+
+def accept_encoding(encodings):
+    """En-tête Accept-Encoding limité aux compressions décodables (les autres sont ignorées)"""
+    requested = [e.strip() for e in encodings.split(',') if e.strip()]
+    return ', '.join(e for e in requested if e in SUPPORTED_ENCODINGS or e == 'identity') or 'identity'
+
+
+def iter_body(response, max_bytes=MAX_BODY_BYTES, chunk_size=16384):
+    """Corps de la réponse par morceaux d'octets décompressés; ResponseTooLarge au-delà de max_bytes
+    (annoncé par Content-Length, ou constaté en cours de lecture)"""
+    declared = response.headers.get('Content-Length')
+    # Content-Length d'une réponse compressée: sa taille compressée, donc au plus la taille décompressée
+    if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+        raise ResponseTooLarge(f"{declared} octets annoncés (maximum {max_bytes})")
+    received = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        received += len(chunk)
+        if max_bytes and received > max_bytes:
+            raise ResponseTooLarge(f"plus de {max_bytes} octets reçus, téléchargement interrompu")
+        yield chunk
+
+
+def wire_bytes(response):
+    """Octets réellement transférés (compressés), None si inconnu"""
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        return raw.tell()
+    return None
+
+
+def request(method, url, timeout=None, **kwargs):
+    """Requête quelconque via la session partagée (modes de récupération: GET, POST JSON...)"""
+    return get_session().request(method, url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+
+def post(url, timeout=None, **kwargs):
+    """POST via la session partagée"""
+    return get_session().post(url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+
+def send_telegram_message(bot_token, chat_id, text):
+    """Envoie un message Telegram (HTML), lève une exception en cas d'échec"""
+    response = post(
+        f"{TELEGRAM_API_URL}/bot{bot_token}/sendMessage",
+        json={
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML"
+        },
+        timeout=(CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT)
+    )
+    response.raise_for_status()
+    return response
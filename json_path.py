@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Expressions de type JSONPath pour extraire une valeur d'une réponse JSON (sous-ensemble):
+
+    $.event.status             clés
+    $.offers[0].price          index (négatif accepté)
+    $.offers[*].name  $.a.*    tous les éléments
+    $..available               recherche récursive d'une clé
+    $.offers[?(@.name == 'Petit Cop')].available
+                               filtre (==, !=, <, <=, >, >= sur une valeur, ou @.champ seul = vrai)
+
+L'expression est compilée une fois; l'évaluation ne parcourt que les branches désignées.
+"""
+
+import json
+import re
+
+TOKEN = re.compile(r"""
+    \.\.(?P<deep>[\w-]+|\*)
+  | \.(?P<key>[\w-]+|\*)
+  | \[\s*(?P<index>-?\d+)\s*\]
+  | \[\s*(?P<quoted>'[^']*'|"[^"]*")\s*\]
+  | \[\s*\*\s*\](?P<all>)
+  | \[\s*\?\(\s*@\.(?P<field>[\w.-]+)\s*(?:(?P<op>==|!=|<=|>=|<|>)\s*(?P<value>'[^']*'|"[^"]*"|[^)\s]+)\s*)?\)\s*\]
+""", re.VERBOSE)
+
+OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def literal(text):
+    """Valeur d'un filtre: chaîne entre guillemets, sinon littéral JSON (nombre, true, null...)"""
+    if text[0] in '\'"':
+        return text[1:-1]
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def children(node):
+    if isinstance(node, dict):
+        return list(node.values())
+    if isinstance(node, list):
+        return node
+    return []
+
+
+def descendants(node):
+    """Le nœud et tous ses descendants (parcours en profondeur, dans l'ordre du document)"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(children(current)))
+
+
+def field(node, path):
+    for key in path.split('.'):
+        if not isinstance(node, dict) or key not in node:
+            return None, False
+        node = node[key]
+    return node, True
+
+
+class JsonPath:
+    """Expression compilée; find() renvoie les valeurs trouvées, value() la valeur désignée"""
+
+    def __init__(self, expression):
+        self.expression = expression
+        text = expression.strip()
+        if not text.startswith('$'):
+            raise ValueError(f"Expression JSONPath invalide (doit commencer par $): {expression}")
+        self.steps = []
+        position = 1
+        while position < len(text):
+            match = TOKEN.match(text, position)
+            if not match:
+                raise ValueError(f"Expression JSONPath invalide à la position {position}: {expression}")
+            self.steps.append(self.compile_step(match))
+            position = match.end()
+        # Une seule valeur possible (clés et index): le résultat est une valeur, sinon une liste
+        self.single = all(kind in ('key', 'index') for kind, _ in self.steps)
+
+    @staticmethod
+    def compile_step(match):
+        if match.group('deep') is not None:
+            return 'deep', match.group('deep')
+        if match.group('key') is not None:
+            key = match.group('key')
+            return ('all', None) if key == '*' else ('key', key)
+        if match.group('index') is not None:
+            return 'index', int(match.group('index'))
+        if match.group('quoted') is not None:
+            return 'key', match.group('quoted')[1:-1]
+        if match.group('all') is not None:
+            return 'all', None
+        op = match.group('op')
+        return 'filter', (match.group('field'), OPERATORS[op] if op else None,
+                          literal(match.group('value')) if op else None)
+
+    def find(self, document):
+        nodes = [document]
+        for kind, arg in self.steps:
+            found = []
+            for node in nodes:
+                if kind == 'key':
+                    if isinstance(node, dict) and arg in node:
+                        found.append(node[arg])
+                elif kind == 'index':
+                    if isinstance(node, list) and -len(node) <= arg < len(node):
+                        found.append(node[arg])
+                elif kind == 'all':
+                    found.extend(children(node))
+                elif kind == 'deep':
+                    for descendant in descendants(node):
+                        if isinstance(descendant, dict):
+                            if arg == '*':
+                                found.extend(descendant.values())
+                            elif arg in descendant:
+                                found.append(descendant[arg])
+                else:
+                    path, compare, expected = arg
+                    for child in children(node):
+                        value, present = field(child, path)
+                        try:
+                            if present and (compare(value, expected) if compare else bool(value)):
+                                found.append(child)
+                        except TypeError:
+                            # Comparaison impossible (types différents): l'élément ne correspond pas
+                            continue
+            nodes = found
+            if not nodes:
+                break
+        return nodes
+
+    def value(self, document):
+        """Valeur désignée (expression simple) ou liste des valeurs (jokers, filtres); None si absente"""
+        nodes = self.find(document)
+        if self.single:
+            return nodes[0] if nodes else None
+        return nodes
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Mode réparti: plusieurs processus d'une même machine se partagent les sites.
+
+Les baux reposent sur SQLite en mode WAL (mémoire partagée et verrous locaux): la base doit être
+sur un disque local de la machine. Sur un système de fichiers réseau (NFS, SMB, volume partagé
+entre machines), les verrous ne sont pas fiables et deux workers pourraient détenir le même bail.
+
+Chaque worker signale sa présence et détient des baux (leases) à durée limitée sur les sites
+qu'il surveille, dans la même base SQLite que l'état. Le site revient au worker vivant préféré
+(hachage "rendezvous": la répartition bouge peu quand un worker arrive ou part); un bail non
+renouvelé expire et le site est repris par un autre worker.
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Active le mode réparti (sinon un seul monitoring surveille tous les sites)
+SHARDING = os.getenv('SHARDING', 'false').lower() == 'true'
+# Identifiant du worker (unique par processus)
+WORKER_ID = os.getenv('WORKER_ID', f"{socket.gethostname()}-{os.getpid()}")
+# Durée d'un bail et intervalle de renouvellement (secondes)
+LEASE_TTL = float(os.getenv('LEASE_TTL', '60'))
+LEASE_RENEW = float(os.getenv('LEASE_RENEW', '15'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    owner TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    target_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def rank(owner, target_id):
+    """Poids du couple (worker, site): le worker de poids maximum est le propriétaire préféré"""
+    return hashlib.sha1(f"{owner}:{target_id}".encode()).digest()
+
+
+class LeaseManager:
+    """Baux des sites pour un worker, renouvelés par refresh()"""
+
+    def __init__(self, path, owner=WORKER_ID, ttl=LEASE_TTL):
+        self.owner = owner
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.owned = set()
+
+    def refresh(self, target_ids, now=None):
+        """Signale la présence du worker, renouvelle/prend/cède les baux; renvoie les sites détenus"""
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        with self.lock:
+            # Transaction en écriture dès le début: deux workers ne peuvent pas prendre le même bail
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute(
+                    'INSERT INTO workers (owner, expires_at) VALUES (?, ?) '
+                    'ON CONFLICT(owner) DO UPDATE SET expires_at = excluded.expires_at', (self.owner, expires_at))
+                self.conn.execute('DELETE FROM workers WHERE expires_at < ?', (now - 10 * self.ttl,))
+                live = [row[0] for row in self.conn.execute('SELECT owner FROM workers WHERE expires_at > ?', (now,))]
+                leases = {row[0]: (row[1], row[2]) for row in self.conn.execute('SELECT target_id, owner, expires_at FROM leases')}
+
+                owned = set()
+                for target_id in target_ids:
+                    preferred = max(live, key=lambda worker: rank(worker, target_id))
+                    holder, holder_expires = leases.get(target_id, (None, 0))
+                    mine = holder == self.owner and holder_expires > now
+                    free = holder is None or holder_expires <= now
+                    if mine and preferred != self.owner:
+                        # Un autre worker vivant est préféré: on lui cède le site
+                        self.conn.execute('DELETE FROM leases WHERE target_id = ? AND owner = ?', (target_id, self.owner))
+                    elif mine or (free and preferred == self.owner):
+                        self.conn.execute(
+                            'INSERT INTO leases (target_id, owner, expires_at) VALUES (?, ?, ?) '
+                            'ON CONFLICT(target_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at',
+                            (target_id, self.owner, expires_at))
+                        owned.add(target_id)
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.owned = owned
+        return owned
+
+    def release_all(self):
+        """Libère tous les baux du worker (arrêt propre: reprise immédiate par les autres)"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self.conn.execute('DELETE FROM leases WHERE owner = ?', (self.owner,))
+                self.conn.execute('DELETE FROM workers WHERE owner = ?', (self.owner,))
+            self.owned = set()
+
+    def assignments(self, now=None):
+        """{site: worker} des baux en cours (tableau de bord)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.conn.execute('SELECT target_id, owner FROM leases WHERE expires_at > ?', (now,)).fetchall()
+        return dict(rows)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Configuration des logs: écriture en arrière-plan, rotation et format JSON optionnel.
+
+Les appels logging.* ne font que déposer l'enregistrement dans une file; un thread
+dédié écrit sur la console et dans le fichier (avec rotation par taille ou par date).
+Les messages utilisent le formatage paresseux (%s): sous le niveau configuré, ils ne coûtent rien.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from contextlib import contextmanager
+from datetime import datetime
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# Fichier de log ('' pour la console seule)
+LOG_FILE = os.getenv('LOG_FILE', 'monitoring.log')
+# 'text' (lisible) ou 'json' (une ligne JSON par message, avec le site concerné)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+# Rotation du fichier: 'size' (LOG_MAX_BYTES) ou 'time' (LOG_ROTATE_WHEN), LOG_BACKUP_COUNT fichiers gardés
+LOG_ROTATE = os.getenv('LOG_ROTATE', 'size')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', 'midnight')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '3'))
+# Workers gunicorn: chacun écrit dans son propre fichier (deux rotations sur le même fichier
+# se marcheraient dessus: lignes perdues ou écrites dans un fichier déjà renommé)
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', '1'))
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributs standards d'un LogRecord (le reste vient de extra=... et part dans le JSON)
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+# Site en cours de traitement dans le thread courant (ajouté aux messages JSON)
+current_target = contextvars.ContextVar('current_target', default=None)
+
+listener = None
+
+
+class TargetFilter(logging.Filter):
+    """Ajoute le site en cours (record.target) aux messages émis pendant son traitement"""
+
+    def filter(self, record):
+        if not hasattr(record, 'target'):
+            record.target = current_target.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON compacte par message: heure, niveau, message, site et champs extra"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+@contextmanager
+def log_target(target_id):
+    """Associe les messages émis dans ce bloc au site target_id"""
+    token = current_target.set(target_id)
+    try:
+        yield
+    finally:
+        current_target.reset(token)
+
+
+def log_path(path, pid=None):
+    """Fichier de log du processus: monitoring.log, ou monitoring.<pid>.log avec plusieurs workers"""
+    if WEB_WORKERS <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}.{pid or os.getpid()}{ext or ".log"}'
+
+
+def file_handler(path):
+    # delay: le fichier n'est ouvert qu'au premier message écrit
+    if LOG_ROTATE == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True)
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True)
+
+
+def setup_logging():
+    """Installe la file de logs et son thread d'écriture (une seule fois par processus)"""
+    global listener
+    if listener is not None:
+        return
+
+    formatter = JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if LOG_FILE:
+        handlers.append(file_handler(log_path(LOG_FILE)))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(TargetFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Vider la file à l'arrêt du processus
+    atexit.register(listener.stop)
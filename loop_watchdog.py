@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Chien de garde de la boucle de monitoring.
+
+La boucle signale chacune de ses étapes (battement de cœur): début de cycle, phases
+(fetch, parse, notify, save), mise en sommeil. Chaque étape annonce l'heure avant laquelle
+la suivante doit arriver; au-delà (plus WATCHDOG_GRACE), la boucle est considérée comme bloquée.
+Un thread séparé vérifie ces échéances, relance un monitoring bloqué ou mort et écrit
+l'état de santé dans HEARTBEAT_FILE, lu par /health dans tous les processus du serveur web.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# Période de vérification du chien de garde (et d'écriture de HEARTBEAT_FILE)
+WATCHDOG_INTERVAL = float(os.getenv('WATCHDOG_INTERVAL', '10'))
+# Marge (secondes) après une échéance manquée avant de déclarer la boucle bloquée
+WATCHDOG_GRACE = float(os.getenv('WATCHDOG_GRACE', '60'))
+# Relance automatique du monitoring bloqué ou mort
+WATCHDOG_RESTART = os.getenv('WATCHDOG_RESTART', 'true').lower() == 'true'
+# Durée maximum d'un cycle (0 = plus long délai par site + 30s pour appliquer et sauvegarder)
+CYCLE_DEADLINE = float(os.getenv('CYCLE_DEADLINE', '0'))
+# Retard de planification toléré, en fraction de CHECK_INTERVAL (au-delà: santé "degraded")
+LOOP_LAG_MAX = float(os.getenv('LOOP_LAG_MAX', '0.1'))
+# Site "en retard" sans vérification réussie depuis FRESHNESS_FACTOR fois son intervalle
+# (santé "degraded" pour un site, "stale" quand aucun site n'est à jour: site bloquant, DNS en panne...)
+FRESHNESS_FACTOR = float(os.getenv('FRESHNESS_FACTOR', '3'))
+# État de santé partagé entre les processus du serveur web
+HEARTBEAT_FILE = os.getenv('HEARTBEAT_FILE', 'heartbeat.json')
+
+PHASES = ('fetch', 'parse', 'notify', 'save')
+
+
+class LoopHeartbeat:
+    """Battement de cœur et chronométrage des cycles, mis à jour par la boucle de monitoring
+    (et par les workers du pool pour le temps de détection)"""
+
+    def __init__(self, check_interval, cycle_deadline, workers):
+        self.check_interval = check_interval
+        self.cycle_deadline = cycle_deadline
+        self.lag_max = check_interval * LOOP_LAG_MAX
+        self.lock = threading.Lock()
+        now = time.monotonic()
+        self.phase = 'starting'
+        self.beat_at = now
+        self.expected_by = now + cycle_deadline
+        self.cycle_started_at = None
+        self.timings = {}
+        self.lag = 0.0
+        self.cycles = 0
+        self.overruns = 0
+        # Workers du pool encore occupés par une vérification abandonnée (délai dépassé)
+        self.stuck_workers = 0
+        self.workers = workers
+        self.last_cycle = None
+        # Par site surveillé: (dernière vérification réussie, intervalle), en temps monotone
+        self.freshness = {}
+
+    def beat(self, phase, within):
+        """Étape en cours; la suivante doit arriver avant `within` secondes"""
+        now = time.monotonic()
+        with self.lock:
+            self.phase = phase
+            self.beat_at = now
+            self.expected_by = now + within
+        metrics.HEARTBEAT.set(time.time())
+
+    def cycle_started(self, lag):
+        """Début d'un cycle; lag = retard sur l'échéance la plus ancienne des sites vérifiés"""
+        with self.lock:
+            self.cycle_started_at = time.monotonic()
+            self.timings = dict.fromkeys(PHASES, 0.0)
+            self.lag = lag
+        metrics.LOOP_LAG_SECONDS.set(lag)
+        if lag > self.lag_max:
+            logging.warning("🐢 Boucle en retard de %.1fs sur la planification (CHECK_INTERVAL=%ss)",
+                            lag, self.check_interval)
+        self.beat('cycle', self.cycle_deadline)
+
+    def add(self, phase, seconds):
+        with self.lock:
+            if phase in self.timings:
+                self.timings[phase] += seconds
+
+    @contextmanager
+    def measure(self, phase):
+        """Chronomètre une phase du cycle (échéance: la fin du cycle)"""
+        remaining = self.cycle_started_at + self.cycle_deadline - time.monotonic()
+        self.beat(phase, max(0, remaining))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def cycle_finished(self, targets):
+        """Fin du cycle: durées par phase, dépassement éventuel du délai de cycle"""
+        seconds = time.monotonic() - self.cycle_started_at
+        overrun = seconds > self.cycle_deadline
+        with self.lock:
+            timings = {phase: round(value, 3) for phase, value in self.timings.items()}
+            self.cycles += 1
+            self.overruns += overrun
+            self.last_cycle = {'at': time.time(), 'seconds': round(seconds, 3), 'targets': targets,
+                               'lag': round(self.lag, 3), 'phases': timings, 'overrun': overrun}
+        for phase, value in timings.items():
+            metrics.CYCLE_PHASE_SECONDS.observe(value, phase=phase)
+        if overrun:
+            metrics.CYCLE_OVERRUNS.inc()
+            logging.warning("⏱️ Cycle hors délai: %.1fs (maximum %.0fs), phases: %s",
+                            seconds, self.cycle_deadline, timings)
+        return timings
+
+    def watch(self, intervals):
+        """Sites vérifiés par ce processus {site: intervalle}; un nouveau site a FRESHNESS_FACTOR
+        intervalles à partir de maintenant pour réussir sa première vérification"""
+        now = time.monotonic()
+        with self.lock:
+            self.freshness = {target_id: (self.freshness.get(target_id, (now,))[0], interval)
+                              for target_id, interval in intervals.items()}
+
+    def checked(self, target_id, ok):
+        """Fin de la vérification d'un site (ok: page récupérée)"""
+        if not ok:
+            return
+        with self.lock:
+            if target_id in self.freshness:
+                self.freshness[target_id] = (time.monotonic(), self.freshness[target_id][1])
+
+    def sleeping(self, delay):
+        self.beat('sleep', delay)
+
+    def status(self, grace=WATCHDOG_GRACE):
+        """Vivacité de la boucle: étape en cours, retard sur l'échéance, dernier cycle"""
+        now = time.monotonic()
+        with self.lock:
+            overdue = max(0.0, now - self.expected_by)
+            stale = sorted(target_id for target_id, (succeeded_at, interval) in self.freshness.items()
+                           if now - succeeded_at > FRESHNESS_FACTOR * interval)
+            return {
+                'phase': self.phase,
+                'heartbeat_age': round(now - self.beat_at, 1),
+                'overdue': round(overdue, 1),
+                'stalled': overdue > grace,
+                'pool_saturated': self.stuck_workers >= self.workers,
+                'lagging': self.lag > self.lag_max,
+                'lag': round(self.lag, 3),
+                'cycles': self.cycles,
+                'overruns': self.overruns,
+                'stuck_workers': self.stuck_workers,
+                'last_cycle': self.last_cycle,
+                'stale_targets': stale,
+                'stale': bool(stale) and len(stale) == len(self.freshness),
+            }
+
+
+class Watchdog:
+    """Thread qui surveille le thread de monitoring: le relance s'il est mort ou bloqué,
+    publie l'état de santé (HEARTBEAT_FILE)"""
+
+    def __init__(self, launch, current, interval=WATCHDOG_INTERVAL, grace=WATCHDOG_GRACE,
+                 restart=WATCHDOG_RESTART, path=HEARTBEAT_FILE):
+        # launch(): démarre le monitoring dans un nouveau thread et le renvoie
+        # current(): monitoring en cours (None pendant sa construction)
+        self.launch = launch
+        self.current = current
+        self.interval = interval
+        self.grace = grace
+        self.restart_enabled = restart
+        self.path = path
+        self.thread = None
+        self.launched_at = None
+        self.restarts = 0
+        # Dernier monitoring abandonné (toujours référencé tant que son remplaçant démarre)
+        self.abandoned = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def start_monitor(self):
+        self.thread = self.launch()
+        self.launched_at = time.monotonic()
+
+    def start(self):
+        """Démarre le monitoring puis le thread de surveillance"""
+        self.start_monitor()
+        self.publish(self.health())
+        threading.Thread(target=self.run, name='watchdog', daemon=True).start()
+        return self
+
+    def health(self):
+        """État de santé: ok, degraded (cycle hors délai, retard, site sans succès récent),
+        stale (aucun site vérifié avec succès récemment), starting, stalled ou dead"""
+        monitor = self.current()
+        if monitor is self.abandoned:
+            monitor = None
+        if self.thread is None:
+            return {'status': 'starting', 'monitoring': False}
+        if not self.thread.is_alive():
+            return {'status': 'dead', 'monitoring': False, 'restarts': self.restarts,
+                    'reason': "thread de monitoring arrêté"}
+        if monitor is None:
+            starting_for = time.monotonic() - self.launched_at
+            if starting_for > self.grace:
+                return {'status': 'stalled', 'monitoring': False, 'restarts': self.restarts,
+                        'reason': f"démarrage bloqué depuis {starting_for:.0f}s"}
+            return {'status': 'starting', 'monitoring': False}
+        loop = monitor.heartbeat.status(self.grace)
+        status = 'ok'
+        if loop['stalled']:
+            status = 'stalled'
+            loop['reason'] = f"étape '{loop['phase']}' en retard de {loop['overdue']:.0f}s"
+        elif loop['pool_saturated']:
+            status = 'stalled'
+            loop['reason'] = "tous les workers du pool sont bloqués"
+        elif loop['stale']:
+            # Boucle vivante mais aucune page récupérée: une relance n'y changerait rien
+            status = 'stale'
+            loop['reason'] = f"aucune vérification réussie depuis {FRESHNESS_FACTOR:g} intervalles"
+        elif (loop['lagging'] or (loop['last_cycle'] or {}).get('overrun') or loop['stuck_workers']
+              or loop['stale_targets']):
+            status = 'degraded'
+        return dict(loop, status=status, monitoring=True, restarts=self.restarts)
+
+    def check(self):
+        """Une vérification: santé publiée, relance si le monitoring est mort ou bloqué"""
+        health = self.health()
+        metrics.MONITOR_ALIVE.set(int(health['status'] not in ('stalled', 'dead')))
+        # Au plus une relance par WATCHDOG_GRACE (monitoring qui meurt dès son démarrage)
+        if (health['status'] in ('stalled', 'dead') and self.restart_enabled
+                and time.monotonic() - self.launched_at >= self.grace):
+            self.restart(health)
+            health = self.health()
+        self.publish(health)
+        return health
+
+    def restart(self, health):
+        """Abandonne le monitoring en cours (un thread bloqué ne peut pas être tué) et en relance un"""
+        with self.lock:
+            logging.error("🐕 Monitoring %s (%s): relance", health['status'], health.get('reason', ''))
+            metrics.MONITOR_RESTARTS.inc(reason=health['status'])
+            monitor = self.current()
+            if monitor is not None and monitor is not self.abandoned:
+                self.abandoned = monitor
+                try:
+                    monitor.abandon()
+                except Exception as e:
+                    logging.error("Erreur arrêt du monitoring bloqué: %s", e)
+            self.restarts += 1
+            self.start_monitor()
+
+    def publish(self, health):
+        """Écrit l'état de santé (fichier temporaire puis remplacement atomique)"""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(dict(health, written_at=time.time(), pid=os.getpid()), f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.error("Erreur écriture de %s: %s", self.path, e)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.exception("Erreur du chien de garde: %s", e)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def read_heartbeat(path=HEARTBEAT_FILE, interval=WATCHDOG_INTERVAL):
+    """Santé publiée par le processus qui fait tourner le monitoring (None si pas encore publiée);
+    un fichier trop ancien signifie que ce processus ne répond plus"""
+    try:
+        with open(path) as f:
+            health = json.load(f)
+    except (OSError, ValueError):
+        return None
+    age = time.time() - health.get('written_at', 0)
+    if age > 3 * interval:
+        health.update(status='stalled', monitoring=False,
+                      reason=f"processus de monitoring silencieux depuis {age:.0f}s")
+    return health
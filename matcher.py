@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Recherche de mots-clés en streaming pour les détecteurs de pages
+"""
+
+import re
+from html.parser import HTMLParser
+
+
+class KeywordMatcher:
+    """Recherche plusieurs mots-clés en une passe (une seule regex compilée, insensible à la casse).
+
+    feed() accepte le texte morceau par morceau et garde la fin du morceau précédent,
+    de sorte qu'un mot-clé à cheval sur deux morceaux est quand même trouvé.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = {keyword.upper(): keyword for keyword in keywords}
+        # Les mots-clés les plus longs d'abord: "SOLD OUT" avant "SOLD" par exemple
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        # Un groupe nommé par mot-clé: le texte trouvé ne redonne pas toujours le mot-clé une fois
+        # en majuscules (le signe kelvin "K" correspond à "k" sans insensibilité à la casse ASCII)
+        self.groups = {f'k{i}': self.keywords[keyword] for i, keyword in enumerate(ordered)}
+        self.pattern = re.compile('|'.join(f'(?P<k{i}>{re.escape(keyword)})' for i, keyword in enumerate(ordered)),
+                                  re.IGNORECASE)
+        self.overlap = max(len(k) for k in self.keywords) - 1
+        self.buffer = ''
+        self.offset = 0
+
+    def scan(self, text):
+        """Renvoie les (mot-clé, position) trouvés dans un texte complet, dans l'ordre"""
+        return [(self.groups[m.lastgroup], m.start()) for m in self.pattern.finditer(text)]
+
+    def feed(self, chunk):
+        """Ajoute un morceau de texte, renvoie les (mot-clé, position absolue) nouvellement trouvés"""
+        text = self.buffer + chunk
+        seen = len(self.buffer)
+        matches = [
+            (self.groups[m.lastgroup], self.offset + m.start())
+            for m in self.pattern.finditer(text)
+            # Une occurrence entièrement dans la fin conservée a déjà été signalée
+            if m.end() > seen
+        ]
+        keep = min(self.overlap, len(text))
+        self.offset += len(text) - keep
+        self.buffer = text[len(text) - keep:]
+        return matches
+
+
+class VisibleTextParser(HTMLParser):
+    """Extrait le texte visible au fil du téléchargement, en majuscules et espaces normalisés.
+
+    Le texte produit est celui de " ".join(soup.get_text(separator=' ').upper().split()),
+    livré par morceaux à la fonction on_text.
+    """
+
+    HIDDEN_TAGS = {'script', 'style', 'template'}
+
+    def __init__(self, on_text):
+        super().__init__(convert_charrefs=True)
+        self.on_text = on_text
+        self.pending = []
+        self.hidden_depth = 0
+        self.started = False
+
+    def flush(self):
+        """Envoie le texte du nœud courant (il peut arriver en plusieurs handle_data)"""
+        if not self.pending:
+            return
+        words = ''.join(self.pending).upper().split()
+        self.pending = []
+        if words:
+            self.on_text((' ' if self.started else '') + ' '.join(words))
+            self.started = True
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag in self.HIDDEN_TAGS:
+            self.hidden_depth += 1
+
+    def handle_endtag(self, tag):
+        self.flush()
+        if tag in self.HIDDEN_TAGS and self.hidden_depth:
+            self.hidden_depth -= 1
+
+    def handle_data(self, data):
+        if not self.hidden_depth:
+            self.pending.append(data)
+
+    def handle_comment(self, data):
+        self.flush()
+
+    def handle_decl(self, decl):
+        self.flush()
+
+    def handle_pi(self, data):
+        self.flush()
+
+    def close(self):
+        super().close()
+        self.flush()
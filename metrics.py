@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Métriques au format texte Prometheus, sans dépendance externe.
+
+Compteurs, jauges et histogrammes à étiquettes, mis à jour depuis la boucle de
+monitoring (coût: un verrou et une addition) et rendus par l'endpoint /metrics.
+"""
+
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            items = list(self.values.items())
+        return self.header() + [f'{self.name}{format_labels(self.labelnames, k)} {format_value(v)}' for k, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self.lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self.values.items()]
+        lines = self.header()
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = format_labels(self.labelnames, key, [('le', format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.histogram(
+    'monitor_fetch_seconds', 'Durée de récupération d\'une page', ['target'])
+FETCH_BYTES = REGISTRY.counter(
+    'monitor_fetch_bytes_total', 'Octets téléchargés', ['target'])
+FETCH_DECODED_BYTES = REGISTRY.counter(
+    'monitor_fetch_decoded_bytes_total', 'Octets lus après décompression', ['target'])
+BANDWIDTH_USAGE = REGISTRY.gauge(
+    'monitor_bandwidth_window_bytes', 'Octets reçus sur la fenêtre du budget de bande passante', ['target'])
+POLL_STRETCH = REGISTRY.gauge(
+    'monitor_poll_stretch', "Allongement de l'intervalle dû au budget de bande passante", ['target'])
+HTTP_RESPONSES = REGISTRY.counter(
+    'monitor_http_responses_total', 'Réponses HTTP par code', ['target', 'code'])
+FETCH_ERRORS = REGISTRY.counter(
+    'monitor_fetch_errors_total', 'Échecs de récupération', ['target'])
+DETECT_SECONDS = REGISTRY.histogram(
+    'monitor_detect_seconds', 'Durée d\'analyse/détection d\'une page', ['target'])
+DEADLINE_EXCEEDED = REGISTRY.counter(
+    'monitor_deadline_exceeded_total', 'Vérifications abandonnées pour dépassement de délai', ['target'])
+CONSECUTIVE_FAILURES = REGISTRY.gauge(
+    'monitor_consecutive_failures', 'Échecs consécutifs', ['target'])
+LAST_SUCCESS = REGISTRY.gauge(
+    'monitor_last_success_timestamp_seconds', 'Heure (epoch) de la dernière vérification réussie', ['target'])
+TARGET_INTERVAL = REGISTRY.gauge(
+    'monitor_target_interval_seconds', 'Délai choisi avant la prochaine vérification', ['target'])
+CYCLE_SECONDS = REGISTRY.histogram(
+    'monitor_cycle_seconds', 'Durée d\'un cycle de vérification')
+LAST_CYCLE_SECONDS = REGISTRY.gauge(
+    'monitor_last_cycle_seconds', 'Durée du dernier cycle de vérification')
+CYCLE_PHASE_SECONDS = REGISTRY.histogram(
+    'monitor_cycle_phase_seconds', "Durée des phases d'un cycle (parse: cumul des détecteurs)", ['phase'])
+CYCLE_OVERRUNS = REGISTRY.counter(
+    'monitor_cycle_overruns_total', 'Cycles terminés après leur délai maximum (CYCLE_DEADLINE)')
+LOOP_LAG_SECONDS = REGISTRY.gauge(
+    'monitor_loop_lag_seconds', "Retard du dernier cycle sur l'échéance planifiée")
+HEARTBEAT = REGISTRY.gauge(
+    'monitor_heartbeat_timestamp_seconds', 'Heure (epoch) du dernier battement de cœur de la boucle')
+STUCK_WORKERS = REGISTRY.gauge(
+    'monitor_stuck_workers', 'Workers du pool encore occupés par une vérification hors délai')
+MONITOR_ALIVE = REGISTRY.gauge(
+    'monitor_alive', 'Boucle de monitoring vivante et à jour (chien de garde)')
+MONITOR_RESTARTS = REGISTRY.counter(
+    'monitor_restarts_total', 'Relances du monitoring par le chien de garde', ['reason'])
+NOTIFY_LATENCY = REGISTRY.histogram(
+    'monitor_notification_latency_seconds', 'Délai entre détection et accusé de réception Telegram',
+    ['target'], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300))
+NOTIFY_FAILURES = REGISTRY.counter(
+    'monitor_notification_failures_total', 'Notifications non livrées après tous les essais')
+LEASES_OWNED = REGISTRY.gauge(
+    'monitor_leases_owned', 'Sites dont ce worker détient le bail (mode réparti)')
+FETCH_CACHE_HITS = REGISTRY.counter(
+    'monitor_fetch_cache_hits_total', 'Récupérations (fetch) ou analyses (parse) évitées par le cache partagé', ['kind'])
+FETCH_CACHE_EVICTIONS = REGISTRY.counter(
+    'monitor_fetch_cache_evictions_total', 'Pages évincées du cache partagé (taille maximum atteinte)')
+NOTIFY_RECIPIENTS = REGISTRY.counter(
+    'monitor_notification_recipients_total', 'Alertes distribuées aux abonnés', ['target'])
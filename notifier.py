@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+File d'envoi des notifications Telegram en arrière-plan.
+
+La boucle de monitoring ne fait que déposer les alertes; un thread dédié les regroupe,
+respecte les limites de débit de Telegram, réessaie avec un backoff exponentiel
+et mesure le délai entre la détection et l'accusé de réception.
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+import http_client
+import metrics
+
+# Nombre d'essais par message et backoff entre deux essais (secondes)
+NOTIFY_MAX_RETRIES = int(os.getenv('NOTIFY_MAX_RETRIES', '10'))
+NOTIFY_BACKOFF_BASE = float(os.getenv('NOTIFY_BACKOFF_BASE', '1'))
+NOTIFY_BACKOFF_MAX = float(os.getenv('NOTIFY_BACKOFF_MAX', '60'))
+# Attente supplémentaire pour regrouper une rafale d'alertes (0 = seulement celles déjà en file)
+NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', '0'))
+# Limites Telegram: ~1 message/s par chat, ~30 messages/s au total
+TELEGRAM_CHAT_SPACING = float(os.getenv('TELEGRAM_CHAT_SPACING', '1'))
+TELEGRAM_GLOBAL_SPACING = float(os.getenv('TELEGRAM_GLOBAL_SPACING', str(1 / 30)))
+# Taille maximum d'un message Telegram
+TELEGRAM_MAX_LENGTH = 4096
+
+SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+# Balise (ouvrante ou fermante), entité, texte, ou "<"/"&" isolé d'un message HTML Telegram
+HTML_TOKEN = re.compile(r'<(/?)([a-zA-Z][\w-]*)[^>]*>|&#?\w+;|[^<&]+|[<&]')
+
+
+def closing_tags(tags):
+    return ''.join(f'</{tag}>' for tag in reversed(tags))
+
+
+def truncate_html(text, limit):
+    """Coupe un message HTML à limit caractères sans couper une balise ni une entité
+    (Telegram refuserait le message), puis referme les balises encore ouvertes"""
+    if len(text) <= limit:
+        return text
+    parts, stack, length = [], [], 0
+    for match in HTML_TOKEN.finditer(text):
+        token, closing, tag = match.group(), match.group(1), match.group(2)
+        tags = stack
+        if tag:
+            tag = tag.lower()
+            if not closing:
+                tags = stack + [tag]
+            elif stack and stack[-1] == tag:
+                tags = stack[:-1]
+        if length + len(token) + 1 + len(closing_tags(tags)) > limit:
+            if not tag and not token.startswith('&'):
+                # Texte: on garde ce qui tient avant "…" et les balises fermantes
+                room = limit - 1 - len(closing_tags(stack)) - length
+                parts.append(token[:max(0, room)])
+            break
+        parts.append(token)
+        length += len(token)
+        stack = tags
+    return ''.join(parts) + '…' + closing_tags(stack)
+
+
+
+class Alert:
+    """Une alerte à envoyer, avec l'heure de sa détection"""
+
+    def __init__(self, key, text, chat_id, detected_at, bot_token=None):
+        self.key = key
+        self.text = text
+        self.chat_id = chat_id
+        self.detected_at = detected_at
+        # Bot propre à l'abonné (None = bot par défaut)
+        self.bot_token = bot_token
+
+
+class Notifier:
+    """Envoie les alertes depuis un thread dédié (file, regroupement, débit, essais)"""
+
+    def __init__(self, bot_token, chat_id, send=None):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.send = send or http_client.send_telegram_message
+        self.queue = queue.Queue()
+        self.chat_next_send = {}
+        self.global_next_send = 0
+        # Dernières livraisons: délai détection → accusé de réception
+        self.deliveries = deque(maxlen=200)
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0}
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='notifier', daemon=True)
+            self.thread.start()
+
+    def submit(self, key, text, detected_at=None, chat_id=None, bot_token=None):
+        """Dépose une alerte dans la file (ne bloque jamais)"""
+        self.queue.put(Alert(key, text, chat_id or self.chat_id, detected_at or time.time(),
+                             bot_token or self.bot_token))
+
+    def flush(self, timeout=None):
+        """Attend que la file soit vide (à l'arrêt), au plus timeout secondes"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                # Un message par destinataire (bot, chat), regroupant ses alertes de la rafale
+                for bot_token, chat_id in dict.fromkeys((alert.bot_token, alert.chat_id) for alert in batch):
+                    alerts = [alert for alert in batch if (alert.bot_token, alert.chat_id) == (bot_token, chat_id)]
+                    for text, group in self.compose(alerts):
+                        self.deliver(chat_id, text, group)
+            except Exception as e:
+                logging.error("❌ Erreur d'envoi des notifications: %s", e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def next_batch(self):
+        """Attend une alerte puis prend celles qui suivent (rafale)"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + NOTIFY_COALESCE_WINDOW
+        while True:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def compose(self, alerts):
+        """Regroupe les alertes en messages de taille acceptable pour Telegram
+        (une alerte seule trop longue est tronquée)"""
+        messages, group, texts, length = [], [], [], 0
+        for alert in alerts:
+            text = alert.text
+            if len(text) > TELEGRAM_MAX_LENGTH:
+                text = truncate_html(text, TELEGRAM_MAX_LENGTH)
+            extra = len(text) + (len(SEPARATOR) if group else 0)
+            if group and length + extra > TELEGRAM_MAX_LENGTH:
+                messages.append((SEPARATOR.join(texts), group))
+                group, texts, length = [], [], 0
+                extra = len(text)
+            group.append(alert)
+            texts.append(text)
+            length += extra
+        if group:
+            messages.append((SEPARATOR.join(texts), group))
+        return messages
+
+    def wait_rate_limit(self, chat_id):
+        now = time.monotonic()
+        start = max(now, self.chat_next_send.get(chat_id, 0), self.global_next_send)
+        if start > now:
+            time.sleep(start - now)
+        self.chat_next_send[chat_id] = start + TELEGRAM_CHAT_SPACING
+        self.global_next_send = start + TELEGRAM_GLOBAL_SPACING
+
+    def retry_delay(self, error, attempt):
+        """Délai avant le prochain essai, None si l'erreur ne vaut pas la peine de réessayer"""
+        response = getattr(error, 'response', None)
+        if response is not None:
+            if response.status_code == 429:
+                try:
+                    return float(response.json()['parameters']['retry_after'])
+                except Exception:
+                    pass
+            elif 400 <= response.status_code < 500:
+                return None
+        return min(NOTIFY_BACKOFF_MAX, NOTIFY_BACKOFF_BASE * 2 ** (attempt - 1))
+
+    def deliver(self, chat_id, text, alerts):
+        """Envoie un message avec essais répétés; renvoie True si Telegram l'a accepté"""
+        keys = ', '.join(alert.key for alert in alerts)
+        last_error = None
+        for attempt in range(1, NOTIFY_MAX_RETRIES + 1):
+            self.wait_rate_limit(chat_id)
+            try:
+                self.send(alerts[0].bot_token, chat_id, text)
+            except Exception as e:
+                last_error = e
+                delay = self.retry_delay(e, attempt)
+                if delay is None or attempt == NOTIFY_MAX_RETRIES:
+                    break
+                self.stats['retries'] += 1
+                logging.warning("❌ Erreur Telegram (%s, essai %d/%d): %s - nouvel essai dans %.0fs",
+                                keys, attempt, NOTIFY_MAX_RETRIES, e, delay)
+                time.sleep(delay)
+                continue
+
+            delivered_at = time.time()
+            for alert in alerts:
+                latency = delivered_at - alert.detected_at
+                metrics.NOTIFY_LATENCY.observe(latency, target=alert.key)
+                self.deliveries.append({
+                    'key': alert.key,
+                    'chat_id': chat_id,
+                    'detected_at': alert.detected_at,
+                    'delivered_at': delivered_at,
+                    'latency': latency,
+                    'attempts': attempt,
+                })
+                logging.info("✅ Telegram envoyé! [%s] %.2fs après détection (%d essai(s))",
+                             alert.key, latency, attempt, extra={'target': alert.key, 'latency': latency})
+            self.stats['sent'] += 1
+            return True
+
+        self.stats['failed'] += 1
+        metrics.NOTIFY_FAILURES.inc(len(alerts))
+        logging.error("❌ Erreur Telegram: alerte(s) non livrée(s) [%s] après %d essai(s): %s", keys, attempt, last_error)
+        return False
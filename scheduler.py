@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Planificateur des vérifications: un tas (min-heap) des prochaines échéances, un intervalle par site,
+raccourci quand le site est dans un état "chaud" (ex. SOON, avant l'ouverture de la billetterie)
+et allongé avec un backoff exponentiel aléatoire après des erreurs, ou quand le site dépasse
+son budget de bande passante.
+Limite aussi le nombre de requêtes simultanées et leur cadence par hôte.
+"""
+
+import heapq
+import itertools
+import os
+import random
+import time
+
+# Intervalle (secondes) des sites dans un état chaud, sauf "hot_interval" propre au site
+HOT_INTERVAL = float(os.getenv('HOT_INTERVAL', '10'))
+# Délai maximum entre deux essais d'un site en erreur
+BACKOFF_MAX = float(os.getenv('BACKOFF_MAX', '3600'))
+# Politesse par hôte: requêtes simultanées et écart minimum entre deux requêtes
+HOST_MAX_CONCURRENCY = int(os.getenv('HOST_MAX_CONCURRENCY', '2'))
+HOST_MIN_SPACING = float(os.getenv('HOST_MIN_SPACING', '1'))
+
+
+class Scheduler:
+    """Échéances des sites dans un tas; pop_due() renvoie les sites à vérifier maintenant"""
+
+    def __init__(self, targets, host_concurrency=HOST_MAX_CONCURRENCY, host_spacing=HOST_MIN_SPACING,
+                 budget=None):
+        self.host_concurrency = host_concurrency
+        self.host_spacing = host_spacing
+        # Budget de bande passante (BandwidthBudget): intervalle allongé pour les sites hors budget
+        self.budget = budget
+        self.targets = {target.id: target for target in targets}
+        self.heap = []
+        self.counter = itertools.count()
+        # Échéance en vigueur par site (les entrées périmées du tas sont ignorées)
+        self.scheduled = {}
+        self.failures = {target_id: 0 for target_id in self.targets}
+        self.host_inflight = {}
+        self.host_next_start = {}
+        # Sites surveillés par ce processus (mode réparti: ceux dont il détient le bail)
+        self.active = set(self.targets)
+        # Retard du dernier pop_due() sur l'échéance la plus ancienne des sites renvoyés
+        self.lag = 0.0
+        now = time.monotonic()
+        for target_id in self.targets:
+            self.schedule(target_id, now)
+
+    def schedule(self, target_id, due):
+        if target_id not in self.active:
+            return
+        self.scheduled[target_id] = due
+        heapq.heappush(self.heap, (due, next(self.counter), target_id))
+
+    def assign(self, target_ids, now=None):
+        """Restreint la planification aux sites donnés; les nouveaux sont vérifiés tout de suite"""
+        now = time.monotonic() if now is None else now
+        target_ids = set(target_ids) & set(self.targets)
+        for target_id in self.active - target_ids:
+            # Les entrées du tas deviennent périmées (suppression paresseuse)
+            self.scheduled.pop(target_id, None)
+        added = target_ids - self.active
+        self.active = target_ids
+        for target_id in added:
+            self.failures[target_id] = 0
+            self.schedule(target_id, now)
+        return added
+
+    def pop_due(self, now=None):
+        """Retire du tas les sites arrivés à échéance, dans la limite de politesse par hôte"""
+        now = time.monotonic() if now is None else now
+        due, deferred = [], []
+        lag = 0.0
+        while self.heap and self.heap[0][0] <= now:
+            when, _, target_id = heapq.heappop(self.heap)
+            if self.scheduled.get(target_id) != when:
+                continue
+            target = self.targets[target_id]
+            host = target.host
+            next_start = self.host_next_start.get(host, 0)
+            if self.host_inflight.get(host, 0) >= self.host_concurrency or next_start > now:
+                # Hôte occupé: on repousse ce site au prochain créneau libre de l'hôte
+                deferred.append((target_id, max(next_start, now + self.host_spacing)))
+                continue
+            del self.scheduled[target_id]
+            self.host_inflight[host] = self.host_inflight.get(host, 0) + 1
+            self.host_next_start[host] = now + self.host_spacing
+            due.append(target)
+            lag = max(lag, now - when)
+        for target_id, when in deferred:
+            self.schedule(target_id, when)
+        if due:
+            self.lag = lag
+        return due
+
+    def interval_for(self, target, ok, state):
+        """Délai avant la prochaine vérification selon le résultat de celle-ci"""
+        if not ok:
+            self.failures[target.id] += 1
+            # Backoff à partir de l'intervalle en vigueur; dans un état chaud, jamais au-delà de
+            # l'intervalle normal (une erreur passagère ne doit pas faire rater l'ouverture)
+            cap = target.interval if target.detector.is_hot(state) else BACKOFF_MAX
+            delay = min(cap, self.polling_interval(target, state) * 2 ** self.failures[target.id])
+            # Backoff "equal jitter": entre la moitié et la totalité du délai
+            return random.uniform(delay / 2, delay)
+        self.failures[target.id] = 0
+        return self.polling_interval(target, state)
+
+    def polling_interval(self, target, state):
+        """Intervalle normal du site dans cet état (plus court dans un état chaud)"""
+        if target.detector.is_hot(state):
+            return min(target.interval, target.hot_interval or HOT_INTERVAL)
+        return target.interval
+
+    def complete(self, target, ok, state, started=None):
+        """Enregistre la fin d'une vérification et replanifie le site; renvoie le délai choisi"""
+        host = target.host
+        self.host_inflight[host] = max(0, self.host_inflight.get(host, 0) - 1)
+        delay = self.interval_for(target, ok, state)
+        if self.budget is not None:
+            delay *= self.budget.stretch(target.id)
+        started = time.monotonic() if started is None else started
+        self.schedule(target.id, started + delay)
+        return delay
+
+    def next_delay(self, now=None):
+        """Secondes avant la prochaine échéance"""
+        now = time.monotonic() if now is None else now
+        while self.heap and self.scheduled.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return HOT_INTERVAL
+        return max(0, self.heap[0][0] - now)
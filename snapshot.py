@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Photo de l'état publiée par le monitoring après chaque cycle.
+
+Le thread de monitoring construit une nouvelle photo (jamais modifiée ensuite) et remplace
+la référence d'un coup: le serveur web la lit sans verrou et sans risque de lecture à moitié
+à jour. La photo est aussi écrite sur disque (remplacement atomique) pour les autres
+processus du serveur web.
+"""
+
+import copy
+import json
+import os
+import time
+from types import MappingProxyType
+
+# Photo partagée entre les processus du serveur web
+SNAPSHOT_FILE = os.getenv('SNAPSHOT_FILE', 'status_snapshot.json')
+
+
+class StatusSnapshot:
+    """État de tous les sites à un instant donné, numéroté (version) et immuable"""
+
+    __slots__ = ('version', 'published_at', 'last_check', 'targets')
+
+    def __init__(self, version, published_at, last_check, targets):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'published_at', published_at)
+        object.__setattr__(self, 'last_check', last_check)
+        object.__setattr__(self, 'targets', tuple(MappingProxyType(dict(t)) for t in targets))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StatusSnapshot est immuable")
+
+    @classmethod
+    def build(cls, version, registry, states, last_check=None):
+        """Photo des sites du registre (appelé depuis le thread de monitoring)"""
+        targets = []
+        for target in registry:
+            state = copy.deepcopy(states.get(target.id))
+            label, css_class = target.detector.display(state)
+            targets.append({
+                'id': target.id,
+                'name': target.name,
+                'url': target.url,
+                'host': target.host,
+                'icon': target.icon,
+                'description': target.detector.describe(),
+                'state': state,
+                'label': label,
+                'css_class': css_class,
+            })
+        return cls(version, time.time(), last_check, targets)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'published_at': self.published_at,
+            'last_check': self.last_check,
+            'targets': [dict(t) for t in self.targets],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['version'], data['published_at'], data.get('last_check'), data['targets'])
+
+    def save(self, path=SNAPSHOT_FILE):
+        """Écrit la photo sur disque (fichier temporaire puis remplacement atomique)"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+
+class SnapshotFile:
+    """Relit la photo écrite par un autre processus, seulement quand le fichier a changé"""
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.mtime = None
+        self.snapshot = None
+
+    def get(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return self.snapshot
+        if mtime != self.mtime:
+            try:
+                with open(self.path) as f:
+                    self.snapshot = StatusSnapshot.from_dict(json.load(f))
+                self.mtime = mtime
+            except (OSError, ValueError, KeyError):
+                pass
+        return self.snapshot
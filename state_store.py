@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Persistance de l'état: SQLite en mode WAL (journal en ajout seul).
+
+On n'écrit que lorsqu'un état change (avec son historique horodaté),
+plus un point de contrôle périodique de l'heure de la dernière vérification.
+"""
+
+import json
+import sqlite3
+import threading
+import os
+import time
+
+# Base SQLite (WAL): état courant + historique des changements
+STATE_DB = os.getenv('STATE_DB', 'monitoring_state.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    target_id TEXT PRIMARY KEY,
+    state TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target_id TEXT NOT NULL,
+    old_state TEXT,
+    new_state TEXT,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_target ON history (target_id, at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class StateStore:
+    """État courant et historique des transitions par site"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM state').fetchone()[0] == 0
+
+    def load(self):
+        """Renvoie {target_id: état} (lecture de l'état courant, sans rejouer l'historique)"""
+        with self.lock:
+            rows = self.conn.execute('SELECT target_id, state FROM state').fetchall()
+        return {target_id: json.loads(state) for target_id, state in rows}
+
+    def record(self, target_id, old_state, new_state, at=None, compare=False):
+        """Enregistre un changement d'état (état courant + historique, une transaction).
+        Avec compare=True, seulement si l'état en base est encore old_state (plusieurs workers):
+        renvoie False si un autre processus a déjà appliqué un changement."""
+        at = at or time.time()
+        query = ('INSERT INTO state (target_id, state, updated_at) VALUES (?, ?, ?) '
+                 'ON CONFLICT(target_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at')
+        params = (target_id, json.dumps(new_state), at)
+        if compare:
+            query += ' WHERE state = ?'
+            params += (json.dumps(old_state),)
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN IMMEDIATE' if compare else 'BEGIN')
+                if self.conn.execute(query, params).rowcount == 0:
+                    return False
+                self.conn.execute(
+                    'INSERT INTO history (target_id, old_state, new_state, at) VALUES (?, ?, ?, ?)',
+                    (target_id, json.dumps(old_state), json.dumps(new_state), at))
+        return True
+
+    def checkpoint(self, last_check):
+        """Point de contrôle: heure de la dernière vérification et report du WAL dans la base"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('last_check', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (last_check,))
+            self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def last_check(self):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_check'").fetchone()
+        return row[0] if row else None
+
+    def history(self, target_id=None, limit=100):
+        """Dernières transitions, de la plus récente à la plus ancienne"""
+        query = 'SELECT target_id, old_state, new_state, at FROM history'
+        params = ()
+        if target_id:
+            query += ' WHERE target_id = ?'
+            params = (target_id,)
+        query += ' ORDER BY id DESC LIMIT ?'
+        with self.lock:
+            rows = self.conn.execute(query, params + (limit,)).fetchall()
+        return [
+            {'target_id': row[0], 'old_state': json.loads(row[1]), 'new_state': json.loads(row[2]), 'at': row[3]}
+            for row in rows
+        ]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Abonnements aux alertes: plusieurs chats Telegram, chacun abonné à ses sites et à ses statuts.
+
+Une détection produit un seul message, distribué à tous les abonnés concernés.
+Sans fichier, le chat TELEGRAM_CHAT_ID reçoit les alertes de tous les sites (comportement historique).
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE', 'subscriptions.json')
+
+
+class Subscription:
+    """Un chat abonné: sites (None = tous), statuts (None = toute alerte), bot propre optionnel"""
+
+    def __init__(self, chat_id, targets=None, statuses=None, bot_token=None, name=None):
+        self.chat_id = str(chat_id)
+        self.targets = set(targets) if targets else None
+        self.statuses = {s.upper().replace(' ', '_') for s in statuses} if statuses else None
+        self.bot_token = bot_token
+        self.name = name or self.chat_id
+
+    def accepts(self, statuses):
+        """L'alerte (statuts atteints) intéresse-t-elle cet abonné?"""
+        return self.statuses is None or bool(self.statuses & set(statuses))
+
+
+class SubscriptionRegistry:
+    """Abonnements indexés par site: trouver les destinataires d'une alerte ne parcourt que les concernés"""
+
+    def __init__(self, subscriptions):
+        self.subscriptions = list(subscriptions)
+        self.by_target = {}
+        self.all_targets = []
+        for subscription in self.subscriptions:
+            if subscription.targets is None:
+                self.all_targets.append(subscription)
+            else:
+                for target_id in subscription.targets:
+                    self.by_target.setdefault(target_id, []).append(subscription)
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    def matching(self, target_id, statuses):
+        """Abonnés à prévenir pour une alerte du site (un chat n'est prévenu qu'une fois)"""
+        recipients = {}
+        for subscription in self.by_target.get(target_id, []) + self.all_targets:
+            if subscription.accepts(statuses):
+                recipients.setdefault((subscription.bot_token, subscription.chat_id), subscription)
+        return list(recipients.values())
+
+
+def load_subscriptions(default_chat_id='', path=SUBSCRIPTIONS_FILE):
+    """Charge les abonnements (liste JSON), sinon un abonnement de default_chat_id à tous les sites"""
+    path = Path(path)
+    if path.exists():
+        with open(path, 'r') as f:
+            entries = json.load(f)
+        subscriptions = [Subscription(entry['chat_id'], entry.get('targets'), entry.get('statuses'),
+                                      entry.get('bot_token'), entry.get('name')) for entry in entries]
+        logging.info("%d abonnement(s) chargé(s) depuis %s", len(subscriptions), path)
+        return SubscriptionRegistry(subscriptions)
+    return SubscriptionRegistry([Subscription(default_chat_id)] if default_chat_id else [])
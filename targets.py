@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Registre des sites surveillés, chargé depuis un fichier JSON (TARGETS_FILE).
+
+Chaque site: un identifiant, une URL, un détecteur (type + paramètres),
+un intervalle de vérification (et "hot_interval" dans un état chaud)
+et un modèle de notification Telegram.
+Sans fichier, les deux sites historiques (Boudchart et Stade Toulousain) sont utilisés.
+"""
+
+import html
+import json
+import logging
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+
+from backends import build_backend
+from detectors import DETECTOR_TYPES
+
+TARGETS_FILE = os.getenv('TARGETS_FILE', 'targets.json')
+
+BOUDCHART_URL = "https://www.boudchart.com/"
+STADE_TOULOUSAIN_URL = os.getenv('STADE_TOULOUSAIN_URL', "https://billetterie.stadetoulousain.fr/fr/catalogue/match-rugby-stade-toulousain-montpellier-herault-rugby-club")
+
+# Longueur maximum du statut inséré dans un message (différences d'une région...): le modèle
+# et son lien restent dans la limite d'un message Telegram (4096 caractères)
+STATUS_MAX_LENGTH = 3000
+
+# Champs disponibles dans les modèles: {name}, {url}, {status}, {time} et les paramètres du détecteur
+DEFAULT_TEMPLATE = """🔔 <b>ALERTE {name}</b> 🔔
+
+<b>Nouveau statut:</b> {status}
+
+🔗 <a href='{url}'>Vérifier le site</a>
+
+---
+{time}"""
+
+DEFAULT_TARGETS = [
+    {
+        'id': 'boudchart',
+        'name': 'Boudchart',
+        'icon': '🎭',
+        'url': BOUDCHART_URL,
+        # Tableau complet de la tournée (une analyse, repli ville par ville), une règle par ville surveillée
+        'detector': {'type': 'tour_table', 'rules': [{'city': 'Casablanca', 'status': ['TICKETS']}]},
+        'template': """🎭 <b>ALERTE BOUDCHART</b> 🎭
+
+La tournée a changé !
+{status}
+
+🔗 <a href='{url}'>Vérifier le site</a>
+
+---
+{time}""",
+    },
+    {
+        'id': 'stade_toulousain',
+        'name': 'Stade Toulousain',
+        'icon': '🏉',
+        'url': STADE_TOULOUSAIN_URL,
+        'detector': {'type': 'phrase', 'phrase': 'PETIT COP STADE TOULOUSAIN'},
+        'template': """🏉 <b>ALERTE STADE TOULOUSAIN</b> 🏉
+
+<b>"{phrase}"</b> est maintenant disponible !
+
+Match: <b>Stade Toulousain vs Montpellier</b>
+
+🔗 <a href='{url}'>Réserver maintenant</a>
+
+---
+{time}""",
+    },
+]
+
+
+class Target:
+    """Un site surveillé et son détecteur"""
+
+    def __init__(self, id, name, url, detector, interval, deadline, template=None, icon='🔍',
+                 hot_interval=None, detector_key=None, backend=None, bandwidth_budget=None):
+        self.id = id
+        self.name = name
+        self.icon = icon
+        self.url = url
+        self.detector = detector
+        # Configuration du détecteur: deux sites de même URL et même clé partagent l'analyse
+        self.detector_key = detector_key or id
+        self.interval = interval
+        # Intervalle dans un état chaud (None = HOT_INTERVAL du planificateur)
+        self.hot_interval = hot_interval
+        self.deadline = deadline
+        self.template = template or DEFAULT_TEMPLATE
+        # Mode de récupération (page HTML par défaut, ou point d'accès JSON)
+        self.backend = backend or build_backend(None)
+        # Octets reçus autorisés sur la fenêtre BANDWIDTH_WINDOW (None = illimité)
+        self.bandwidth_budget = bandwidth_budget
+
+    @property
+    def host(self):
+        return urlparse(self.url).netloc
+
+    @property
+    def fetch_key(self):
+        """Clé de la requête: deux sites de même clé partagent la récupération"""
+        return self.backend.key(self.url)
+
+    def render(self, status, time):
+        """Construit le message de notification à partir du modèle"""
+        fields = dict(self.detector.params, name=self.name, url=self.url, status=status, time=time)
+        # Message en HTML (Telegram): le statut vient de la page (texte, valeurs JSON, villes)
+        # et doit être échappé, sinon Telegram refuse le message (400) et l'alerte est perdue
+        fields = {key: value if isinstance(value, (int, float)) else html.escape(str(value))
+                  for key, value in fields.items()}
+        if len(fields['status']) > STATUS_MAX_LENGTH:
+            cut = fields['status'][:STATUS_MAX_LENGTH - 1]
+            # Pas d'entité coupée en deux ("&am")
+            amp = cut.rfind('&')
+            if amp != -1 and ';' not in cut[amp:]:
+                cut = cut[:amp]
+            fields['status'] = cut + '…'
+        try:
+            return self.template.format(**fields)
+        except (KeyError, IndexError, ValueError) as e:
+            logging.error("[%s] Modèle de notification invalide (%s), modèle par défaut utilisé", self.name, e)
+            return DEFAULT_TEMPLATE.format(**fields)
+
+
+class TargetRegistry:
+    """Sites surveillés, dans l'ordre du fichier de configuration"""
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+        self.by_id = {}
+        # Rang de chaque site: les résultats d'un cycle sont appliqués dans cet ordre
+        self.positions = {target.id: position for position, target in enumerate(self.targets)}
+        for target in self.targets:
+            if target.id in self.by_id:
+                raise ValueError(f"Identifiant de site en double: {target.id}")
+            self.by_id[target.id] = target
+
+    def __iter__(self):
+        return iter(self.targets)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def get(self, target_id):
+        return self.by_id.get(target_id)
+
+    def ordered(self, targets):
+        """Sites donnés (par exemple ceux arrivés à échéance) dans l'ordre du registre"""
+        return sorted(targets, key=lambda target: self.positions[target.id])
+
+    def shared_urls(self):
+        """Requêtes (URL et mode de récupération) communes à plusieurs sites (faites une seule fois
+        via le cache partagé)"""
+        counts = {}
+        for target in self.targets:
+            counts[target.fetch_key] = counts.get(target.fetch_key, 0) + 1
+        return {url for url, count in counts.items() if count > 1}
+
+
+def build_target(entry, interval, deadline):
+    """Construit un Target à partir d'une entrée de configuration"""
+    params = dict(entry['detector'])
+    detector_type = params.pop('type')
+    if detector_type not in DETECTOR_TYPES:
+        raise ValueError(f"Type de détecteur inconnu pour '{entry['id']}': {detector_type}")
+    name = entry.get('name', entry['id'])
+    return Target(
+        id=entry['id'],
+        name=name,
+        url=entry['url'],
+        detector=DETECTOR_TYPES[detector_type](name, **params),
+        interval=entry.get('interval', interval),
+        deadline=entry.get('deadline', deadline),
+        template=entry.get('template'),
+        icon=entry.get('icon', '🔍'),
+        hot_interval=entry.get('hot_interval'),
+        detector_key=json.dumps(entry['detector'], sort_keys=True),
+        backend=build_backend(entry.get('fetch')),
+        bandwidth_budget=entry.get('bandwidth_budget'),
+    )
+
+
+def load_targets(interval, deadline, path=TARGETS_FILE):
+    """Charge le registre depuis le fichier JSON (liste de sites), sinon les sites par défaut"""
+    entries = DEFAULT_TARGETS
+    path = Path(path)
+    if path.exists():
+        with open(path, 'r') as f:
+            entries = json.load(f)
+        logging.info("%d site(s) chargé(s) depuis %s", len(entries), path)
+    return TargetRegistry(build_target(entry, interval, deadline) for entry in entries)
@@ -2,7 +2,7 @@
 """Script de test pour envoyer une notification Telegram"""
 
 import os
-import requests
+import http_client
 
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
@@ -12,8 +12,6 @@ def test_telegram():
         print("❌ Variables Telegram non configurées!")
         return
     
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    
     message = """🎭 <b>TEST - ALERTE BOUDCHART</b> 🎭
 
 Ceci est un message de TEST !
@@ -27,13 +25,7 @@ Le statut du spectacle de <b>Casablanca</b> a changé !
 ✅ Si vous recevez ce message, les notifications fonctionnent parfaitement !"""
     
     try:
-        response = requests.post(url, json={
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "HTML"
-        }, timeout=10)
-        
-        response.raise_for_status()
+        response = http_client.send_telegram_message(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message)
         print("✅ Message de test envoyé avec succès!")
         print(f"Response: {response.json()}")
     except Exception as e:
@@ -0,0 +1,46 @@
+"""
+Tests unitaires: python -m pytest (depuis la racine du dépôt).
+Les modules du moniteur sont à la racine; les logs ne vont que sur la console.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('LOG_FILE', '')
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import pytest
+
+
+@pytest.fixture
+def server():
+    """Serveur HTTP local des benchmarks (pages, ETag, téléchargements interrompus)"""
+    from stub_server import StubServer
+    stub = StubServer().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def make_monitor(tmp_path, monkeypatch):
+    """DualMonitor isolé (état dans tmp_path) surveillant les sites donnés (entrées de targets.json)"""
+    import boudchart_monitor
+    from targets import TargetRegistry, build_target
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(boudchart_monitor, 'STATE_DB', str(tmp_path / 'state.db'))
+    monkeypatch.setattr(boudchart_monitor, 'STATE_FILE', str(tmp_path / 'state.json'))
+    monitors = []
+
+    def make(entries):
+        registry = TargetRegistry(build_target(entry, 60, 20) for entry in entries)
+        monkeypatch.setattr(boudchart_monitor, 'load_targets', lambda interval, deadline: registry)
+        monitor = boudchart_monitor.DualMonitor()
+        monitors.append(monitor)
+        return monitor
+
+    yield make
+    for monitor in monitors:
+        monitor.executor.shutdown(wait=False)
+        monitor.store.conn.close()
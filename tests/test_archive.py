@@ -0,0 +1,68 @@
+"""Archive des pages: déduplication par contenu, index des captures et rejeu dans les détecteurs"""
+
+import argparse
+
+import pytest
+
+import targets
+from archive import PageArchive, replay_command
+from targets import TargetRegistry, build_target
+
+SOON = '<html><body><p>Bientôt</p></body></html>'
+OPEN = '<html><body><p>PETIT COP STADE TOULOUSAIN</p></body></html>'
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PageArchive(tmp_path / 'archive')
+    yield archive
+    archive.close()
+
+
+def test_identical_pages_stored_once(archive):
+    first = archive.record('stade', 'https://example.com/', SOON, at=1)
+    assert archive.record('stade', 'https://example.com/', SOON, at=2) == first
+    archive.record('stade', 'https://example.com/', OPEN, at=3)
+    archive.record('autre', 'https://example.org/', SOON, at=4)
+    stats = archive.stats()
+    assert (stats['captures'], stats['pages']) == (4, 2)
+    assert stats['targets'] == {'stade': {'captures': 3, 'pages': 2}, 'autre': {'captures': 1, 'pages': 1}}
+    assert stats['raw_bytes'] == len(SOON.encode()) + len(OPEN.encode())
+
+
+def test_index_filters_by_target_and_period(archive):
+    for at, (target_id, html) in enumerate([('stade', SOON), ('autre', OPEN), ('stade', OPEN)], 1):
+        archive.record(target_id, 'https://example.com/', html, at=at * 100)
+    assert [row[:2] for row in archive.captures('stade')] == [('stade', 100), ('stade', 300)]
+    assert [row[:2] for row in archive.captures(since=200)] == [('autre', 200), ('stade', 300)]
+    assert [row[:2] for row in archive.captures(until=200)] == [('stade', 100)]
+
+
+def test_replay_in_chronological_order_after_reopening(tmp_path):
+    archive = PageArchive(tmp_path / 'archive')
+    archive.record('stade', 'https://example.com/', OPEN, at=2)
+    archive.close()
+    # Nouvelle exécution: l'archive continue en ajout
+    archive = PageArchive(tmp_path / 'archive')
+    archive.record('stade', 'https://example.com/', SOON, at=1)
+    archive.record('stade', 'https://example.com/', OPEN, at=3)
+    assert [(at, html) for _, at, _, html in archive.replay('stade')] == [(1, SOON), (2, OPEN), (3, OPEN)]
+    archive.close()
+
+
+def test_empty_archive_replays_nothing(archive):
+    assert list(archive.replay()) == []
+
+
+def test_replay_command_runs_current_detectors(archive, monkeypatch, capsys):
+    registry = TargetRegistry([build_target({'id': 'stade', 'url': 'https://example.com/',
+                                             'detector': {'type': 'phrase', 'phrase': 'PETIT COP STADE TOULOUSAIN'}},
+                                            60, 20)])
+    monkeypatch.setattr(targets, 'load_targets', lambda interval, deadline: registry)
+    for at, html in enumerate([SOON, SOON, OPEN, OPEN], 1):
+        archive.record('stade', 'https://example.com/', html, at=at)
+    archive.record('inconnu', 'https://example.org/', OPEN, at=5)
+    replay_command(archive, argparse.Namespace(target=None, since=None, until=None, changes=True))
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert len(lines) == 1
+    assert 'stade' in lines[0] and '🔔' in lines[0]
@@ -0,0 +1,87 @@
+"""Budgets de bande passante (fenêtre glissante) et lecture bornée du corps des réponses"""
+
+import pytest
+
+from bandwidth import TOTAL, BandwidthBudget
+from http_client import ResponseTooLarge, iter_body, wire_bytes
+
+
+def test_usage_over_sliding_window():
+    budget = BandwidthBudget(window=60)
+    budget.record('a', 100, now=0)
+    budget.record('a', 50, now=30)
+    budget.record('b', 10, now=30)
+    assert budget.usage('a', now=59) == 150
+    assert budget.usage(TOTAL, now=59) == 160
+    # Le premier échantillon sort de la fenêtre
+    assert budget.usage('a', now=60) == 50
+    assert budget.usage(TOTAL, now=90) == 0
+
+
+def test_stretch_in_proportion_to_overrun():
+    budget = BandwidthBudget({'a': 100, 'b': None}, total=0, window=60, max_stretch=8)
+    assert budget.budgets == {'a': 100}
+    budget.record('a', 50, now=0)
+    assert budget.stretch('a', now=1) == 1
+    budget.record('a', 250, now=1)
+    assert budget.stretch('a', now=2) == 3
+    budget.record('a', 10000, now=2)
+    assert budget.stretch('a', now=3) == 8
+    # Site sans budget, pas de budget total: jamais espacé
+    budget.record('b', 10 ** 6, now=3)
+    assert budget.stretch('b', now=4) == 1
+    # Fenêtre écoulée: de nouveau dans le budget
+    assert budget.stretch('a', now=100) == 1
+    assert 'a' not in budget.over
+
+
+def test_total_budget_stretches_every_target():
+    budget = BandwidthBudget({}, total=100, window=60)
+    budget.record('a', 150, now=0)
+    budget.record('b', 50, now=0)
+    assert budget.stretch('b', now=1) == 2
+
+
+def test_report():
+    budget = BandwidthBudget({'a': 100}, total=1000, window=60)
+    budget.record('a', 200, now=0)
+    assert budget.report(now=1) == {
+        'a': {'bytes': 200, 'budget': 100, 'stretch': 2.0},
+        TOTAL: {'bytes': 200, 'budget': 1000, 'stretch': 1.0},
+    }
+
+
+class FakeResponse:
+    def __init__(self, chunks, headers=None):
+        self.chunks = chunks
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+
+def test_iter_body_yields_chunks_under_limit():
+    assert list(iter_body(FakeResponse([b'ab', b'cd']), max_bytes=4)) == [b'ab', b'cd']
+    assert list(iter_body(FakeResponse([b'ab'] * 10), max_bytes=0)) == [b'ab'] * 10
+
+
+def test_iter_body_rejects_declared_length():
+    with pytest.raises(ResponseTooLarge):
+        next(iter_body(FakeResponse([b'ab'], {'Content-Length': '100'}), max_bytes=10))
+
+
+def test_iter_body_stops_when_limit_exceeded():
+    chunks = iter_body(FakeResponse([b'abc', b'def', b'ghi']), max_bytes=5)
+    assert next(chunks) == b'abc'
+    with pytest.raises(ResponseTooLarge):
+        next(chunks)
+
+
+def test_wire_bytes():
+    class Raw:
+        def tell(self):
+            return 42
+    response = FakeResponse([])
+    assert wire_bytes(response) is None
+    response.raw = Raw()
+    assert wire_bytes(response) == 42
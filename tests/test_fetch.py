@@ -0,0 +1,95 @@
+"""Récupération des pages: requêtes conditionnelles, contenu identique, streaming interrompu"""
+
+import pytest
+
+from boudchart_monitor import UNCHANGED
+
+PHRASE = 'PETIT COP STADE TOULOUSAIN'
+SOON = '<html><body><p>Bientôt</p></body></html>'
+# Phrase en fin de page: un téléchargement interrompu ne la voit pas
+OPEN = '<html><body>' + '<p>Billetterie</p>' * 500 + f'<p>{PHRASE}</p></body></html>'
+
+
+@pytest.fixture
+def page(server):
+    content = {'html': SOON}
+    server.add_page('/match', lambda: content['html'], validators=True)
+    return content
+
+
+@pytest.fixture
+def monitor(make_monitor, server, page):
+    return make_monitor([{'id': 'stade', 'url': server.url('/match'),
+                          'detector': {'type': 'phrase', 'phrase': PHRASE}}])
+
+
+def check(monitor):
+    return monitor.fetch_and_check(monitor.registry.get('stade'))[:2]
+
+
+def test_interrupted_stream_does_not_keep_validators(monitor, server, page):
+    assert check(monitor) == (True, False)
+    page['html'] = OPEN
+    server.truncate['/match'] = 100
+    assert check(monitor) == (False, None)
+    del server.truncate['/match']
+    # Pas de 304 sur l'ETag de la page jamais lue en entier: la phrase est trouvée
+    assert check(monitor) == (True, True)
+
+
+def test_conditional_headers_sent_and_304_reuses_result(monitor, server, page):
+    assert check(monitor) == (True, False)
+    assert check(monitor) == (True, False)
+    first, second = server.request_headers['/match']
+    assert 'If-None-Match' not in first
+    assert second['If-None-Match'] == monitor.http_cache['stade']['etag']
+    assert second['If-Modified-Since'] == monitor.http_cache['stade']['last_modified']
+    # Réponse 304: le détecteur n'est pas relancé
+    target = monitor.registry.get('stade')
+    fed = []
+    make_stream = target.detector.stream
+
+    def stream():
+        detector = make_stream()
+        feed = detector.feed
+        detector.feed = lambda chunk: fed.append(chunk) or feed(chunk)
+        return detector
+    target.detector.stream = stream
+    assert check(monitor) == (True, False)
+    assert fed == []
+
+
+def test_not_modified_page_returns_unchanged(monitor, server, page):
+    url = server.url('/match')
+    assert monitor.fetch_page(url, cache_key='full') == SOON
+    assert monitor.fetch_page(url, cache_key='full') is UNCHANGED
+    assert server.request_headers['/match'][1]['If-None-Match'] == monitor.http_cache['full']['etag']
+    # Nouvelle version: ETag différent, page renvoyée en entier
+    page['html'] = OPEN
+    assert monitor.fetch_page(url, cache_key='full') == OPEN
+
+
+def test_identical_body_without_validators_is_not_analysed(make_monitor, server):
+    server.add_page('/plain', SOON)
+    monitor = make_monitor([{'id': 'plain', 'url': server.url('/plain'),
+                             'detector': {'type': 'phrase', 'phrase': PHRASE}}])
+    target = monitor.registry.get('plain')
+    # Page lue entière (pas de streaming): l'empreinte du corps remplace l'ETag absent
+    target.detector.stream = lambda: None
+    assert monitor.fetch_page(target.url, cache_key='plain') == SOON
+    assert monitor.fetch_page(target.url, cache_key='plain') is UNCHANGED
+    assert 'If-None-Match' not in server.request_headers['/plain'][1]
+
+
+def test_identical_body_reuses_last_result(make_monitor, server):
+    server.add_page('/plain', SOON)
+    monitor = make_monitor([{'id': 'plain', 'url': server.url('/plain'),
+                             'detector': {'type': 'phrase', 'phrase': PHRASE}}])
+    target = monitor.registry.get('plain')
+    target.detector.stream = lambda: None
+    calls = []
+    detector_check = target.detector.check
+    target.detector.check = lambda html: calls.append(html) or detector_check(html)
+    assert monitor.fetch_and_check(target)[:2] == (True, False)
+    assert monitor.fetch_and_check(target)[:2] == (True, False)
+    assert calls == [SOON]
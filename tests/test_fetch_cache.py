@@ -0,0 +1,109 @@
+"""Cache partagé des récupérations: TTL, âge maximum par appelant, éviction LRU, analyse unique"""
+
+import threading
+import time
+
+import pytest
+
+import fetch_cache
+from fetch_cache import FetchCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(fetch_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def fetcher(pages):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        return pages.get(url, 'x' * 10)
+    return calls, fetch
+
+
+def test_entry_reused_until_ttl(clock):
+    cache = FetchCache(ttl=30, max_bytes=1000)
+    calls, fetch = fetcher({})
+    first = cache.get('a', lambda: fetch('a'))
+    clock[0] += 29
+    assert cache.get('a', lambda: fetch('a')) is first
+    clock[0] += 1
+    assert cache.get('a', lambda: fetch('a')) is not first
+    assert calls == ['a', 'a']
+
+
+def test_max_age_is_per_caller(clock):
+    cache = FetchCache(ttl=30, max_bytes=1000)
+    calls, fetch = fetcher({})
+    cache.get('a', lambda: fetch('a'))
+    clock[0] += 10
+    # Site lent: la page de 10s convient; site rapide: elle est trop vieille
+    cache.get('a', lambda: fetch('a'), max_age=60)
+    assert calls == ['a']
+    cache.get('a', lambda: fetch('a'), max_age=5)
+    assert calls == ['a', 'a']
+
+
+def test_least_recently_used_evicted_over_size(clock):
+    cache = FetchCache(ttl=30, max_bytes=25)
+    calls, fetch = fetcher({})
+    cache.get('a', lambda: fetch('a'))
+    cache.get('b', lambda: fetch('b'))
+    cache.get('a', lambda: fetch('a'))
+    cache.get('c', lambda: fetch('c'))
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.stats() == {'urls': 2, 'bytes': 20}
+
+
+def test_oversized_page_kept_alone(clock):
+    cache = FetchCache(ttl=30, max_bytes=25)
+    calls, fetch = fetcher({'big': 'x' * 100})
+    cache.get('a', lambda: fetch('a'))
+    cache.get('big', lambda: fetch('big'))
+    assert list(cache.entries) == ['big']
+
+
+def test_concurrent_callers_fetch_once():
+    cache = FetchCache(ttl=30, max_bytes=1000)
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'page'
+    entries = []
+    threads = [threading.Thread(target=lambda: entries.append(cache.get('a', slow_fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(entry is entries[0] for entry in entries)
+
+
+def test_result_computed_once_per_detector_key(clock):
+    cache = FetchCache(ttl=30, max_bytes=1000)
+    entry = cache.get('a', lambda: 'page')
+    checks = []
+
+    def check(page):
+        checks.append(page)
+        return len(page)
+    assert entry.result('k1', check) == 4
+    assert entry.result('k1', check) == 4
+    assert entry.result('k2', check) == 4
+    assert checks == ['page', 'page']
+
+
+def test_version_read_after_fetch(clock):
+    cache = FetchCache(ttl=30, max_bytes=1000)
+    current = {'hash': None}
+
+    def fetch():
+        current['hash'] = 'v1'
+        return 'page'
+    assert cache.get('a', fetch, version=lambda: current['hash']).version == 'v1'
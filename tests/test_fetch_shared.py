@@ -0,0 +1,70 @@
+"""URL partagée par des sites vérifiés à des rythmes différents (cache de récupération commun)"""
+
+import pytest
+
+SOON = '<html><body><p>Bientôt</p></body></html>'
+OPEN = '<html><body><p>BILLETTERIE OUVERTE</p></body></html>'
+
+
+@pytest.fixture
+def shared_monitor(make_monitor, server):
+    page = {'html': SOON}
+    server.add_page('/tour', lambda: page['html'])
+
+    def make(intervals):
+        monitor = make_monitor([{'id': target_id, 'url': server.url('/tour'), 'interval': interval,
+                                 'detector': {'type': 'phrase', 'phrase': 'BILLETTERIE OUVERTE'}}
+                                for target_id, interval in intervals.items()])
+        # Pas de réutilisation par âge: chaque vérification interroge le serveur (réponse identique = UNCHANGED)
+        monitor.fetch_cache.ttl = 0
+        return monitor, page
+    return make
+
+
+def check(monitor, target_id):
+    return monitor.fetch_and_check(monitor.registry.get(target_id))
+
+
+def test_slow_target_sees_change_made_between_its_checks(shared_monitor):
+    monitor, page = shared_monitor({'fast': 10, 'slow': 600})
+    assert check(monitor, 'fast')[:2] == (True, False)
+    assert check(monitor, 'slow')[:2] == (True, False)
+
+    page['html'] = OPEN
+    assert check(monitor, 'fast')[:2] == (True, True)
+    # Le serveur renvoie la même page que pour "fast": UNCHANGED, mais "slow" n'a pas vu cette version
+    assert check(monitor, 'slow')[:2] == (True, True)
+
+
+def test_target_without_result_uses_last_shared_page(shared_monitor):
+    monitor, page = shared_monitor({'fast': 10, 'late': 600})
+    page['html'] = OPEN
+    check(monitor, 'fast')
+    check(monitor, 'fast')
+    assert check(monitor, 'late')[:2] == (True, True)
+
+
+def test_unchanged_page_is_not_analysed_again(shared_monitor, server):
+    monitor, page = shared_monitor({'fast': 10, 'slow': 600})
+    calls = []
+    for target in monitor.registry:
+        detector_check = target.detector.check
+        target.detector.check = lambda html, check=detector_check: calls.append(1) or check(html)
+    check(monitor, 'fast')
+    check(monitor, 'slow')
+    requests = server.requests
+    calls.clear()
+    for _ in range(3):
+        check(monitor, 'fast')
+        check(monitor, 'slow')
+    # Chaque site a analysé la version courante: les réponses identiques ne relancent rien
+    assert calls == []
+    assert server.requests - requests == 6
+
+
+def test_shared_pages_stay_within_cache_budget(shared_monitor):
+    monitor, page = shared_monitor({'fast': 10, 'slow': 600})
+    check(monitor, 'fast')
+    check(monitor, 'slow')
+    # Les pages ne sont gardées que par le cache (borné par FETCH_CACHE_MAX_BYTES); chaque site garde une empreinte
+    assert monitor.http_cache['slow']['version'] == monitor.http_cache[monitor.registry.get('slow').fetch_key]['hash']
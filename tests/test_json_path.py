@@ -0,0 +1,69 @@
+"""Expressions JSONPath (sous-ensemble) utilisées par le mode de récupération JSON"""
+
+import pytest
+
+from json_path import JsonPath
+
+DOCUMENT = {
+    'event': {'status': 'SOON', 'name': 'Tournée'},
+    'offers': [
+        {'name': 'Tribune', 'price': 30, 'available': False},
+        {'name': 'Petit Cop', 'price': 15, 'available': True, 'meta': {'tag': 'kop'}},
+        {'name': 'Loge', 'price': 'sur demande', 'available': True},
+    ],
+    'odd key': {'with-dash': 1},
+}
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('$.event.status', 'SOON'),
+    ('$.offers[0].price', 30),
+    ('$.offers[-1].name', 'Loge'),
+    ("$['odd key']['with-dash']", 1),
+    ('$["odd key"].with-dash', 1),
+    ('$.event.missing', None),
+    ('$.offers[5].name', None),
+    ('$.event[0]', None),
+])
+def test_single_value(expression, expected):
+    assert JsonPath(expression).value(DOCUMENT) == expected
+
+
+def test_root_is_the_document():
+    assert JsonPath('$').value(DOCUMENT) is DOCUMENT
+
+
+def test_wildcards_return_lists():
+    assert JsonPath('$.offers[*].name').value(DOCUMENT) == ['Tribune', 'Petit Cop', 'Loge']
+    assert JsonPath('$.event.*').value(DOCUMENT) == ['SOON', 'Tournée']
+    assert JsonPath('$.event.missing[*]').value(DOCUMENT) == []
+
+
+def test_recursive_descent_in_document_order():
+    assert JsonPath('$..available').value(DOCUMENT) == [False, True, True]
+    assert JsonPath('$..tag').value(DOCUMENT) == ['kop']
+    assert JsonPath('$..meta.*').value(DOCUMENT) == ['kop']
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ("$.offers[?(@.name == 'Petit Cop')].available", [True]),
+    ('$.offers[?(@.name != "Tribune")].name', ['Petit Cop', 'Loge']),
+    ('$.offers[?(@.price < 20)].name', ['Petit Cop']),
+    ('$.offers[?(@.price >= 15)].name', ['Tribune', 'Petit Cop']),
+    ('$.offers[?(@.available == true)].name', ['Petit Cop', 'Loge']),
+    ('$.offers[?(@.available)].name', ['Petit Cop', 'Loge']),
+    ("$.offers[?(@.meta.tag == 'kop')].price", [15]),
+])
+def test_filters(expression, expected):
+    assert JsonPath(expression).value(DOCUMENT) == expected
+
+
+def test_filter_type_mismatch_does_not_match():
+    # 'sur demande' < 20 est impossible: l'élément est ignoré, pas d'exception
+    assert JsonPath('$.offers[?(@.price <= 30)].name').value(DOCUMENT) == ['Tribune', 'Petit Cop']
+
+
+@pytest.mark.parametrize('expression', ['event.status', '$.offers[', '$.offers[?(@.price ~ 3)]', '$ .event'])
+def test_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        JsonPath(expression)
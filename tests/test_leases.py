@@ -0,0 +1,79 @@
+import pytest
+
+from leases import LeaseManager, rank
+from state_store import StateStore
+
+TARGETS = [f'site{i}' for i in range(20)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return tmp_path / 'state.db'
+
+
+def preferred(owners, target_id):
+    return max(owners, key=lambda owner: rank(owner, target_id))
+
+
+def test_single_worker_takes_every_target(db):
+    a = LeaseManager(db, owner='a', ttl=60)
+    assert a.refresh(TARGETS, now=1000) == set(TARGETS)
+
+
+def test_two_workers_split_targets_by_rendezvous_hashing(db):
+    a = LeaseManager(db, owner='a', ttl=60)
+    b = LeaseManager(db, owner='b', ttl=60)
+    a.refresh(TARGETS, now=1000)
+    b.refresh(TARGETS, now=1001)
+    # a cède les sites préférés par b, que b prend au passage suivant
+    owned_a = a.refresh(TARGETS, now=1002)
+    owned_b = b.refresh(TARGETS, now=1003)
+    assert owned_a | owned_b == set(TARGETS)
+    assert not owned_a & owned_b
+    assert owned_b == {t for t in TARGETS if preferred(['a', 'b'], t) == 'b'}
+    assert set(a.assignments(now=1004).items()) == {(t, preferred(['a', 'b'], t)) for t in TARGETS}
+
+
+def test_lease_is_not_taken_while_held(db):
+    a = LeaseManager(db, owner='a', ttl=60)
+    b = LeaseManager(db, owner='b', ttl=60)
+    a.refresh(TARGETS, now=1000)
+    # b vient d'arriver: les baux de a sont encore valides, b ne prend rien
+    assert b.refresh(TARGETS, now=1001) == set()
+
+
+def test_expired_leases_are_taken_over(db):
+    a = LeaseManager(db, owner='a', ttl=60)
+    b = LeaseManager(db, owner='b', ttl=60)
+    a.refresh(TARGETS, now=1000)
+    b.refresh(TARGETS, now=1001)
+    # a ne renouvelle plus: après expiration de ses baux et de sa présence, b reprend tout
+    assert b.refresh(TARGETS, now=1061) == set(TARGETS)
+
+
+def test_release_all_hands_targets_over_immediately(db):
+    a = LeaseManager(db, owner='a', ttl=60)
+    b = LeaseManager(db, owner='b', ttl=60)
+    a.refresh(TARGETS, now=1000)
+    b.refresh(TARGETS, now=1001)
+    a.release_all()
+    assert b.refresh(TARGETS, now=1002) == set(TARGETS)
+    assert a.owned == set()
+
+
+def test_record_compare_and_swap(db):
+    first, second = StateStore(db), StateStore(db)
+    assert first.record('boudchart', None, 'SOON', at=1, compare=True)
+    # Un second worker qui a vu le même ancien état ne réapplique pas le changement
+    assert not second.record('boudchart', None, 'SOON', at=2, compare=True)
+    assert second.record('boudchart', 'SOON', 'TICKETS', at=3, compare=True)
+    assert not first.record('boudchart', 'SOON', 'TICKETS', at=4, compare=True)
+    assert first.load() == {'boudchart': 'TICKETS'}
+    assert [(h['old_state'], h['new_state']) for h in first.history('boudchart')] == [('SOON', 'TICKETS'), (None, 'SOON')]
+
+
+def test_record_without_compare_always_applies(db):
+    store = StateStore(db)
+    store.record('site', None, {'value': 1}, at=1)
+    assert store.record('site', {'value': 0}, {'value': 2}, at=2)
+    assert store.load() == {'site': {'value': 2}}
@@ -0,0 +1,12 @@
+import log_config
+
+
+def test_single_process_keeps_the_log_file(monkeypatch):
+    monkeypatch.setattr(log_config, 'WEB_WORKERS', 1)
+    assert log_config.log_path('monitoring.log', pid=42) == 'monitoring.log'
+
+
+def test_each_worker_rotates_its_own_file(monkeypatch):
+    monkeypatch.setattr(log_config, 'WEB_WORKERS', 4)
+    assert log_config.log_path('monitoring.log', pid=42) == 'monitoring.42.log'
+    assert log_config.log_path('logs/app', pid=42) == 'logs/app.42.log'
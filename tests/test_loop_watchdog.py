@@ -0,0 +1,73 @@
+"""Santé de la boucle: vivacité (battement de cœur) et fraîcheur des vérifications par site"""
+
+import threading
+
+import pytest
+
+import loop_watchdog
+from loop_watchdog import LoopHeartbeat, Watchdog
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(loop_watchdog.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(loop_watchdog, 'FRESHNESS_FACTOR', 3)
+    return now
+
+
+class FakeMonitor:
+    def __init__(self, heartbeat):
+        self.heartbeat = heartbeat
+
+
+def health(heartbeat):
+    watchdog = Watchdog(lambda: None, lambda: FakeMonitor(heartbeat), grace=60, path='')
+    watchdog.thread = threading.current_thread()
+    watchdog.launched_at = loop_watchdog.time.monotonic()
+    return watchdog.health()
+
+
+def test_fresh_targets_are_ok(clock):
+    heartbeat = LoopHeartbeat(60, 90, 4)
+    heartbeat.watch({'a': 10, 'b': 600})
+    heartbeat.sleeping(1000)
+    clock[0] += 25
+    heartbeat.checked('a', True)
+    assert health(heartbeat)['status'] == 'ok'
+
+
+def test_one_failing_target_degrades(clock):
+    heartbeat = LoopHeartbeat(60, 90, 4)
+    heartbeat.watch({'a': 10, 'b': 600})
+    heartbeat.sleeping(1000)
+    clock[0] += 31
+    heartbeat.checked('a', False)
+    status = health(heartbeat)
+    assert status['status'] == 'degraded'
+    assert status['stale_targets'] == ['a']
+
+
+def test_every_target_failing_is_stale(clock):
+    heartbeat = LoopHeartbeat(60, 90, 4)
+    heartbeat.watch({'a': 10, 'b': 20})
+    heartbeat.sleeping(1000)
+    clock[0] += 61
+    heartbeat.checked('a', False)
+    heartbeat.checked('b', False)
+    status = health(heartbeat)
+    assert status['status'] == 'stale'
+    assert status['stale_targets'] == ['a', 'b']
+    # Une vérification réussie: de nouveau à jour pour ce site
+    heartbeat.checked('b', True)
+    assert health(heartbeat)['status'] == 'degraded'
+
+
+def test_watch_keeps_history_and_forgets_lost_targets(clock):
+    heartbeat = LoopHeartbeat(60, 90, 4)
+    heartbeat.watch({'a': 10, 'b': 10})
+    heartbeat.sleeping(1000)
+    clock[0] += 31
+    # Site cédé à un autre worker: plus suivi; site gardé: pas de nouveau délai
+    heartbeat.watch({'a': 10})
+    assert health(heartbeat)['stale_targets'] == ['a']
@@ -0,0 +1,69 @@
+"""Recherche de mots-clés en streaming et extraction du texte visible"""
+
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+import metrics
+from matcher import KeywordMatcher, VisibleTextParser
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'samples')
+
+
+def test_scan_returns_configured_keywords_longest_first():
+    matcher = KeywordMatcher(['Sold', 'SOLD OUT', 'tickets'])
+    assert matcher.scan('sold out, puis Tickets, puis sold') == [('SOLD OUT', 0), ('tickets', 15), ('Sold', 29)]
+
+
+def test_case_insensitive_match_outside_ascii():
+    # Signe kelvin: correspond à "K" (insensible à la casse) mais reste "K" (U+212A) en majuscules
+    matcher = KeywordMatcher(['TICKETS'])
+    assert matcher.scan('TICKETS') == [('TICKETS', 0)]
+    assert matcher.feed('TICK') == []
+    assert matcher.feed('ETS') == [('TICKETS', 0)]
+
+
+@pytest.mark.parametrize('split', range(1, 30))
+def test_match_split_across_chunks_reported_once(split):
+    text = 'xx PETIT COP STADE TOULOUSAIN yy'
+    matcher = KeywordMatcher(['petit cop stade toulousain'])
+    found = matcher.feed(text[:split]) + matcher.feed(text[split:]) + matcher.feed(' fin')
+    assert found == [('petit cop stade toulousain', 3)]
+
+
+def test_positions_are_absolute_over_many_chunks():
+    matcher = KeywordMatcher(['SOON'])
+    found = []
+    for chunk in ['abc', 'SO', 'ON---', '-' * 50, 'soon']:
+        found += matcher.feed(chunk)
+    assert found == [('SOON', 3), ('SOON', 60)]
+
+
+def visible_text(html, chunk_size):
+    parts = []
+    parser = VisibleTextParser(parts.append)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+    parser.close()
+    return ''.join(parts)
+
+
+@pytest.mark.parametrize('sample', sorted(os.listdir(SAMPLES_DIR)))
+@pytest.mark.parametrize('chunk_size', [7, 4096])
+def test_visible_text_matches_beautifulsoup(sample, chunk_size):
+    with open(os.path.join(SAMPLES_DIR, sample), encoding='utf-8') as f:
+        html = f.read()
+    # Texte de l'ancienne analyse (BeautifulSoup ignore le contenu des script/style/template)
+    expected = ' '.join(BeautifulSoup(html, 'html.parser').get_text(separator=' ').upper().split())
+    assert visible_text(html, chunk_size) == expected
+
+
+def test_stream_stops_download_once_phrase_found(make_monitor, server):
+    html = '<html><body><p>PETIT COP STADE TOULOUSAIN</p>' + '<p>remplissage</p>' * 100000 + '</body></html>'
+    server.add_page('/match', html)
+    monitor = make_monitor([{'id': 'early', 'url': server.url('/match'),
+                             'detector': {'type': 'phrase', 'phrase': 'PETIT COP STADE TOULOUSAIN'}}])
+    assert monitor.fetch_and_check(monitor.registry.get('early'))[:2] == (True, True)
+    decoded = metrics.FETCH_DECODED_BYTES.values[('early',)]
+    assert decoded < len(html) / 10
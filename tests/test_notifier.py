@@ -0,0 +1,71 @@
+from notifier import SEPARATOR, TELEGRAM_MAX_LENGTH, Alert, Notifier, truncate_html
+from targets import build_target
+
+
+def alerts(*lengths):
+    return [Alert(f'site{i}', str(i % 10) * length, 'chat', 0) for i, length in enumerate(lengths)]
+
+
+def compose(*lengths):
+    return Notifier('token', 'chat', send=lambda *args: None).compose(alerts(*lengths))
+
+
+def test_small_alerts_are_grouped_in_one_message():
+    messages = compose(100, 200, 300)
+    assert len(messages) == 1
+    text, group = messages[0]
+    assert len(group) == 3
+    assert text.count(SEPARATOR) == 2
+
+
+def test_group_is_split_at_telegram_limit():
+    half = (TELEGRAM_MAX_LENGTH - len(SEPARATOR)) // 2
+    messages = compose(half, half, 10)
+    assert [len(group) for _, group in messages] == [2, 1]
+    assert all(len(text) <= TELEGRAM_MAX_LENGTH for text, _ in messages)
+
+
+def test_exact_limit_fits_in_one_message():
+    first = 1000
+    second = TELEGRAM_MAX_LENGTH - first - len(SEPARATOR)
+    messages = compose(first, second)
+    assert len(messages) == 1
+    assert len(messages[0][0]) == TELEGRAM_MAX_LENGTH
+    assert len(compose(first, second + 1)) == 2
+
+
+def test_oversized_alert_is_truncated():
+    messages = compose(10, TELEGRAM_MAX_LENGTH + 500, 10)
+    assert [len(group) for _, group in messages] == [1, 1, 1]
+    assert len(messages[1][0]) == TELEGRAM_MAX_LENGTH
+    assert messages[1][0].endswith('…')
+
+
+def test_empty_batch():
+    assert compose() == []
+
+
+def test_truncation_keeps_tags_whole_and_closes_them():
+    text = "<b>" + "x" * 5000 + "</b>\n<a href='https://example.com'>lien</a>"
+    truncated = truncate_html(text, TELEGRAM_MAX_LENGTH)
+    assert len(truncated) == TELEGRAM_MAX_LENGTH
+    assert truncated.startswith('<b>xxx')
+    assert truncated.endswith('x…</b>')
+
+
+def test_truncation_never_cuts_a_tag_or_entity():
+    text = "x" * 4080 + "<a href='https://example.com/?a=1&amp;b=2'>lien</a> &amp; fin"
+    truncated = truncate_html(text, TELEGRAM_MAX_LENGTH)
+    assert truncated == "x" * 4080 + '…'
+    text = "<i>" + "x" * 4083 + "&amp;&amp;&amp;</i>"
+    truncated = truncate_html(text, TELEGRAM_MAX_LENGTH)
+    assert truncated == "<i>" + "x" * 4083 + "&amp;…</i>"
+    assert len(truncated) <= TELEGRAM_MAX_LENGTH
+
+
+def test_rendered_alert_with_huge_status_keeps_its_link():
+    target = build_target({'id': 'region', 'url': 'https://example.com/',
+                           'detector': {'type': 'phrase', 'phrase': 'x'}}, 60, 20)
+    message = target.render('<diff>' * 2000, 'now')
+    assert len(message) <= TELEGRAM_MAX_LENGTH
+    assert "<a href='https://example.com/'>" in message
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from scheduler import BACKOFF_MAX, Scheduler
+from targets import build_target
+
+
+def make_target(interval=300, hot_interval=10):
+    return build_target({'id': 'boudchart', 'url': 'https://www.boudchart.com/', 'hot_interval': hot_interval,
+                         'detector': {'type': 'tour_status', 'city': 'Casablanca'}},
+                        interval, 30)
+
+
+@pytest.fixture(autouse=True)
+def max_jitter(monkeypatch):
+    # Borne haute du jitter: le délai maximum possible
+    monkeypatch.setattr(random, 'uniform', lambda a, b: b)
+
+
+def test_hot_state_uses_hot_interval():
+    target = make_target()
+    scheduler = Scheduler([target])
+    assert scheduler.interval_for(target, True, 'SOON') == 10
+    assert scheduler.interval_for(target, True, 'TICKETS') == 300
+
+
+def test_backoff_starts_from_hot_interval_and_is_capped_at_normal_interval():
+    target = make_target()
+    scheduler = Scheduler([target])
+    assert scheduler.interval_for(target, False, 'SOON') == 20
+    assert scheduler.interval_for(target, False, 'SOON') == 40
+    for _ in range(10):
+        delay = scheduler.interval_for(target, False, 'SOON')
+    assert delay == 300
+
+
+def test_backoff_when_cold_grows_up_to_backoff_max():
+    target = make_target()
+    scheduler = Scheduler([target])
+    assert scheduler.interval_for(target, False, 'TICKETS') == 600
+    for _ in range(20):
+        delay = scheduler.interval_for(target, False, 'TICKETS')
+    assert delay == BACKOFF_MAX
+
+
+def test_success_resets_failures():
+    target = make_target()
+    scheduler = Scheduler([target])
+    scheduler.interval_for(target, False, 'SOON')
+    scheduler.interval_for(target, True, 'SOON')
+    assert scheduler.failures['boudchart'] == 0
+    assert scheduler.interval_for(target, False, 'SOON') == 20
+
+
+def test_due_targets_applied_in_registry_order(make_monitor):
+    monitor = make_monitor([{'id': target_id, 'url': f'http://{target_id}.invalid/',
+                             'detector': {'type': 'phrase', 'phrase': 'x'}} for target_id in ('a', 'b', 'c')])
+    applied = []
+    monitor.fetch_and_check = lambda target: (True, False, None)
+    monitor.apply_result = lambda target, result, detected_at=None: applied.append(target.id)
+    by_id = monitor.registry.get
+    # Ordre de sortie du tas (échéances): c, a, b
+    monitor.check_all([by_id('c'), by_id('a'), by_id('b')])
+    assert applied == ['a', 'b', 'c']
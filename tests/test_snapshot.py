@@ -0,0 +1,34 @@
+"""Photo d'état: écrite sur disque seulement quand un statut change"""
+
+import boudchart_monitor
+from snapshot import StatusSnapshot
+
+
+def test_snapshot_written_only_on_change(make_monitor, monkeypatch):
+    saves = []
+    monkeypatch.setattr(StatusSnapshot, 'save', lambda self, path=None: saves.append(self.version))
+    monitor = make_monitor([{'id': 'stade', 'url': 'http://127.0.0.1:9/',
+                             'detector': {'type': 'phrase', 'phrase': 'PETIT COP'}}])
+    assert saves == [1]
+    for _ in range(3):
+        monitor.last_check = 'cycle suivant'
+        monitor.publish_snapshot()
+    assert saves == [1]
+    assert monitor.snapshot.version == 4
+    monitor.states['stade'] = True
+    monitor.publish_snapshot()
+    assert saves == [1, 5]
+
+
+def test_snapshot_refreshed_for_other_processes(make_monitor, monkeypatch):
+    saves = []
+    monkeypatch.setattr(StatusSnapshot, 'save', lambda self, path=None: saves.append(self.version))
+    monkeypatch.setattr(boudchart_monitor, 'SNAPSHOT_READERS', True)
+    monkeypatch.setattr(boudchart_monitor, 'SNAPSHOT_REFRESH', 60)
+    monitor = make_monitor([{'id': 'stade', 'url': 'http://127.0.0.1:9/',
+                             'detector': {'type': 'phrase', 'phrase': 'PETIT COP'}}])
+    monitor.publish_snapshot()
+    assert saves == [1]
+    monitor.snapshot_saved_at -= 60
+    monitor.publish_snapshot()
+    assert saves == [1, 3]
@@ -0,0 +1,65 @@
+"""Journal d'état SQLite: écriture des changements, relecture, historique et reprise après arrêt brutal"""
+
+import json
+import os
+import subprocess
+import sys
+
+from state_store import StateStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_record_and_load_structured_states(tmp_path):
+    store = StateStore(tmp_path / 'state.db')
+    assert store.is_empty()
+    table = {'table': {'CASABLANCA': {'14/03': 'SOON'}}, 'reached': []}
+    store.record('boudchart', None, table, at=1)
+    store.record('stade', None, False, at=2)
+    store.record('stade', False, True, at=3)
+    assert store.load() == {'boudchart': table, 'stade': True}
+    assert not store.is_empty()
+
+
+def test_history_newest_first_with_filter_and_limit(tmp_path):
+    store = StateStore(tmp_path / 'state.db')
+    for at, (old, new) in enumerate([(None, 'SOON'), ('SOON', 'TICKETS'), ('TICKETS', 'SOLD_OUT')], 1):
+        store.record('boudchart', old, new, at=at)
+    store.record('stade', False, True, at=10)
+    assert [entry['new_state'] for entry in store.history('boudchart')] == ['SOLD_OUT', 'TICKETS', 'SOON']
+    assert store.history(limit=1) == [{'target_id': 'stade', 'old_state': False, 'new_state': True, 'at': 10}]
+
+
+def test_checkpoint_last_check(tmp_path):
+    store = StateStore(tmp_path / 'state.db')
+    assert store.last_check() is None
+    store.checkpoint('2026-01-01T10:00:00')
+    store.checkpoint('2026-01-01T10:05:00')
+    assert StateStore(tmp_path / 'state.db').last_check() == '2026-01-01T10:05:00'
+
+
+def test_changes_survive_abrupt_exit(tmp_path):
+    path = tmp_path / 'state.db'
+    # Processus tué juste après l'écriture: ni fermeture, ni point de contrôle du WAL
+    script = (
+        "import os, sys; sys.path.insert(0, sys.argv[2]); from state_store import StateStore; "
+        "store = StateStore(sys.argv[1]); store.record('stade', False, True, at=5); os._exit(0)"
+    )
+    subprocess.run([sys.executable, '-c', script, str(path), ROOT], check=True)
+    store = StateStore(path)
+    assert store.load() == {'stade': True}
+    assert store.history('stade')[0]['at'] == 5
+
+
+def test_legacy_state_file_imported_once(make_monitor, tmp_path):
+    with open(tmp_path / 'state.json', 'w') as f:
+        json.dump({'boudchart_status': 'TICKETS', 'stade_toulousain_found': True}, f)
+    entries = [{'id': 'boudchart', 'url': 'http://127.0.0.1:9/',
+                'detector': {'type': 'tour_status', 'city': 'Casablanca'}},
+               {'id': 'stade_toulousain', 'url': 'http://127.0.0.1:9/',
+                'detector': {'type': 'phrase', 'phrase': 'PETIT COP'}}]
+    monitor = make_monitor(entries)
+    assert monitor.states == {'boudchart': 'TICKETS', 'stade_toulousain': True}
+    monitor.store.record('stade_toulousain', True, False)
+    # Base déjà remplie: l'ancien fichier n'est plus relu
+    assert make_monitor(entries).states == {'boudchart': 'TICKETS', 'stade_toulousain': False}
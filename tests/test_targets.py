@@ -0,0 +1,27 @@
+"""Sites surveillés: construction depuis la configuration et message de notification"""
+
+from targets import DEFAULT_TEMPLATE, build_target
+
+
+def make_target(**entry):
+    return build_target(dict({'id': 'concerts', 'url': 'https://example.com/?a=1&b=2',
+                              'detector': {'type': 'phrase', 'phrase': 'Rock & Roll'}}, **entry), 60, 20)
+
+
+def test_render_escapes_page_text():
+    message = make_target().render('+ Rock & Roll <live> - SOON', '01/01/2026 à 10:00:00')
+    assert '<b>Nouveau statut:</b> + Rock &amp; Roll &lt;live&gt; - SOON' in message
+    assert "<a href='https://example.com/?a=1&amp;b=2'>" in message
+
+
+def test_render_escapes_detector_params_and_keeps_numbers():
+    target = make_target(template="<b>{phrase}</b> {limit:.1f} {status}",
+                         detector={'type': 'phrase', 'phrase': 'Rock & Roll'})
+    target.detector.params['limit'] = 2
+    assert target.render('<TICKETS>', 'now') == '<b>Rock &amp; Roll</b> 2.0 &lt;TICKETS&gt;'
+
+
+def test_invalid_template_falls_back_to_default():
+    target = make_target(template="{unknown}")
+    assert target.render('<x>', 'now') == DEFAULT_TEMPLATE.format(
+        name='concerts', url='https://example.com/?a=1&amp;b=2', status='&lt;x&gt;', time='now')
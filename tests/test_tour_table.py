@@ -0,0 +1,95 @@
+from detectors import UNKNOWN_DATE, TourTableDetector
+from targets import DEFAULT_TARGETS, build_target
+
+
+def page(*rows, head='<nav><a>Accueil</a><a class="btn">TICKETS</a></nav>'):
+    return f'<html><body>{head}<section class="tour">{"".join(rows)}</section></body></html>'
+
+
+def row(city, date, status):
+    return f'<div class="row"><div class="city">{city}</div><div class="date">{date}</div><a class="btn">{status}</a></div>'
+
+
+def detector(**kwargs):
+    return TourTableDetector('Boudchart', **kwargs)
+
+
+def test_table_is_extracted_and_menu_statuses_are_ignored():
+    result = detector().check(page(row('Casablanca', '14/03', 'SOON'), row('Montréal', '02 AVRIL 2025', 'TICKETS')))
+    assert result['table'] == {'CASABLANCA': {'14/03': 'SOON'}, 'MONTREAL': {'02 AVRIL 2025': 'TICKETS'}}
+
+
+def test_date_split_across_nodes():
+    html = page('<div class="row"><div>Casablanca</div><div><span>14</span><span>MAR</span></div>'
+                '<a class="btn">SOON</a></div>',
+                '<div class="row"><div>Paris</div><div><b>1ER</b> <b>MARS</b> <b>2025</b></div>'
+                '<a class="btn">TICKETS</a></div>')
+    result = detector().check(html)
+    assert result['table'] == {'CASABLANCA': {'14 MAR': 'SOON'}, 'PARIS': {'1ER MARS 2025': 'TICKETS'}}
+
+
+def test_known_city_preferred_over_position():
+    # Ville | date | salle | statut: la cellule qui suit la date est la salle
+    html = page('<div class="row"><span>Casablanca</span><span>14 MAR</span><span>Megarama</span>'
+                '<a class="btn">Tickets</a></div>')
+    d = detector(rules=[{'city': 'Casablanca', 'status': ['TICKETS']}])
+    result = d.check(html)
+    assert result['table'] == {'CASABLANCA': {'14 MAR': 'TICKETS'}}
+    assert d.apply('SOON', result)[1]
+
+
+def test_missing_date_keeps_known_city_rows_only():
+    html = page('<div class="row"><div>Casablanca</div><a class="btn">SOON</a></div>',
+                '<div class="row"><div>Newsletter</div><a class="btn">TICKETS</a></div>',
+                row('Lyon', '20/03', 'TICKETS'))
+    result = detector().check(html)
+    assert result['table'] == {'CASABLANCA': {UNKNOWN_DATE: 'SOON'}, 'LYON': {'20/03': 'TICKETS'}}
+
+
+def test_unrecognised_table_falls_back_to_tour_status():
+    # Aucune ligne (ville et statut dans le même nœud de texte): statut lu par tour_status
+    html = '<html><body><p>Casablanca 14 mars TICKETS</p></body></html>'
+    result = detector(rules=[{'city': 'Casablanca', 'status': ['TICKETS']}]).check(html)
+    assert result['table'] == {'CASABLANCA': {UNKNOWN_DATE: 'TICKETS'}}
+
+
+def test_no_rows_and_no_city_returns_none():
+    assert detector(rules=[{'when': 'new_city'}]).check('<html><body><p>Rien ici</p></body></html>') is None
+
+
+def test_status_rule_alerts_once_on_transition():
+    d = detector(rules=[{'city': 'Casablanca', 'status': ['TICKETS']}])
+    state, notify = d.apply(None, d.check(page(row('Casablanca', '14/03', 'SOON'))))
+    assert not notify
+    assert d.is_hot(state)
+    state, notify = d.apply(state, d.check(page(row('Casablanca', '14/03', 'TICKETS'))))
+    assert notify
+    assert state['reached'] == ['TICKETS']
+    assert d.apply(state, d.check(page(row('Casablanca', '14/03', 'TICKETS')))) == (state, False)
+
+
+def test_structural_rules():
+    d = detector(rules=[{'when': 'new_city'}, {'when': 'new_date'}, {'when': 'removed'}])
+    state, _ = d.apply(None, d.check(page(row('Paris', '10/03', 'SOON'), row('Lyon', '12/03', 'SOON'))))
+    state, notify = d.apply(state, d.check(page(row('Paris', '10/03', 'SOON'), row('Paris', '11/03', 'SOON'),
+                                                row('Toulouse', '15/03', 'SOON'))))
+    assert notify
+    alerts = '\n'.join(state['alerts'])
+    assert 'Nouvelle ville: Toulouse' in alerts
+    assert 'Nouvelle date à Paris: 11/03' in alerts
+    assert 'Lyon a disparu' in alerts
+
+
+def test_legacy_tour_status_state():
+    d = detector(rules=[{'city': 'Casablanca', 'status': ['TICKETS']}])
+    assert d.city_status('SOON', 'CASABLANCA') == 'SOON'
+    state, notify = d.apply('SOON', d.check(page(row('Casablanca', '14/03', 'TICKETS'))))
+    assert notify
+
+
+def test_default_boudchart_target_uses_the_table():
+    target = build_target(DEFAULT_TARGETS[0], 60, 20)
+    state, notify = target.detector.apply('SOON', target.detector.check(page(row('Casablanca', '14/03', 'TICKETS'))))
+    assert notify
+    status, _ = target.detector.display(state)
+    assert 'CASABLANCA' in target.render(status, 'now').upper()
@@ -0,0 +1,70 @@
+"""Serveur web: /health jamais mis en cache, flux /events commun aux monitorings successifs"""
+
+import json
+import threading
+
+import pytest
+
+import web_server
+from events import BROKER, SSE_RETRY_MS
+
+
+class FakeWatchdog:
+    def __init__(self, health):
+        self.health_status = health
+
+    def health(self):
+        return dict(self.health_status)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web_server, 'monitor', None)
+    monkeypatch.setattr(web_server, 'current_snapshot', lambda: None)
+    return web_server.app.test_client()
+
+
+def test_health_is_rendered_on_every_call(client, monkeypatch):
+    watchdog = FakeWatchdog({'status': 'ok', 'monitoring': True, 'heartbeat_age': 1.0})
+    monkeypatch.setattr(web_server, 'watchdog', watchdog)
+    first = client.get('/health')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in first.headers
+    watchdog.health_status['heartbeat_age'] = 2.0
+    second = client.get('/health')
+    assert json.loads(second.data)['loop']['heartbeat_age'] == 2.0
+
+
+@pytest.mark.parametrize('status', ['stalled', 'dead', 'stale'])
+def test_health_failing_status(client, monkeypatch, status):
+    monkeypatch.setattr(web_server, 'watchdog', FakeWatchdog({'status': status, 'monitoring': status == 'stale'}))
+    response = client.get('/health')
+    assert response.status_code == 503
+    assert json.loads(response.data)['status'] == status
+
+
+def test_events_stream_survives_monitor_restart(client, monkeypatch):
+    monkeypatch.setattr(web_server, 'watchdog', FakeWatchdog({'status': 'ok', 'monitoring': True}))
+    seen = BROKER.publish('change', {'target': 'a', 'state': 'SOON'})
+    stream = client.get('/events', headers={'Last-Event-ID': str(seen)}).response
+    assert next(stream).startswith(b'retry:')
+    # Un monitoring relancé publie dans le même tampon que le précédent
+    BROKER.publish('change', {'target': 'a', 'state': 'TICKETS'})
+    assert b'event: change' in next(stream)
+    stream.close()
+
+
+def test_events_subscribers_capped(client, monkeypatch):
+    monkeypatch.setattr(web_server, 'watchdog', FakeWatchdog({'status': 'ok', 'monitoring': True}))
+    monkeypatch.setattr(web_server, 'sse_slots', threading.BoundedSemaphore(1))
+    first = client.get('/events').response
+    assert next(first).startswith(b'retry:')
+    # Plus de place: reconnexion conseillée plus tard, le flux se termine sans garder de thread
+    busy = client.get('/events')
+    assert busy.data == f"retry: {web_server.SSE_BUSY_RETRY_MS}\n\n".encode()
+    # Déconnexion du premier abonné: sa place est libérée
+    first.close()
+    second = client.get('/events').response
+    assert next(second) == f"retry: {SSE_RETRY_MS}\n\n".encode()
+    second.close()
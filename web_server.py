@@ -4,34 +4,49 @@ Serveur web wrapper pour Boudchart Monitor
 Permet de déployer sur Render Web Service (gratuit) au lieu de Background Worker (payant)
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
+import fcntl
+import hashlib
+import json
 import threading
 import logging
 import os
-from boudchart_monitor import DualMonitor
+from html import escape
+import time
+from events import BROKER
+from leases import SHARDING
+from log_config import setup_logging
+from loop_watchdog import Watchdog, read_heartbeat
+from snapshot import SnapshotFile
+
+# Un seul processus fait tourner le monitoring (verrou sur ce fichier), les autres lisent sa photo
+MONITOR_LOCK_FILE = os.getenv('MONITOR_LOCK_FILE', 'monitor.lock')
 
 app = Flask(__name__)
 monitor = None
-monitor_thread = None
+monitor_lock = None
+# Base d'état ouverte en lecture par les processus qui ne font pas tourner le monitoring (/history)
+state_store = None
+# Chien de garde du thread de monitoring (processus qui fait tourner le monitoring)
+watchdog = None
+# Photo écrite par le processus qui fait tourner le monitoring
+snapshot_file = SnapshotFile()
+# Réponses pré-rendues: {nom: (photo, corps, etag)}
+rendered = {}
+# Abonnés /events simultanés au plus (par processus): chaque flux occupe un thread du worker gthread,
+# les autres threads (WEB_THREADS) restent libres pour /health, /ping et le tableau de bord
+SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', str(max(1, int(os.getenv('WEB_THREADS', '32')) - 8))))
+# Délai de reconnexion conseillé aux abonnés refusés (millisecondes)
+SSE_BUSY_RETRY_MS = int(os.getenv('SSE_BUSY_RETRY_MS', '30000'))
+sse_slots = threading.BoundedSemaphore(SSE_MAX_CLIENTS)
+# Processus sans monitoring: un seul thread suit la photo sur disque pour tous les abonnés
+snapshot_watcher = None
+snapshot_watcher_lock = threading.Lock()
 
-# Configuration logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Configuration logging (file + thread d'écriture, voir log_config)
+setup_logging()
 
-@app.route('/')
-def home():
-    """Page d'accueil"""
-    # Obtenir les statuts actuels si disponibles
-    boudchart_status = "Vérification..."
-    stade_status = "Vérification..."
-    
-    if monitor:
-        boudchart_status = monitor.boudchart_status or "En attente"
-        stade_status = "Trouvé ✅" if monitor.stade_toulousain_found else "Non trouvé ❌"
-    
-    return f"""
+HOME_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -60,6 +75,10 @@ def home():
                 background: #e8f5e9;
                 border-left: 4px solid #4caf50;
             }}
+            .status.alert {{
+                background: #fdecea;
+                border-left-color: #e53935;
+            }}
             .monitoring-item {{
                 background: #f8f9fa;
                 padding: 20px;
@@ -107,25 +126,13 @@ def home():
     <body>
         <div class="container">
             <h1>🔍 Dual Monitor</h1>
-            <div class="subtitle">Surveillance automatique de 2 sites</div>
+            <div class="subtitle">Surveillance automatique de {site_count} sites</div>
             
-            <div class="status">
-                <strong>✅ Service actif</strong>
+            <div class="status {service_class}">
+                <strong>{service_label}</strong>
             </div>
             
-            <div class="monitoring-item">
-                <h3>🎭 Boudchart - Casablanca</h3>
-                <p><strong>Site:</strong> <a href="https://www.boudchart.com/" target="_blank">www.boudchart.com</a></p>
-                <p><strong>Surveillance:</strong> Changement de statut SOON → TICKETS</p>
-                <p><strong>Statut actuel:</strong> <span class="status-badge status-{boudchart_status.lower()}">{boudchart_status}</span></p>
-            </div>
-            
-            <div class="monitoring-item">
-                <h3>🏉 Stade Toulousain</h3>
-                <p><strong>Site:</strong> <a href="https://billetterie.stadetoulousain.fr" target="_blank">billetterie.stadetoulousain.fr</a></p>
-                <p><strong>Surveillance:</strong> Apparition de "PETIT COP STADE TOULOUSAIN"</p>
-                <p><strong>Statut actuel:</strong> <span class="status-badge {'status-found' if monitor and monitor.stade_toulousain_found else 'status-notfound'}">{stade_status}</span></p>
-            </div>
+            {items}
             
             <div class="info">
                 <p>✓ Vérification automatique toutes les 5 minutes</p>
@@ -134,35 +141,233 @@ def home():
             
             <div class="links">
                 <p><a href="/health">📊 API Statut (JSON) →</a></p>
+                <p><a href="/history">🕒 Historique des changements (JSON) →</a></p>
+                <p><a href="/usage">📶 Bande passante par site (JSON) →</a></p>
+                <p><a href="/metrics">📈 Métriques (Prometheus) →</a></p>
                 <p><a href="/test-telegram">📱 Test Telegram →</a></p>
             </div>
         </div>
+        <script>
+            // Mise à jour en direct des statuts (Server-Sent Events)
+            if (window.EventSource) {{
+                const source = new EventSource('/events');
+                source.addEventListener('change', (e) => {{
+                    const data = JSON.parse(e.data);
+                    const badge = document.querySelector('#target-' + CSS.escape(data.target) + ' .status-badge');
+                    if (!badge) {{ location.reload(); return; }}
+                    badge.textContent = data.label;
+                    badge.className = 'status-badge ' + data.css_class;
+                }});
+                source.addEventListener('snapshot', () => location.reload());
+            }}
+        </script>
     </body>
     </html>
-    """, 200
+"""
 
-@app.route('/health')
-def health():
-    """Endpoint de santé pour les checks"""
-    if monitor:
+
+# Bandeau de la page d'accueil selon l'état du monitoring (chien de garde)
+SERVICE_LABELS = {
+    'ok': '✅ Service actif',
+    'degraded': '⚠️ Service actif, vérifications en retard',
+    'stale': '⚠️ Service actif, aucune vérification réussie récemment',
+    'starting': '⏳ Démarrage du monitoring...',
+    'stalled': '🛑 Monitoring bloqué',
+    'dead': '🛑 Monitoring arrêté',
+}
+
+
+def current_snapshot():
+    """Dernière photo publiée: celle du monitoring local, sinon celle écrite sur disque"""
+    if monitor is not None:
+        return monitor.snapshot
+    return snapshot_file.get()
+
+
+def current_health():
+    """Santé du monitoring: celle du chien de garde local, sinon celle publiée sur disque"""
+    if watchdog is not None:
+        return watchdog.health()
+    return read_heartbeat()
+
+
+def render_home(snapshot, service='ok'):
+    """Page d'accueil construite depuis une photo de l'état et l'état du service"""
+    items = []
+    site_count = "?"
+    if snapshot is not None:
+        site_count = len(snapshot.targets)
+        for target in snapshot.targets:
+            items.append(f"""
+            <div class="monitoring-item" id="target-{escape(target['id'])}">
+                <h3>{target['icon']} {escape(target['name'])}</h3>
+                <p><strong>Site:</strong> <a href="{escape(target['url'])}" target="_blank">{escape(target['host'])}</a></p>
+                <p><strong>Surveillance:</strong> {escape(target['description'])}</p>
+                <p><strong>Statut actuel:</strong> <span class="status-badge {escape(target['css_class'])}">{escape(target['label'])}</span></p>
+            </div>""")
+    else:
+        items.append("""
+            <div class="monitoring-item">
+                <p><strong>Statut actuel:</strong> Vérification...</p>
+            </div>""")
+    return HOME_TEMPLATE.format(site_count=site_count, items="".join(items),
+                                service_label=SERVICE_LABELS.get(service, service),
+                                service_class='alert' if service in ('stalled', 'dead', 'stale') else '')
+
+
+def render_health(snapshot, liveness=None):
+    """Statut JSON construit depuis une photo de l'état et la santé de la boucle (chien de garde)"""
+    if snapshot is None:
         status = {
-            "status": "ok",
+            "status": liveness['status'] if liveness else "starting",
             "service": "dual-monitor",
-            "monitoring": True,
-            "boudchart": {
-                "casablanca_status": monitor.boudchart_status or "checking"
-            },
-            "stade_toulousain": {
-                "petit_cop_found": monitor.stade_toulousain_found
-            }
+            "monitoring": False
         }
     else:
         status = {
-            "status": "starting",
+            "status": liveness['status'] if liveness else "ok",
             "service": "dual-monitor",
-            "monitoring": False
+            "monitoring": liveness['monitoring'] if liveness else True,
+            "version": snapshot.version,
+            "last_check": snapshot.last_check,
+            "targets": {
+                target['id']: {
+                    "name": target['name'],
+                    "url": target['url'],
+                    "state": target['state']
+                }
+                for target in snapshot.targets
+            }
         }
-    return jsonify(status), 200
+    if liveness:
+        status["loop"] = {key: value for key, value in liveness.items() if key not in ('status', 'monitoring')}
+    return json.dumps(status)
+
+
+def cached_response(name, render, mimetype, extra=None, status=200):
+    """Réponse pré-rendue pour la photo courante (et extra), avec ETag et 304 si le client l'a déjà"""
+    snapshot = current_snapshot()
+    entry = rendered.get(name)
+    if entry is None or entry[0] is not snapshot or entry[1] != extra:
+        # Rendu une seule fois par version; deux rendus simultanés donnent le même résultat
+        body = (render(snapshot) if extra is None else render(snapshot, extra)).encode('utf-8')
+        entry = (snapshot, extra, body, hashlib.sha1(body).hexdigest())
+        rendered[name] = entry
+    _, _, body, etag = entry
+    response = Response(body, status=status, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/')
+def home():
+    """Page d'accueil"""
+    health = current_health()
+    return cached_response('home', render_home, 'text/html', health['status'] if health else None)
+
+@app.route('/health')
+def health():
+    """Endpoint de santé pour les checks: 503 si le monitoring est bloqué, arrêté ou sans vérification réussie"""
+    health = current_health()
+    # stale: la boucle tourne mais aucune page n'est récupérée (le chien de garde ne relance pas)
+    failing = health is not None and health['status'] in ('stalled', 'dead', 'stale')
+    # Pas d'ETag ni de rendu mis en cache: la santé de la boucle (âge du battement de cœur, retard)
+    # change à chaque appel et les sondes doivent toujours lire la valeur courante
+    response = Response(render_health(current_snapshot(), health), status=503 if failing else 200,
+                        mimetype='application/json')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def watch_snapshot():
+    """Sans monitoring local: signale les changements de la photo écrite sur disque à tous les abonnés
+    (via le tampon commun, un seul thread quel que soit le nombre d'abonnés)"""
+    snapshot = current_snapshot()
+    seen = snapshot and [(t['id'], t['label']) for t in snapshot.targets]
+    while watchdog is None:
+        time.sleep(1)
+        snapshot = current_snapshot()
+        statuses = snapshot and [(t['id'], t['label']) for t in snapshot.targets]
+        if statuses != seen:
+            seen = statuses
+            BROKER.publish('snapshot', {'reason': 'changed'})
+
+def start_snapshot_watcher():
+    global snapshot_watcher
+    with snapshot_watcher_lock:
+        if snapshot_watcher is None:
+            snapshot_watcher = threading.Thread(target=watch_snapshot, name='snapshot-watcher', daemon=True)
+            snapshot_watcher.start()
+
+def subscriber_stream(last_event_id):
+    """Flux d'un abonné s'il reste une place, sinon reconnexion conseillée plus tard (le flux se termine)"""
+    if not sse_slots.acquire(blocking=False):
+        yield f"retry: {SSE_BUSY_RETRY_MS}\n\n"
+        return
+    try:
+        yield from BROKER.stream(last_event_id)
+    finally:
+        # Déconnexion: le serveur ferme le générateur
+        sse_slots.release()
+
+@app.route('/events')
+def events():
+    """Flux Server-Sent Events des changements d'état (reprise via Last-Event-ID)"""
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    if watchdog is None:
+        start_snapshot_watcher()
+    # Tampon commun du processus: les abonnés survivent aux relances du monitoring
+    return Response(subscriber_stream(last_event_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Pas de mise en tampon par un proxy (nginx)
+        'X-Accel-Buffering': 'no',
+    })
+
+def shared_store():
+    """Base d'état partagée (STATE_DB), ouverte à la première lecture dans les processus sans monitoring"""
+    global state_store
+    if state_store is None:
+        from state_store import STATE_DB, StateStore
+        state_store = StateStore(STATE_DB)
+    return state_store
+
+def monitor_owner():
+    """PID du processus qui fait tourner le monitoring (écrit dans MONITOR_LOCK_FILE), None si inconnu"""
+    try:
+        with open(MONITOR_LOCK_FILE) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+@app.route('/history')
+def history():
+    """Historique des changements d'état (paramètres optionnels: target, limit), lu dans la base partagée"""
+    store = monitor.store if monitor else shared_store()
+    target_id = request.args.get('target')
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify({"history": store.history(target_id, min(limit, 1000))}), 200
+
+@app.route('/usage')
+def usage():
+    """Bande passante par site sur la fenêtre glissante: octets reçus, budget, allongement de l'intervalle"""
+    if not monitor:
+        if watchdog is not None:
+            return jsonify({"status": "starting", "usage": {}}), 200
+        # Compteurs en mémoire du processus de monitoring: pas lisibles depuis ce worker
+        return jsonify({
+            "status": "unavailable",
+            "message": "Consommation tenue par le processus de monitoring, pas par ce worker",
+            "monitor_pid": monitor_owner(),
+        }), 503
+    return jsonify({"window": monitor.bandwidth.window, "usage": monitor.bandwidth.report()}), 200
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métriques au format Prometheus"""
+    import metrics
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/ping')
 def ping():
@@ -172,7 +377,7 @@ def ping():
 @app.route('/test-telegram')
 def test_telegram():
     """Endpoint pour tester les notifications Telegram"""
-    import requests
+    import http_client
     
     telegram_enabled = os.getenv('TELEGRAM_ENABLED', 'false').lower() == 'true'
     bot_token = os.getenv('TELEGRAM_BOT_TOKEN', '')
@@ -191,8 +396,6 @@ def test_telegram():
         }), 400
     
     try:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        
         message = """🎭 <b>TEST - ALERTE BOUDCHART</b> 🎭
 
 ✅ <b>Félicitations!</b> Les notifications Telegram fonctionnent parfaitement!
@@ -208,13 +411,7 @@ Quand le statut de Casablanca passera de "SOON" à "TICKETS", vous recevrez exac
 ⏱️ Vérification: Toutes les 5 minutes
 🎉 Tout est opérationnel!"""
         
-        response = requests.post(url, json={
-            "chat_id": chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }, timeout=10)
-        
-        response.raise_for_status()
+        response = http_client.send_telegram_message(bot_token, chat_id, message)
         
         return jsonify({
             "status": "success",
@@ -232,17 +429,54 @@ def run_monitor():
     """Lance le monitoring dans un thread séparé"""
     global monitor
     try:
-        logging.info("Démarrage du monitoring Boudchart & Stade Toulousain...")
-        monitor = DualMonitor()
+        logging.info("Démarrage du monitoring des sites configurés...")
+        # Import tardif: requests & co se chargent ici, pendant que le serveur répond déjà
+        from boudchart_monitor import DualMonitor
+        started = DualMonitor()
+        if watchdog is not None and watchdog.thread not in (None, threading.current_thread()):
+            # Démarrage trop lent: le chien de garde a déjà lancé un autre monitoring
+            started.abandon()
+            return
+        monitor = started
+        # Premier démarrage ou relance: les navigateurs abonnés rechargent l'état et le bandeau
+        BROKER.publish('snapshot', {'reason': 'started'})
         monitor.run()
     except Exception as e:
-        logging.error(f"Erreur dans le thread de monitoring: {e}")
+        logging.exception("Erreur dans le thread de monitoring: %s", e)
+
+def launch_monitor():
+    """Thread de monitoring (au démarrage, puis à chaque relance par le chien de garde)"""
+    thread = threading.Thread(target=run_monitor, name='monitor', daemon=True)
+    thread.start()
+    return thread
+
+def start_monitor():
+    """Démarre le monitoring dans un thread daemon, sauf s'il tourne déjà dans un autre processus
+    (en mode réparti, chaque processus surveille sa part des sites)"""
+    global watchdog, monitor_lock
+    if not SHARDING:
+        # 'a+': ne pas effacer le PID écrit par le détenteur du verrou
+        lock = open(MONITOR_LOCK_FILE, 'a+')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            logging.info("Monitoring déjà lancé par le processus %s: lecture de sa photo d'état", monitor_owner())
+            return False
+        lock.truncate(0)
+        lock.write(str(os.getpid()))
+        lock.flush()
+        # Le verrou est gardé tant que le processus vit (libéré par le système s'il meurt)
+        monitor_lock = lock
+    # Le chien de garde lance le monitoring, puis le relance s'il meurt ou se bloque
+    watchdog = Watchdog(launch_monitor, lambda: monitor)
+    watchdog.start()
+    return True
 
 if __name__ == '__main__':
-    # Démarrer le monitoring dans un thread daemon
+    # Serveur de développement; en production: gunicorn -c gunicorn.conf.py web_server:app
     logging.info("Lancement du serveur web...")
-    monitor_thread = threading.Thread(target=run_monitor, daemon=True)
-    monitor_thread.start()
+    start_monitor()
     
     # Démarrer le serveur Flask
     port = int(os.getenv('PORT', 10000))